@@ -43,9 +43,8 @@ def create_app(config_class=Config):
     from app.models import init_app as init_models
     init_models(app)
     
-    # Comment out API routes for now
-    # from app.api import bp as api_bp
-    # app.register_blueprint(api_bp, url_prefix='/api')
+    from app.api import bp as api_bp
+    app.register_blueprint(api_bp, url_prefix='/api')
 
     # Configure login manager
     from app.models import User
@@ -1,23 +1,72 @@
-from flask import jsonify, request, abort
+from flask import jsonify, request, abort, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
+import pandas as pd
 from app import db
 from app.api import bp
-from app.models import MLModel, Prediction
-from app.models.ml_utils import make_prediction
-import json
+from app.models.models import Model
+from app.models.user import User
+from app.models.registry import model_registry
+from app.models.inference import prepare_features, predict_frame, predict_row
+from app.models.prediction_log import prediction_log
+from app.models.leaderboard import LEADERBOARD_METRICS, leaderboard as rank_models, visible_user_ids
+
+def _check_access(model):
+    """Abort with 403 unless the current user owns the model or teaches its owner"""
+    if not (current_user.id == model.user_id or
+            (current_user.is_teacher() and model.owner.teacher_id == current_user.id)):
+        abort(403)
+
+def _batch_frame(data, feature_columns):
+    """
+    Build a DataFrame of raw feature values from a batch payload, either
+    {"rows": [[...], ...]} / {"rows": [{feature: value}, ...]} or the columnar
+    {"columns": {feature: [values...]}}. Raises ValueError for malformed input.
+    """
+    if 'columns' in data:
+        columns = data['columns']
+        if not isinstance(columns, dict):
+            raise ValueError('columns must map each feature to a list of values')
+        missing = [col for col in feature_columns if col not in columns]
+        if missing:
+            raise ValueError(f'Missing feature columns: {", ".join(missing)}')
+        not_lists = [col for col in feature_columns if not isinstance(columns[col], list)]
+        if not_lists:
+            raise ValueError(f'Values must be given as a list for columns: {", ".join(not_lists)}')
+        lengths = {len(columns[col]) for col in feature_columns}
+        if len(lengths) > 1:
+            raise ValueError('All feature columns must have the same number of values')
+        return pd.DataFrame({col: columns[col] for col in feature_columns})
+
+    if 'rows' in data:
+        rows = data['rows']
+        if not isinstance(rows, list):
+            raise ValueError('rows must be a list')
+        if rows and all(isinstance(row, dict) for row in rows):
+            df = pd.DataFrame.from_records(rows)
+            missing = [col for col in feature_columns if col not in df.columns]
+            if missing:
+                raise ValueError(f'Missing feature columns: {", ".join(missing)}')
+            return df[feature_columns]
+        for i, row in enumerate(rows):
+            if not isinstance(row, list) or len(row) != len(feature_columns):
+                raise ValueError(f'Row {i} must be a list of {len(feature_columns)} feature values')
+        return pd.DataFrame(rows, columns=feature_columns)
+
+    raise ValueError('Request must contain either rows or columns')
 
 @bp.route('/models', methods=['GET'])
 @login_required
 def get_models():
     """Get all models for the current user"""
+    query = Model.query.options(joinedload(Model.dataset))
     if current_user.is_student():
-        models = MLModel.query.filter_by(user_id=current_user.id).all()
+        models = query.filter_by(user_id=current_user.id).all()
     else:  # Teacher
-        # Get all students assigned to this teacher
-        student_ids = [student.id for student in current_user.students]
-        # Get models from these students
-        models = MLModel.query.filter(MLModel.user_id.in_(student_ids)).all() if student_ids else []
-    
+        # Get models from the students assigned to this teacher
+        student_ids = db.session.query(User.id).filter(User.teacher_id == current_user.id)
+        models = query.filter(Model.user_id.in_(student_ids)).all()
+
     return jsonify({
         'success': True,
         'models': [{
@@ -26,24 +75,55 @@ def get_models():
             'description': model.description,
             'model_type': model.model_type,
             'target_column': model.target_column,
-            'feature_columns': model.get_feature_columns(),
+            'feature_columns': model.feature_columns,
             'created_at': model.created_at.isoformat(),
             'dataset_id': model.dataset_id,
             'dataset_name': model.dataset.name
         } for model in models]
     })
 
+@bp.route('/leaderboard', methods=['GET'])
+@login_required
+def leaderboard():
+    """Rank the models visible to the current user by one metric"""
+    metric = request.args.get('metric', 'r2_score')
+    if metric not in LEADERBOARD_METRICS:
+        return jsonify({
+            'success': False,
+            'error': f'Unsupported metric: {metric}. Choose one of {", ".join(LEADERBOARD_METRICS)}'
+        }), 400
+
+    max_limit = current_app.config['LEADERBOARD_LIMIT']
+    limit = min(request.args.get('limit', max_limit, type=int), max_limit)
+    ranked = rank_models(metric, visible_user_ids(current_user),
+                         dataset_id=request.args.get('dataset_id', type=int),
+                         target_column=request.args.get('target_column') or None,
+                         limit=max(limit, 1))
+
+    return jsonify({
+        'success': True,
+        'metric': metric,
+        'models': [{
+            'rank': rank,
+            'id': model.id,
+            'name': model.name,
+            'owner': model.owner.username,
+            'dataset_id': model.dataset_id,
+            'dataset_name': model.dataset.name,
+            'target_column': model.target_column,
+            'value': value
+        } for rank, (model, value) in enumerate(ranked, start=1)]
+    })
+
 @bp.route('/models/<int:model_id>', methods=['GET'])
 @login_required
 def get_model(model_id):
     """Get details for a specific model"""
-    model = MLModel.query.get_or_404(model_id)
-    
+    model = Model.query.get_or_404(model_id)
+
     # Check if user has permission to view the model
-    if not (current_user.id == model.user_id or 
-            (current_user.is_teacher() and model.owner.teacher_id == current_user.id)):
-        abort(403)
-    
+    _check_access(model)
+
     return jsonify({
         'success': True,
         'model': {
@@ -52,8 +132,8 @@ def get_model(model_id):
             'description': model.description,
             'model_type': model.model_type,
             'target_column': model.target_column,
-            'feature_columns': model.get_feature_columns(),
-            'performance_metrics': model.get_performance_metrics(),
+            'feature_columns': model.feature_columns,
+            'performance_metrics': model.metrics,
             'created_at': model.created_at.isoformat(),
             'dataset_id': model.dataset_id,
             'dataset_name': model.dataset.name,
@@ -65,55 +145,116 @@ def get_model(model_id):
 @login_required
 def predict(model_id):
     """Make a prediction using a model"""
-    model = MLModel.query.get_or_404(model_id)
-    
+    model = Model.query.get_or_404(model_id)
+
     # Check if user has permission to use the model
-    if not (current_user.id == model.user_id or 
-            (current_user.is_teacher() and model.owner.teacher_id == current_user.id)):
-        abort(403)
-    
+    _check_access(model)
+
     # Get feature values from request
-    data = request.get_json()
+    data = request.get_json(silent=True)
     if not data or 'feature_values' not in data:
         return jsonify({
             'success': False,
             'error': 'Missing feature_values in request'
         }), 400
-    
+
     feature_values = data['feature_values']
-    feature_columns = model.get_feature_columns()
-    
+    feature_columns = model.feature_columns
+
     # Validate feature values
     if len(feature_values) != len(feature_columns):
         return jsonify({
             'success': False,
             'error': f'Expected {len(feature_columns)} feature values, but got {len(feature_values)}'
         }), 400
-    
+
     # Make prediction
-    result = make_prediction(model.model_data, feature_values)
-    
-    if result['success']:
-        # Save prediction to database
-        input_data = {column: value for column, value in zip(feature_columns, feature_values)}
-        output_data = {'prediction': result['prediction']}
-        
-        prediction = Prediction(
-            input_data=json.dumps(input_data),
-            output_data=json.dumps(output_data),
-            model_id=model.id
-        )
-        
-        db.session.add(prediction)
-        db.session.commit()
-        
+    input_data = {column: value for column, value in zip(feature_columns, feature_values)}
+    try:
+        model_info = model_registry.get(model)
+        prediction, _ = predict_row(model_info, feature_columns, input_data)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+    # Log the prediction; it is written to the database in the background
+    prediction_log.log(model.id, input_data, {'prediction': prediction})
+
+    return jsonify({
+        'success': True,
+        'prediction': prediction,
+        'input': input_data
+    })
+
+@bp.route('/models/<int:model_id>/predict/batch', methods=['POST'])
+@login_required
+def predict_batch(model_id):
+    """
+    Score many rows with a single vectorized call. Accepts a list of rows
+    (lists in feature_columns order, or objects keyed by feature) or a
+    columnar {feature: [values...]} payload; results keep the input order.
+    """
+    model = Model.query.get_or_404(model_id)
+
+    # Check if user has permission to use the model
+    _check_access(model)
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({
+            'success': False,
+            'error': 'Request body must be a JSON object'
+        }), 400
+
+    try:
+        df = _batch_frame(data, model.feature_columns)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    max_rows = current_app.config['API_MAX_BATCH_ROWS']
+    if len(df) > max_rows:
+        return jsonify({
+            'success': False,
+            'error': f'Batch has {len(df)} rows; at most {max_rows} rows can be scored per request'
+        }), 413
+
+    if len(df) == 0:
         return jsonify({
             'success': True,
-            'prediction': result['prediction'],
-            'input': input_data
+            'count': 0,
+            'predictions': []
         })
-    else:
+
+    try:
+        model_info = model_registry.get(model)
+        X = prepare_features(df, model.feature_columns, model_info['feature_columns'])
+        predictions, probabilities = predict_frame(
+            model_info, X, with_probability=model.model_type == 'classification'
+        )
+    except Exception as e:
         return jsonify({
             'success': False,
-            'error': result.get('error', 'Unknown error')
-        }), 500 
\ No newline at end of file
+            'error': str(e)
+        }), 500
+
+    # Log the whole batch; it is written with one bulk insert in the background
+    inputs = df.to_dict('records')
+    if probabilities is not None:
+        outputs = [{'prediction': p, 'probability': prob} for p, prob in zip(predictions, probabilities)]
+    else:
+        outputs = [{'prediction': p} for p in predictions]
+    prediction_log.log_many(model.id, inputs, outputs)
+
+    response = {
+        'success': True,
+        'count': len(predictions),
+        'predictions': predictions
+    }
+    if probabilities is not None:
+        response['probabilities'] = probabilities
+    return jsonify(response)
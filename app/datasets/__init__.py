@@ -2,5 +2,5 @@ from flask import Blueprint
 
 bp = Blueprint('datasets', __name__, template_folder='templates')
 
-from app.datasets import routes
+from app.datasets import routes, commands
 from app.datasets.models import Dataset 
\ No newline at end of file
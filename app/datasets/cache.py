@@ -0,0 +1,97 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class DatasetCache:
+    """
+    Process-wide LRU cache of parsed datasets.
+
+    Entries are keyed by (path, mtime, size, columns), so a file that is
+    replaced or modified on disk is never served stale. The cache is bounded
+    by the total in-memory size of the cached DataFrames; the least recently
+    used entries are evicted once the byte budget is exceeded.
+
+    Cached DataFrames are shared between callers and must not be modified
+    in place.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(file_path, columns=None):
+        """Build the cache key for a file, or return None if it does not exist"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        columns = tuple(columns) if columns is not None else None
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, columns)
+
+    def get(self, file_path, loader, columns=None):
+        """
+        Return the DataFrame for file_path, calling loader(file_path, columns)
+        and caching the result on a miss
+        """
+        key = self.make_key(file_path, columns)
+        if key is None:
+            return loader(file_path, columns)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        # Parse outside the lock so other datasets can be served meanwhile
+        df = loader(file_path, columns)
+        size = int(df.memory_usage(deep=True).sum())
+
+        # Objects larger than the whole budget are returned but not cached
+        if size > self.max_bytes:
+            return df
+
+        with self._lock:
+            if key not in self._entries:
+                self._discard_stale(key[0])
+                self._entries[key] = (df, size)
+                self._total_bytes += size
+                self._evict()
+        return df
+
+    def invalidate(self, file_path):
+        """Drop every cached entry for file_path"""
+        with self._lock:
+            self._discard_stale(os.path.abspath(file_path), keep_current=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def _discard_stale(self, path, keep_current=True):
+        # Remove entries for an older version of the same file
+        try:
+            stat = os.stat(path)
+            current = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            current = None
+
+        for key in [k for k in self._entries if k[0] == path]:
+            if keep_current and (key[1], key[2]) == current:
+                continue
+            _, size = self._entries.pop(key)
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
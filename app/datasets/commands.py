@@ -0,0 +1,33 @@
+import click
+
+from app import db
+from app.datasets import bp
+from app.datasets.models import Dataset
+from app.datasets.profile import profile_dataset
+
+
+@bp.cli.command('backfill-stats')
+@click.option('--all', 'refresh_all', is_flag=True, help='Recompute stats for every dataset, not only missing ones.')
+def backfill_stats(refresh_all):
+    """Fill in row_count, file_size and file_mtime for datasets uploaded before they were stored."""
+    query = Dataset.query
+    if not refresh_all:
+        query = query.filter((Dataset.row_count.is_(None)) | (Dataset.file_size.is_(None)) |
+                             (Dataset.file_mtime.is_(None)))
+
+    updated = 0
+    for dataset in query.all():
+        if not dataset.is_valid:
+            click.echo(f'Skipping dataset {dataset.id}: file not found at {dataset.file_path}')
+            continue
+        try:
+            if dataset.profile is None or refresh_all:
+                dataset.profile = profile_dataset(dataset.file_path)
+            dataset.update_file_stats()
+            db.session.commit()
+            updated += 1
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'Error updating dataset {dataset.id}: {str(e)}')
+
+    click.echo(f'Updated {updated} dataset(s).')
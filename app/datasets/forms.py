@@ -21,10 +21,17 @@ class DatasetUploadForm(FlaskForm):
             if os.path.exists(os.path.join(Config.UPLOAD_FOLDER, filename)):
                 raise ValidationError('A file with this name already exists. Please rename your file.')
             
-            # Check file size (limit to 10MB)
+            # Check file size against the configured limit
             file.data.seek(0, os.SEEK_END)
             size = file.data.tell()
             file.data.seek(0)  # Reset file pointer to the beginning
             
-            if size > 10 * 1024 * 1024:  # 10MB in bytes
-                raise ValidationError('File size exceeds the 10MB limit.') 
\ No newline at end of file
+            if Config.DATASET_MAX_BYTES and size > Config.DATASET_MAX_BYTES:
+                raise ValidationError(f'File size exceeds the {Config.DATASET_MAX_BYTES / (1024 * 1024):g}MB limit.') 
+
+class DatasetAppendForm(FlaskForm):
+    file = FileField('CSV File', validators=[
+        FileRequired(),
+        FileAllowed(['csv'], 'CSV files only!')
+    ])
+    submit = SubmitField('Append Rows')
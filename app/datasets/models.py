@@ -13,26 +13,117 @@ class Dataset(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     columns = db.Column(db.Text)
     
+    # Profile computed once at upload time, stored as a JSON string
+    _profile = db.Column('profile', db.Text)
+    
+    # Row count and file size stored at upload so list pages never touch the file
+    row_count = db.Column(db.Integer)
+    file_size = db.Column(db.BigInteger)
+    
+    # Modification time of the file the stored metadata was computed from
+    file_mtime = db.Column(db.Float)
+    
+    # Incremented every time rows are appended; see DatasetVersion
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     owner = db.relationship('User', foreign_keys=[user_id], backref=db.backref('datasets', lazy='dynamic'))
     
+    __table_args__ = (
+        # Dataset lists per user, newest first
+        db.Index('ix_datasets_user_id_created_at', 'user_id', 'created_at'),
+    )
+    
     @property
     def is_valid(self):
         """Check if the dataset file exists and is valid"""
         return os.path.exists(self.file_path)
     
+    @property
+    def profile(self):
+        if self._profile:
+            return json.loads(self._profile)
+        return None
+    
+    @profile.setter
+    def profile(self, value):
+        if value is not None:
+            self._profile = json.dumps(value)
+            self.row_count = value['row_count']
+        else:
+            self._profile = None
+    
     @property
     def num_rows(self):
-        """Return the number of rows in the dataset"""
-        try:
-            import pandas as pd
-            if not self.is_valid:
-                return 0
-            df = pd.read_csv(self.file_path)
-            return len(df)
-        except:
-            return 0
+        """
+        Return the stored number of rows in the dataset. Datasets uploaded
+        before row_count was stored read 0 until `flask datasets
+        backfill-stats` fills it in; falling back to the profile here would
+        load it once per row in listings that defer it.
+        """
+        return self.row_count if self.row_count is not None else 0
+    
+    @property
+    def file_size_display(self):
+        """Return the stored file size in MB"""
+        if self.file_size is None:
+            return 'Unknown'
+        return f"{self.file_size / (1024 * 1024):.2f} MB"
+    
+    def update_file_stats(self):
+        """Refresh file_size and file_mtime from disk and row_count from the stored profile"""
+        self.file_size = os.path.getsize(self.file_path)
+        self.file_mtime = os.path.getmtime(self.file_path)
+        profile = self.profile
+        if profile is not None:
+            self.row_count = profile['row_count']
+    
+    @property
+    def metadata_is_current(self):
+        """True if the stored columns and profile were computed from the file as it is now"""
+        return (self.file_mtime is not None and self.is_valid
+                and os.path.getmtime(self.file_path) == self.file_mtime)
+    
+    def get_column_info(self):
+        """
+        Return [{'name': ..., 'dtype': ...}] for every column. Served from the
+        stored metadata while the file is unchanged; if the file was modified
+        the header is re-read, the stale profile is dropped so it is rebuilt
+        on the next view, and the caller should commit. Datasets stored
+        before file_mtime was recorded keep their metadata and just have the
+        file stats filled in, since there is nothing to compare against.
+        """
+        if self.file_mtime is None and self.columns and self.is_valid:
+            self.update_file_stats()
+        if self.metadata_is_current and self.columns:
+            profile = self.profile or {'columns': {}}
+            return [{'name': name, 'dtype': profile['columns'].get(name, {}).get('dtype')}
+                    for name in json.loads(self.columns)]
+        
+        from app.datasets.utils import read_column_info
+        column_info = read_column_info(self.file_path)
+        self.columns = json.dumps([column['name'] for column in column_info])
+        self.profile = None
+        self.row_count = None
+        self.update_file_stats()
+        return column_info
             
+    def rows_since(self, version):
+        """
+        Return (byte_offset, row_offset) of the first row appended after the
+        given version, or None if those rows cannot be located: nothing was
+        appended, or the file was changed outside the app along the way
+        """
+        if version is None or version >= self.version or not self.metadata_is_current:
+            return None
+        appended = DatasetVersion.query.filter(DatasetVersion.dataset_id == self.id,
+                                               DatasetVersion.version > version) \
+            .order_by(DatasetVersion.version).all()
+        # Every later version must be a recorded append
+        if len(appended) != self.version - version:
+            return None
+        return appended[0].byte_offset, appended[0].row_offset
+    
     @property
     def num_columns(self):
         """Return the number of columns in the dataset"""
@@ -44,4 +135,31 @@ class Dataset(db.Model):
             return 0
     
     def __repr__(self):
-        return f'<Dataset {self.name}>' 
\ No newline at end of file
+        return f'<Dataset {self.name}>' 
+
+
+class DatasetVersion(db.Model):
+    """
+    Rows appended to a dataset, one record per version after the original
+    upload (version 1). Datasets only grow by appending to the end of the
+    file, so every version is a contiguous block of rows that can be read on
+    its own by seeking to byte_offset.
+    """
+    __tablename__ = 'dataset_versions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, db.ForeignKey('datasets.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    
+    # Position of the first row of this version in the file
+    byte_offset = db.Column(db.BigInteger, nullable=False)
+    row_offset = db.Column(db.Integer, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('dataset_id', 'version', name='uq_dataset_versions_dataset_id_version'),
+    )
+    
+    def __repr__(self):
+        return f'<DatasetVersion {self.dataset_id} v{self.version}>'
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+from config import Config
+
+# Distinct values tracked per column before cardinality is reported as a lower bound
+PROFILE_MAX_DISTINCT = 10000
+
+# Values kept per numeric column to estimate quartiles
+PROFILE_SAMPLE_SIZE = 10000
+
+
+def _is_numeric(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def merge_dtype(current, new):
+    """
+    Combine the dtypes pandas inferred for two chunks of the same column the
+    same way a single read of the whole file would
+    """
+    if current is None or current == new:
+        return new
+    if _is_numeric(np.dtype(current)) and _is_numeric(np.dtype(new)):
+        return 'float64'
+    return 'object'
+
+
+class ColumnProfile:
+    """
+    Running statistics for a single column, updated one chunk at a time
+    """
+
+    def __init__(self, name, rng):
+        self.name = name
+        self.dtype = None
+        self.null_count = 0
+        self.distinct = set()
+        self.distinct_exact = True
+        self.numeric = True
+
+        # Count, mean and sum of squared deviations, merged with Chan's formula
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+        # Bottom-k sample: the values with the smallest random keys seen so far
+        self._rng = rng
+        self._sample_keys = np.empty(0)
+        self._sample_values = np.empty(0)
+
+    def update(self, series):
+        dtype = series.dtype
+        self.dtype = merge_dtype(self.dtype, str(dtype))
+        self.null_count += int(series.isna().sum())
+
+        values = series.dropna()
+        if self.distinct_exact:
+            self.distinct.update(values.unique().tolist())
+            if len(self.distinct) > PROFILE_MAX_DISTINCT:
+                self.distinct_exact = False
+                self.distinct = set()
+
+        if not _is_numeric(dtype):
+            self.numeric = False
+            return
+        if not self.numeric or values.empty:
+            return
+
+        array = values.to_numpy(dtype='float64')
+        n = len(array)
+        chunk_mean = float(array.mean())
+        chunk_m2 = float(((array - chunk_mean) ** 2).sum())
+
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+        chunk_min, chunk_max = float(array.min()), float(array.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+        keys = np.concatenate([self._sample_keys, self._rng.random(n)])
+        sample = np.concatenate([self._sample_values, array])
+        if len(keys) > PROFILE_SAMPLE_SIZE:
+            keep = np.argpartition(keys, PROFILE_SAMPLE_SIZE)[:PROFILE_SAMPLE_SIZE]
+            keys, sample = keys[keep], sample[keep]
+        self._sample_keys, self._sample_values = keys, sample
+
+    def to_dict(self):
+        result = {
+            'dtype': self.dtype,
+            'null_count': self.null_count,
+            'distinct': len(self.distinct) if self.distinct_exact else PROFILE_MAX_DISTINCT,
+            'distinct_exact': self.distinct_exact,
+        }
+
+        if self.numeric and self.dtype is not None and _is_numeric(np.dtype(self.dtype)):
+            std = float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan')
+            quartiles = (np.quantile(self._sample_values, [0.25, 0.5, 0.75]).tolist()
+                         if len(self._sample_values) else [float('nan')] * 3)
+            result.update({
+                'count': self.count,
+                'mean': self.mean if self.count else float('nan'),
+                'std': std,
+                'min': self.min if self.min is not None else float('nan'),
+                '25%': quartiles[0],
+                '50%': quartiles[1],
+                '75%': quartiles[2],
+                'max': self.max if self.max is not None else float('nan'),
+            })
+        return result
+
+
+class DatasetProfiler:
+    """
+    Builds a dataset profile in a single pass over DataFrame chunks, so files
+    larger than memory can be profiled
+    """
+
+    def __init__(self, random_state=42):
+        self.row_count = 0
+        self.memory_usage = 0
+        self.columns = {}
+        self._rng = np.random.default_rng(random_state)
+
+    def update(self, chunk):
+        self.row_count += len(chunk)
+        self.memory_usage += int(chunk.memory_usage(deep=True, index=False).sum())
+        for column in chunk.columns:
+            if column not in self.columns:
+                self.columns[column] = ColumnProfile(column, self._rng)
+            self.columns[column].update(chunk[column])
+
+    def to_dict(self):
+        return {
+            'row_count': self.row_count,
+            'memory_usage': self.memory_usage,
+            'columns': {name: column.to_dict() for name, column in self.columns.items()},
+        }
+
+
+def profile_dataset(file_path, chunksize=None):
+    """
+    Compute the profile of a CSV file: row count, estimated memory usage and,
+    per column, dtype, null count, cardinality and numeric summary statistics
+    """
+    profiler = DatasetProfiler()
+    for chunk in pd.read_csv(file_path, chunksize=chunksize or Config.DATASET_CHUNK_SIZE):
+        profiler.update(chunk)
+    return profiler.to_dict()
+
+
+def stats_from_profile(profile):
+    """
+    Convert a stored profile into the statistics shown on the dataset page
+    """
+    columns = profile.get('columns', {})
+
+    dtype_counts = {}
+    for column in columns.values():
+        dtype_counts[column['dtype']] = dtype_counts.get(column['dtype'], 0) + 1
+
+    numeric_keys = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+    numeric_stats = {name: {key: column[key] for key in numeric_keys}
+                     for name, column in columns.items() if 'mean' in column}
+
+    return {
+        'memory_usage': f"{profile.get('memory_usage', 0) / (1024 * 1024):.2f} MB",
+        'dtypes': dtype_counts,
+        'column_types': {name: column['dtype'] for name, column in columns.items()},
+        'missing_values': {name: column['null_count'] for name, column in columns.items()},
+        'distinct_values': {name: column['distinct'] for name, column in columns.items()},
+        'numeric_stats': numeric_stats or None,
+    }
@@ -2,11 +2,16 @@ from flask import render_template, redirect, url_for, flash, request, jsonify, a
 from flask_login import login_required, current_user
 from app import db
 from app.datasets import bp
-from app.datasets.forms import DatasetUploadForm
-from app.datasets.utils import save_dataset_file, get_dataset_columns, get_dataset_preview, get_dataset_stats
-from app.datasets.models import Dataset
+from app.datasets.forms import DatasetUploadForm, DatasetAppendForm
+from app.datasets.utils import (save_dataset_file, ingest_dataset, get_dataset_preview, dataset_cache, get_columnar_path,
+                                append_dataset_rows, get_profile_state_path, load_profile_state, save_profile_state,
+                                profile_dataset_with_state, dataset_lock, get_lock_path)
+from app.datasets.profile import profile_dataset, stats_from_profile
+from app.datasets.models import Dataset, DatasetVersion
+from config import Config
 import json
 import os
+import tempfile
 
 @bp.route('/upload', methods=['GET', 'POST'])
 @login_required
@@ -19,14 +24,14 @@ def upload():
     
     if form.validate_on_submit():
         try:
-            # Save the file
+            # Stream the file to disk
             file_path = save_dataset_file(form.file.data)
             
-            # Get columns from the CSV
-            columns = get_dataset_columns(file_path)
-            
-            if not columns:
-                flash('Could not read columns from the CSV file. Please check the file format.', 'error')
+            # Validate the header and profile the rows one chunk at a time
+            try:
+                columns, profile = ingest_dataset(file_path)
+            except ValueError as e:
+                flash(f'Could not read the CSV file: {str(e)}', 'error')
                 return render_template('datasets/upload.html', form=form)
             
             # Create dataset record
@@ -38,6 +43,10 @@ def upload():
                 user_id=current_user.id
             )
             
+            # Store the profile, row count and size so later page views don't re-scan the file
+            dataset.profile = profile
+            dataset.update_file_stats()
+            
             db.session.add(dataset)
             db.session.commit()
             
@@ -74,15 +83,102 @@ def view(dataset_id):
     # Get dataset preview
     preview = get_dataset_preview(dataset.file_path)
     
-    # Get dataset statistics
-    stats = get_dataset_stats(dataset.file_path)
+    # Get dataset statistics from the stored profile, computing it for older datasets
+    profile = dataset.profile
+    if profile is None and dataset.is_valid:
+        try:
+            profile = profile_dataset(dataset.file_path)
+            dataset.profile = profile
+            dataset.update_file_stats()
+            db.session.commit()
+        except Exception as e:
+            print(f"Error profiling dataset: {str(e)}")
+    stats = stats_from_profile(profile) if profile is not None else None
     
     return render_template('datasets/view.html', 
                            dataset=dataset, 
                            preview=preview, 
                            stats=stats,
+                           append_form=DatasetAppendForm(),
                            columns=json.loads(dataset.columns) if dataset.columns else [])
 
+@bp.route('/append/<int:dataset_id>', methods=['POST'])
+@login_required
+def append(dataset_id):
+    dataset = Dataset.query.get_or_404(dataset_id)
+    
+    # Only the owner can add rows to a dataset
+    if current_user.id != dataset.user_id:
+        abort(403)
+    
+    form = DatasetAppendForm()
+    if not form.validate_on_submit():
+        for errors in form.errors.values():
+            for error in errors:
+                flash(error, 'error')
+        return redirect(url_for('datasets.view', dataset_id=dataset.id))
+    
+    if not dataset.is_valid:
+        flash('The dataset file no longer exists.', 'error')
+        return redirect(url_for('datasets.view', dataset_id=dataset.id))
+    
+    fd, rows_path = tempfile.mkstemp(suffix='.csv', dir=Config.UPLOAD_FOLDER)
+    os.close(fd)
+    try:
+        # The byte limit applies to the dataset as a whole
+        max_bytes = Config.DATASET_MAX_BYTES - (dataset.file_size or 0) if Config.DATASET_MAX_BYTES else 0
+        if Config.DATASET_MAX_BYTES and max_bytes <= 0:
+            raise ValueError('The dataset is already at its size limit.')
+        save_dataset_file(form.file.data, max_bytes=max_bytes, file_path=rows_path)
+        
+        # Other appends to this dataset and readers of its CSV wait until the
+        # rows are written and the version that locates them is committed
+        with dataset_lock(dataset.file_path):
+            # Pick up an append that finished while this one was waiting
+            db.session.refresh(dataset)
+            max_rows = Config.DATASET_MAX_ROWS - dataset.num_rows if Config.DATASET_MAX_ROWS else 0
+            if Config.DATASET_MAX_ROWS and max_rows <= 0:
+                raise ValueError('The dataset is already at its size limit.')
+            
+            # Rows before this offset are unchanged, so models can be retrained on the new rows only
+            profile = dataset.profile if dataset.metadata_is_current else None
+            column_types = {name: column['dtype'] for name, column in profile['columns'].items()} if profile else None
+            row_offset = dataset.num_rows if dataset.metadata_is_current else None
+            
+            # The saved profiler is extended with the new rows; without one the whole file is profiled again
+            profiler = load_profile_state(dataset.file_path) if dataset.metadata_is_current else None
+            byte_offset, row_count = append_dataset_rows(dataset.file_path, rows_path, json.loads(dataset.columns),
+                                                         column_types=column_types, max_rows=max_rows,
+                                                         profiler=profiler)
+            
+            dataset.version += 1
+            if profiler is not None:
+                save_profile_state(dataset.file_path, profiler)
+                dataset.profile = profiler.to_dict()
+            else:
+                dataset.profile = profile_dataset_with_state(dataset.file_path)
+            dataset.update_file_stats()
+            if row_offset is not None:
+                db.session.add(DatasetVersion(dataset_id=dataset.id, version=dataset.version, byte_offset=byte_offset,
+                                              row_offset=row_offset, row_count=row_count))
+            db.session.commit()
+        
+        # Cached frames and the columnar copy are stale now
+        dataset_cache.invalidate(dataset.file_path)
+        
+        flash(f'Appended {row_count} rows. The dataset is now at version {dataset.version}.', 'success')
+    except ValueError as e:
+        db.session.rollback()
+        flash(f'Could not append the CSV file: {str(e)}', 'error')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error appending rows: {str(e)}', 'error')
+    finally:
+        if os.path.exists(rows_path):
+            os.remove(rows_path)
+    
+    return redirect(url_for('datasets.view', dataset_id=dataset.id))
+
 @bp.route('/delete/<int:dataset_id>')
 @login_required
 def delete(dataset_id):
@@ -94,35 +190,31 @@ def delete(dataset_id):
         abort(403)
     
     try:
-        # Find and delete any models associated with this dataset
         # Import here to avoid circular imports
-        from app.models.models import Model, Feedback, Prediction
+        from app.models.models import Model, TrainingJob
+        from app.models.prediction_log import prediction_log
+        from app.models.cleanup import delete_models, discard_model_artifacts, file_cleanup
         
-        # Get all models associated with this dataset
-        models = Model.query.filter_by(dataset_id=dataset.id).all()
+        # Write buffered predictions first so they are deleted with their models
+        prediction_log.flush()
         
-        for model in models:
-            # First delete any associated feedback records
-            Feedback.query.filter_by(model_id=model.id).delete()
-            
-            # Then delete any associated prediction records
-            Prediction.query.filter_by(model_id=model.id).delete()
-            
-            # Delete the model file if it exists
-            if os.path.exists(model.model_path):
-                os.remove(model.model_path)
-            
-            # Delete the model from database
-            db.session.delete(model)
-        
-        # Delete the dataset file if it exists
-        if os.path.exists(dataset.file_path):
-            os.remove(dataset.file_path)
+        # Delete the training jobs, then every model of this dataset with their
+        # feedback and predictions, using set-based deletes
+        TrainingJob.query.filter_by(dataset_id=dataset.id).delete(synchronize_session=False)
+        deleted_models = delete_models(Model.dataset_id == dataset.id)
+        DatasetVersion.query.filter_by(dataset_id=dataset.id).delete(synchronize_session=False)
         
         # Delete the dataset record
-        db.session.delete(dataset)
+        file_path = dataset.file_path
+        Dataset.query.filter_by(id=dataset.id).delete(synchronize_session=False)
         db.session.commit()
         
+        # Files are removed in the background once the rows are gone
+        discard_model_artifacts(deleted_models)
+        dataset_cache.invalidate(file_path)
+        file_cleanup.remove([file_path, get_columnar_path(file_path), get_profile_state_path(file_path),
+                             get_lock_path(file_path)])
+        
         flash('Dataset and associated models deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -1,42 +1,414 @@
+import numpy as np
 import pandas as pd
 import os
-import json
+import pickle
+import tempfile
+from contextlib import contextmanager
 from werkzeug.utils import secure_filename
 from config import Config
+from app.datasets.cache import DatasetCache
+from app.datasets.profile import DatasetProfiler, merge_dtype, profile_dataset, stats_from_profile
 
-def save_dataset_file(file):
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    # Without pyarrow every reader falls back to parsing the CSV
+    pa = None
+    feather = None
+
+try:
+    import fcntl
+except ImportError:
+    # Without flock (Windows) datasets are not locked while rows are appended
+    fcntl = None
+
+# Parsed datasets shared by every reader in this process
+dataset_cache = DatasetCache(Config.DATASET_CACHE_MAX_BYTES)
+
+def get_columnar_path(file_path):
+    """
+    Path of the Feather copy derived from a CSV dataset
+    """
+    return os.path.splitext(file_path)[0] + '.feather'
+
+def get_lock_path(file_path):
+    """
+    Path of the lock file kept next to a CSV dataset
+    """
+    return os.path.splitext(file_path)[0] + '.lock'
+
+@contextmanager
+def dataset_lock(file_path, shared=False):
+    """
+    Lock a dataset file across threads and processes: exclusively while rows
+    are appended to it, shared while its CSV is read, so readers never see
+    half of an append and two appends never interleave. Locks are not
+    reentrant for the same file.
+    """
+    try:
+        lock_file = open(get_lock_path(file_path), 'a') if fcntl is not None else None
+    except OSError:
+        # A directory we can't write to, such as the bundled sample datasets, is never appended to
+        lock_file = None
+    if lock_file is None:
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def infer_column_types(file_path, chunksize=None):
+    """
+    Infer the dtype of every column with a chunked pass over the CSV
+    """
+    column_types = {}
+    for chunk in pd.read_csv(file_path, chunksize=chunksize or Config.DATASET_CHUNK_SIZE):
+        for column, dtype in chunk.dtypes.items():
+            column_types[column] = merge_dtype(column_types.get(column), str(dtype))
+    return column_types
+
+def _make_temp_file(path):
+    # A new, uniquely named file next to path to be renamed over it with os.replace
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    os.close(fd)
+    return tmp_path
+
+def write_columnar_copy(file_path, column_types=None, chunksize=None):
+    """
+    Convert the CSV to an uncompressed Feather (Arrow IPC) file next to it,
+    one chunk at a time. The CSV stays the source of truth; the Feather file
+    is a derived artifact.
+    """
+    if feather is None:
+        return None
+    
+    chunksize = chunksize or Config.DATASET_CHUNK_SIZE
+    if column_types is None:
+        column_types = infer_column_types(file_path, chunksize)
+    
+    # Parse every chunk with the final dtypes so all batches share one schema
+    schema = pa.schema([
+        (name, pa.string() if dtype == 'object' else pa.from_numpy_dtype(np.dtype(dtype)))
+        for name, dtype in column_types.items()
+    ])
+    
+    # Write to a temporary file of our own first so readers never see a
+    # partial copy and concurrent rebuilds never write into the same file
+    columnar_path = get_columnar_path(file_path)
+    tmp_path = _make_temp_file(columnar_path)
+    try:
+        with dataset_lock(file_path, shared=True), \
+                pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+            for chunk in pd.read_csv(file_path, chunksize=chunksize, dtype=column_types):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        os.replace(tmp_path, columnar_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return columnar_path
+
+def ensure_columnar_copy(file_path, column_types=None):
     """
-    Save the uploaded CSV file to the upload folder
+    Return the path of an up-to-date Feather copy of the dataset, rebuilding it
+    if it is missing or older than the CSV. Returns None if no copy can be made.
+    column_types, the dtype of every column, skips the inference pass on rebuild.
     """
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(Config.UPLOAD_FOLDER, filename)
-    file.save(file_path)
+    if feather is None:
+        return None
+    
+    columnar_path = get_columnar_path(file_path)
+    try:
+        if os.path.getmtime(columnar_path) >= os.path.getmtime(file_path):
+            return columnar_path
+    except OSError:
+        pass
+    
+    try:
+        return write_columnar_copy(file_path, column_types=column_types)
+    except Exception as e:
+        print(f"Error writing columnar copy of {file_path}: {str(e)}")
+        return None
+
+def remove_columnar_copy(file_path):
+    """
+    Delete the Feather copy of a dataset if there is one
+    """
+    columnar_path = get_columnar_path(file_path)
+    if os.path.exists(columnar_path):
+        os.remove(columnar_path)
+
+def get_profile_state_path(file_path):
+    """
+    Path of the saved profiler state kept next to a CSV dataset, used to
+    extend its profile with appended rows without reading the whole file
+    """
+    return os.path.splitext(file_path)[0] + '.profile.pkl'
+
+def save_profile_state(file_path, profiler):
+    """
+    Save the profiler that profiled the whole file, tagged with the file
+    size it covers
+    """
+    state_path = get_profile_state_path(file_path)
+    tmp_path = None
+    try:
+        tmp_path = _make_temp_file(state_path)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((os.path.getsize(file_path), profiler), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, state_path)
+    except Exception as e:
+        # Without the state the next append profiles the whole file again
+        print(f"Error saving profile state of {file_path}: {str(e)}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_profile_state(file_path):
+    """
+    Load the saved profiler of a dataset, or None if there is none or it
+    doesn't cover the file as it is now
+    """
+    try:
+        with open(get_profile_state_path(file_path), 'rb') as f:
+            size, profiler = pickle.load(f)
+    except Exception:
+        return None
+    return profiler if size == os.path.getsize(file_path) else None
+
+def profile_dataset_with_state(file_path, chunksize=None):
+    """
+    Profile the whole CSV in one chunked pass and save the profiler state so
+    later appends only profile the new rows. Returns the profile.
+    """
+    profiler = DatasetProfiler()
+    for chunk in pd.read_csv(file_path, chunksize=chunksize or Config.DATASET_CHUNK_SIZE):
+        profiler.update(chunk)
+    save_profile_state(file_path, profiler)
+    return profiler.to_dict()
+
+def _load_dataset(file_path, columns=None, column_types=None):
+    columnar_path = ensure_columnar_copy(file_path, column_types=column_types)
+    with dataset_lock(file_path, shared=True):
+        return _read_dataset_file(file_path, columnar_path, columns, column_types)
+
+def _read_dataset_file(file_path, columnar_path, columns=None, column_types=None):
+    if columnar_path is not None:
+        # Memory-map the Arrow file so only the requested columns are paged in
+        table = feather.read_table(columnar_path, columns=columns, memory_map=True)
+        return table.to_pandas()
+    
+    if column_types:
+        # Parse with the known dtypes so pandas doesn't have to infer them
+        dtype = {name: column_types[name] for name in (columns or column_types) if name in column_types}
+        try:
+            return pd.read_csv(file_path, usecols=columns, dtype=dtype)
+        except (ValueError, TypeError):
+            pass
+    return pd.read_csv(file_path, usecols=columns)
+
+def read_dataset(file_path, columns=None, column_types=None):
+    """
+    Load a dataset as a DataFrame, served from the dataset cache when possible.
+    Pass columns to load only a subset of the columns, and column_types (the
+    dtypes from the dataset profile) to skip dtype inference.
+    The returned DataFrame is shared and must not be modified in place.
+    """
+    if columns is not None:
+        columns = list(columns)
+    loader = _load_dataset
+    if column_types:
+        loader = lambda path, cols: _load_dataset(path, cols, column_types)
+    return dataset_cache.get(file_path, loader, columns=columns)
+
+def save_dataset_file(file, max_bytes=None, file_path=None):
+    """
+    Stream the uploaded CSV file to the upload folder, enforcing the size limit.
+    Pass file_path to write it somewhere other than its uploaded name.
+    """
+    max_bytes = Config.DATASET_MAX_BYTES if max_bytes is None else max_bytes
+    if file_path is None:
+        file_path = os.path.join(Config.UPLOAD_FOLDER, secure_filename(file.filename))
+    
+    written = 0
+    try:
+        with open(file_path, 'wb') as f:
+            while True:
+                block = file.stream.read(1024 * 1024)
+                if not block:
+                    break
+                written += len(block)
+                if max_bytes and written > max_bytes:
+                    raise ValueError(f'File size exceeds the {max_bytes / (1024 * 1024):g}MB limit.')
+                f.write(block)
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
     return file_path
 
+def validate_dataset_columns(columns):
+    """
+    Check the header of a dataset, raising ValueError if it cannot be used
+    """
+    if len(columns) < 2:
+        raise ValueError('The CSV file needs at least two columns (a target and a feature).')
+    
+    # pandas names columns without a header "Unnamed: <position>"
+    unnamed = [str(i + 1) for i, col in enumerate(columns) if str(col).startswith('Unnamed: ')]
+    if unnamed:
+        raise ValueError(f'Column(s) {", ".join(unnamed)} in the CSV header have no name.')
+
+def ingest_dataset(file_path, chunksize=None, max_rows=None):
+    """
+    Validate and profile a saved CSV in a single streaming pass, then build its
+    columnar copy. Only one chunk is held in memory at a time.
+    Returns (columns, profile); raises ValueError and removes the file if the
+    dataset is invalid or exceeds the row limit.
+    """
+    chunksize = chunksize or Config.DATASET_CHUNK_SIZE
+    max_rows = Config.DATASET_MAX_ROWS if max_rows is None else max_rows
+    
+    try:
+        profiler = DatasetProfiler()
+        columns = None
+        for chunk in pd.read_csv(file_path, chunksize=chunksize):
+            if columns is None:
+                # Validate the header as soon as the first chunk is parsed
+                columns = chunk.columns.tolist()
+                validate_dataset_columns(columns)
+            
+            profiler.update(chunk)
+            if max_rows and profiler.row_count > max_rows:
+                raise ValueError(f'The dataset exceeds the limit of {max_rows} rows.')
+        
+        if columns is None or profiler.row_count == 0:
+            raise ValueError('The CSV file contains no data rows.')
+        
+        profile = profiler.to_dict()
+        column_types = {name: column['dtype'] for name, column in profile['columns'].items()}
+        write_columnar_copy(file_path, column_types=column_types, chunksize=chunksize)
+        save_profile_state(file_path, profiler)
+    except Exception:
+        remove_columnar_copy(file_path)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    
+    return columns, profile
+
+def append_dataset_rows(file_path, rows_path, columns, column_types=None, chunksize=None, max_rows=None,
+                        profiler=None):
+    """
+    Append the rows of the CSV at rows_path to the end of a dataset file. The
+    new file must have the same columns (in any order) and compatible dtypes;
+    it is validated in full before the dataset is touched, and the dataset is
+    truncated back if writing fails. A profiler of the existing rows, if
+    given, is updated with the new rows as they are written.
+    Returns (byte_offset, row_count): where the appended rows start in the
+    dataset file and how many were added.
+    """
+    chunksize = chunksize or Config.DATASET_CHUNK_SIZE
+    column_types = column_types or {}
+    
+    row_count = 0
+    for chunk in pd.read_csv(rows_path, chunksize=chunksize):
+        missing = [col for col in columns if col not in chunk.columns]
+        extra = [col for col in chunk.columns if col not in columns]
+        if missing or extra:
+            raise ValueError(f'The columns do not match the dataset (missing: {", ".join(map(str, missing)) or "none"}, '
+                             f'unexpected: {", ".join(map(str, extra)) or "none"}).')
+        
+        for name, dtype in chunk.dtypes.items():
+            current = column_types.get(name)
+            if current and current != 'object' and merge_dtype(current, str(dtype)) == 'object':
+                raise ValueError(f'Column {name} contains values that are not {current}.')
+        
+        row_count += len(chunk)
+        if max_rows and row_count > max_rows:
+            raise ValueError(f'The dataset would exceed the limit of {max_rows} rows.')
+    
+    if row_count == 0:
+        raise ValueError('The CSV file contains no data rows.')
+    
+    with open(file_path, 'rb+') as f:
+        # Make sure the last existing row is terminated
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+        byte_offset = f.tell()
+    
+    try:
+        with open(file_path, 'a', newline='') as f:
+            for chunk in pd.read_csv(rows_path, chunksize=chunksize):
+                chunk[columns].to_csv(f, header=False, index=False)
+                if profiler is not None:
+                    profiler.update(chunk[columns])
+    except Exception:
+        os.truncate(file_path, byte_offset)
+        raise
+    return byte_offset, row_count
+
+def read_dataset_rows(file_path, byte_offset, names, columns=None, column_types=None):
+    """
+    Read the rows of a dataset that start at byte_offset, such as a block of
+    appended rows, without reading anything before it. names are all the
+    column names of the file, in order; columns selects a subset.
+    """
+    with dataset_lock(file_path, shared=True), open(file_path, 'rb') as f:
+        if column_types:
+            # Parse with the known dtypes so pandas doesn't have to infer them
+            dtype = {name: column_types[name] for name in (columns or names) if name in column_types}
+            try:
+                f.seek(byte_offset)
+                return pd.read_csv(f, header=None, names=names, usecols=columns, dtype=dtype)
+            except (ValueError, TypeError):
+                pass
+        f.seek(byte_offset)
+        return pd.read_csv(f, header=None, names=names, usecols=columns)
+
 def get_dataset_columns(file_path):
     """
     Get column names from CSV file
     """
     try:
-        df = pd.read_csv(file_path)
+        columnar_path = ensure_columnar_copy(file_path)
+        if columnar_path is not None:
+            # Only the schema is read from the Arrow file
+            with pa.memory_map(columnar_path) as source:
+                return pa.ipc.open_file(source).schema.names
+        
+        df = pd.read_csv(file_path, nrows=0)
         columns = df.columns.tolist()
         return columns
-    except Exception as e:
+    except Exception:
         return None
 
+def read_column_info(file_path, sample_rows=1000):
+    """
+    Read column names from the CSV header and estimate dtypes from the first
+    rows, without touching the rest of the file
+    """
+    sample = pd.read_csv(file_path, nrows=sample_rows)
+    return [{'name': name, 'dtype': str(dtype)} for name, dtype in sample.dtypes.items()]
+
 def get_dataset_preview(file_path, rows=10):
     """
-    Get a preview of the dataset (first N rows)
+    Get a preview of the dataset (first N rows). Only those rows are parsed,
+    so large datasets are never loaded to render the preview.
     """
     try:
-        print(f"Attempting to read CSV file: {file_path}")
         if not os.path.exists(file_path):
             print(f"Error: File does not exist at path: {file_path}")
             return None
             
-        df = pd.read_csv(file_path)
-        print(f"Successfully read CSV with {len(df)} rows and {len(df.columns)} columns")
-        return df.head(rows)
+        return pd.read_csv(file_path, nrows=rows)
     except Exception as e:
         print(f"Error reading dataset preview: {str(e)}")
         return None
@@ -46,39 +418,11 @@ def get_dataset_stats(file_path):
     Get basic statistics about the dataset (count, mean, std, min, max)
     """
     try:
-        print(f"Attempting to generate stats for file: {file_path}")
         if not os.path.exists(file_path):
             print(f"Error: File does not exist at path: {file_path}")
             return None
-            
-        df = pd.read_csv(file_path)
-        print(f"Successfully read CSV for stats with {len(df)} rows")
-        
-        # Prepare stats result
-        stats = {}
-        
-        # General info
-        stats['memory_usage'] = f"{df.memory_usage(deep=True).sum() / (1024 * 1024):.2f} MB"
         
-        # Data types summary
-        dtypes = df.dtypes.astype(str)
-        stats['dtypes'] = dtypes.value_counts().to_dict()
-        
-        # Column types
-        stats['column_types'] = {col: str(dtype) for col, dtype in zip(df.columns, df.dtypes)}
-        
-        # Missing values
-        stats['missing_values'] = df.isna().sum().to_dict()
-        
-        # Only calculate numeric stats if we have numeric columns
-        numeric_df = df.select_dtypes(include=['number'])
-        if not numeric_df.empty:
-            stats['numeric_stats'] = numeric_df.describe().to_dict()
-        else:
-            stats['numeric_stats'] = None
-            
-        print(f"Successfully generated stats for {file_path}")
-        return stats
+        return stats_from_profile(profile_dataset(file_path))
     except Exception as e:
         print(f"Error generating dataset stats: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
@@ -1,5 +1,7 @@
 from flask import render_template, redirect, url_for
 from flask_login import login_required, current_user
+from sqlalchemy import func
+from sqlalchemy.orm import defer, joinedload
 from app.datasets.models import Dataset
 from app.models.models import Model
 from app.models.user import User
@@ -10,6 +12,19 @@ from app import db
 def index():
     return render_template('main/index.html')
 
+def _count_by(group_column, ids):
+    """
+    Count rows per value of group_column for the given ids in a single
+    grouped query. Returns {id: count}; ids without rows are omitted.
+    """
+    if not ids:
+        return {}
+    rows = db.session.query(group_column, func.count()) \
+        .filter(group_column.in_(ids)) \
+        .group_by(group_column) \
+        .all()
+    return dict(rows)
+
 @bp.route('/dashboard')
 @login_required
 def dashboard():
@@ -17,10 +32,15 @@ def dashboard():
     user_models = []
     students = []
     
+    # Load the owner and dataset shown next to each row up front; the
+    # dashboard only needs the stored row count, not the full profile
+    dataset_query = Dataset.query.options(joinedload(Dataset.owner), defer(Dataset._profile))
+    model_query = Model.query.options(joinedload(Model.dataset), joinedload(Model.owner))
+    
     if current_user.is_student():
         # Get student's datasets and models
-        user_datasets = Dataset.query.filter_by(user_id=current_user.id).all()
-        user_models = Model.query.filter_by(user_id=current_user.id).all()
+        user_datasets = dataset_query.filter_by(user_id=current_user.id).all()
+        user_models = model_query.filter_by(user_id=current_user.id).all()
     
     elif current_user.is_teacher():
         # Get students assigned to this teacher
@@ -30,22 +50,23 @@ def dashboard():
         student_ids = [student.id for student in students]
         
         if student_ids:
-            user_datasets = Dataset.query.filter(Dataset.user_id.in_(student_ids)).all()
-            user_models = Model.query.filter(Model.user_id.in_(student_ids)).all()
+            user_datasets = dataset_query.filter(Dataset.user_id.in_(student_ids)).all()
+            user_models = model_query.filter(Model.user_id.in_(student_ids)).all()
     
-    # Precompute counts for each dataset and student
+    # Precompute counts for each dataset and student with grouped queries
+    models_per_dataset = _count_by(Model.dataset_id, [dataset.id for dataset in user_datasets])
     datasets_with_counts = []
     for dataset in user_datasets:
-        model_count = Model.query.filter_by(dataset_id=dataset.id).count()
-        dataset.model_count = model_count
+        dataset.model_count = models_per_dataset.get(dataset.id, 0)
         datasets_with_counts.append(dataset)
     
+    student_ids = [student.id for student in students]
+    datasets_per_student = _count_by(Dataset.user_id, student_ids)
+    models_per_student = _count_by(Model.user_id, student_ids)
     students_with_counts = []
     for student in students:
-        dataset_count = Dataset.query.filter_by(user_id=student.id).count()
-        model_count = Model.query.filter_by(user_id=student.id).count()
-        student.dataset_count = dataset_count
-        student.model_count = model_count
+        student.dataset_count = datasets_per_student.get(student.id, 0)
+        student.model_count = models_per_student.get(student.id, 0)
         students_with_counts.append(student)
     
     return render_template('main/dashboard.html', 
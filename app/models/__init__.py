@@ -3,12 +3,15 @@ from flask import Blueprint
 bp = Blueprint('models', __name__, template_folder='templates')
 
 # First import models
-from app.models.models import Model, Prediction, Feedback
+from app.models.models import Model, ModelMetric, Prediction, Feedback, TrainingJob
 from app.models.user import User
 
 # Then import routes which uses those models
-from app.models import routes
+from app.models import routes, commands
 from app.models.routes import models
 
 def init_app(app):
-    app.register_blueprint(models) 
\ No newline at end of file
+    app.register_blueprint(models)
+    
+    from app.models.prediction_log import prediction_log
+    prediction_log.init_app(app) 
\ No newline at end of file
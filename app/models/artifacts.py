@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from datetime import datetime
+
+import joblib
+import sklearn
+
+from app.models.inference import compile_linear_model
+from config import Config
+
+ARTIFACT_FORMAT = 'joblib'
+ARTIFACT_VERSION = 1
+
+# Read size used when hashing artifacts
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def manifest_path(artifact_path):
+    """
+    Path of the JSON manifest stored next to an artifact
+    """
+    return os.path.splitext(artifact_path)[0] + '.json'
+
+
+def file_checksum(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class _ByteCounter:
+    # File-like sink that only counts what is written to it
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        size = memoryview(data).nbytes
+        self.size += size
+        return size
+
+
+def model_memory_size(model_info):
+    """
+    Estimate the in-memory size of a model info dict from the size of its
+    uncompressed pickle, which is dominated by the raw bytes of its arrays.
+    Nothing is buffered while measuring.
+    """
+    counter = _ByteCounter()
+    pickle.dump(model_info, counter, protocol=pickle.HIGHEST_PROTOCOL)
+    return counter.size
+
+
+def save_artifact(model_info, directory=None, compress=None):
+    """
+    Write a trained model info dict as a joblib artifact named after the
+    SHA-256 of its content, plus a manifest holding the feature schema,
+    checksum and library versions. Identical models share one artifact.
+
+    The manifest also records the model's estimated in-memory size, which
+    the model registry budgets with since a compressed artifact is several
+    times smaller on disk. With compress=0 the artifact is stored
+    uncompressed so its numpy arrays can be memory-mapped at load time. Linear and logistic pipelines are
+    also stored compiled to flat coefficients for the NumPy fast path;
+    linear regressions solved by ml_utils carry only that compiled form and
+    no sklearn objects. Returns the artifact path.
+    """
+    if model_info.get('pipeline') is not None:
+        model_info['linear_model'] = compile_linear_model(model_info['pipeline'], model_info['feature_columns'])
+
+    directory = directory or Config.MODEL_ARTIFACT_DIR
+    compress = Config.MODEL_ARTIFACT_COMPRESS if compress is None else compress
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        joblib.dump(model_info, tmp_path, compress=compress)
+        checksum = file_checksum(tmp_path)
+        artifact_path = os.path.join(directory, f'model_{checksum}.joblib')
+
+        manifest = {
+            'format': ARTIFACT_FORMAT,
+            'version': ARTIFACT_VERSION,
+            'sha256': checksum,
+            'size': os.path.getsize(tmp_path),
+            'memory_size': model_memory_size(model_info),
+            'compress': compress,
+            'feature_columns': model_info['feature_columns'],
+            'target_column': model_info['target_column'],
+            'feature_mapping': model_info.get('feature_mapping', {}),
+            'sklearn_version': sklearn.__version__,
+            'created_at': datetime.utcnow().isoformat()
+        }
+        with open(manifest_path(artifact_path), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, artifact_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return artifact_path
+
+
+def load_manifest(artifact_path):
+    """
+    Read an artifact's manifest without loading the model, or None for
+    legacy pickles that don't have one
+    """
+    path = manifest_path(artifact_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_artifact(artifact_path, mmap=None, verify=None):
+    """
+    Load a model info dict saved by save_artifact. The file is checked
+    against its manifest checksum first. When mmap is enabled, the numpy
+    arrays of uncompressed artifacts are memory-mapped, so processes serving
+    the same model share them through the page cache; this only covers
+    arrays the model keeps as they are (coefficients, scalers), since
+    sklearn copies the node arrays of every tree when a forest is
+    unpickled. Legacy .pkl files are unpickled.
+    Models saved before linear pipelines were compiled are compiled on load.
+    """
+    manifest = load_manifest(artifact_path)
+    if manifest is None:
+        with open(artifact_path, 'rb') as f:
+            model_info = pickle.load(f)
+    else:
+        mmap = Config.MODEL_ARTIFACT_MMAP if mmap is None else mmap
+        verify = Config.MODEL_ARTIFACT_VERIFY if verify is None else verify
+        if verify and file_checksum(artifact_path) != manifest['sha256']:
+            raise ValueError(f'Checksum mismatch for model artifact {artifact_path}')
+
+        mmap_mode = 'r' if mmap and not manifest['compress'] else None
+        model_info = joblib.load(artifact_path, mmap_mode=mmap_mode)
+
+    if 'linear_model' not in model_info:
+        model_info['linear_model'] = compile_linear_model(model_info['pipeline'], model_info['feature_columns'])
+    return model_info
+
+
+def artifact_memory_size(artifact_path):
+    """
+    The in-memory size recorded in an artifact's manifest, or None for
+    artifacts saved without one
+    """
+    manifest = load_manifest(artifact_path)
+    return manifest.get('memory_size') if manifest else None
+
+
+def artifact_files(artifact_path):
+    """
+    Every file belonging to an artifact, for removal
+    """
+    return [artifact_path, manifest_path(artifact_path)]
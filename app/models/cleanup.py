@@ -0,0 +1,101 @@
+import atexit
+import os
+import queue
+import threading
+
+from app import db
+from app.models.models import Model, ModelMetric, Prediction, Feedback, TrainingJob
+from app.models.registry import model_registry
+from app.models.artifacts import artifact_files
+
+
+class FileCleanup:
+    """
+    Removes artifact files on a background thread, so a request that
+    deletes many models only has to commit its database transaction.
+    Files still queued when the process exits are removed before it stops.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def remove(self, paths):
+        """Queue files for removal; paths that no longer exist are ignored"""
+        for path in paths:
+            if path:
+                self._queue.put(path)
+        self._ensure_started()
+
+    def close(self):
+        """Remove every queued file and stop the background thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='file-cleanup', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            if path is None:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing {path}: {str(e)}")
+
+
+def delete_models(criterion):
+    """
+    Delete every model matching a SQL criterion on Model, together with its
+    feedback, predictions and metrics, using one set-based DELETE per table.
+    Training jobs keep their history but are unlinked from the models.
+
+    Runs inside the caller's transaction. Returns the deleted models as
+    (id, model_path) pairs; pass them to discard_model_artifacts() once the
+    transaction has been committed.
+    """
+    models = db.session.query(Model.id, Model.model_path).filter(criterion).all()
+    if not models:
+        return []
+
+    model_ids = db.session.query(Model.id).filter(criterion).scalar_subquery()
+    for table in (Feedback, Prediction, ModelMetric):
+        table.query.filter(table.model_id.in_(model_ids)).delete(synchronize_session=False)
+    TrainingJob.query.filter(TrainingJob.model_id.in_(model_ids)) \
+        .update({'model_id': None}, synchronize_session=False)
+    Model.query.filter(criterion).delete(synchronize_session=False)
+
+    # Objects already loaded in this session are stale now
+    db.session.expire_all()
+    return models
+
+
+def discard_model_artifacts(models):
+    """
+    Drop deleted models from the registry and queue their artifact files for
+    removal. Artifacts are content-addressed, so files still used by another
+    model are kept.
+    """
+    for model_id, _ in models:
+        model_registry.invalidate(model_id)
+
+    paths = {model_path for _, model_path in models}
+    if not paths:
+        return
+    in_use = {path for (path,) in db.session.query(Model.model_path).filter(Model.model_path.in_(paths))}
+    file_cleanup.remove([file for path in paths - in_use for file in artifact_files(path)])
+
+
+# Background remover for model and dataset files
+file_cleanup = FileCleanup()
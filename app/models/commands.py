@@ -0,0 +1,12 @@
+import click
+
+from app.models.jobs import recover_interrupted_jobs
+from app.models.routes import models
+
+
+@models.cli.command('recover-jobs')
+@click.option('--requeue', is_flag=True, help='Train the interrupted jobs again instead of marking them failed.')
+def recover_jobs(requeue):
+    """Handle training jobs left queued or running by a restart. Run before starting the server."""
+    count = recover_interrupted_jobs(requeue=requeue)
+    click.echo(f'{"Trained again" if requeue else "Marked failed"} {count} interrupted job(s).')
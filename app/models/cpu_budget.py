@@ -0,0 +1,113 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from config import Config
+
+
+class CpuBudget:
+    """
+    Host-wide pool of CPU slots shared by every training process.
+
+    Each slot is a lock file in lock_dir; holding an exclusive lock on it
+    means owning one core. A training takes as many free slots as it wants
+    (at least one, waiting if every slot is busy) and sizes its n_jobs to
+    the number it got, so concurrent trainings split the cores between them
+    instead of oversubscribing the machine. No training takes more than its
+    fair share, the slots divided by the trainings running or waiting (each
+    holds an active_<n>.lock marker), so a training started while another
+    runs gets cores of its own rather than queueing behind it. Locks are
+    released by the OS if a worker dies. Without fcntl the budget is not
+    enforced across processes.
+    """
+
+    def __init__(self, slots, lock_dir, poll_interval=0.5):
+        self.slots = max(1, slots)
+        self.lock_dir = lock_dir
+        self.poll_interval = poll_interval
+
+    def _open_slot(self, index):
+        return os.open(os.path.join(self.lock_dir, f'slot_{index}.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _try_acquire(self, wanted):
+        held = []
+        for index in range(self.slots):
+            if len(held) == wanted:
+                break
+            fd = self._open_slot(index)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            held.append(fd)
+        return held
+
+    def _register(self):
+        # Hold the first free marker for as long as this training runs or waits
+        index = 0
+        while True:
+            fd = os.open(os.path.join(self.lock_dir, f'active_{index}.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+                index += 1
+
+    def _fair_share(self):
+        # A marker that can't be locked belongs to a training that is running or waiting
+        active = 0
+        for name in os.listdir(self.lock_dir):
+            if not name.startswith('active_'):
+                continue
+            fd = os.open(os.path.join(self.lock_dir, name), os.O_RDWR)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            except OSError:
+                active += 1
+            finally:
+                os.close(fd)
+        return max(1, self.slots // max(1, active))
+
+    @contextmanager
+    def acquire(self, wanted, on_wait=None):
+        """
+        Reserve up to `wanted` cores (-1 for as many as are free), but no more
+        than the fair share, and yield the number reserved. on_wait is called
+        once if every core is busy and the training has to wait for one.
+        """
+        wanted = self.slots if wanted is None or wanted < 0 else min(max(1, wanted), self.slots)
+        if fcntl is None:
+            yield wanted
+            return
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        marker = self._register()
+        try:
+            held = self._try_acquire(min(wanted, self._fair_share()))
+            if not held and on_wait is not None:
+                on_wait()
+            while not held:
+                time.sleep(self.poll_interval)
+                held = self._try_acquire(min(wanted, self._fair_share()))
+
+            try:
+                yield len(held)
+            finally:
+                for fd in held:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+        finally:
+            fcntl.flock(marker, fcntl.LOCK_UN)
+            os.close(marker)
+
+
+# Cores available to trainings on this host
+cpu_budget = CpuBudget(Config.TRAINING_CPU_BUDGET, Config.TRAINING_CPU_LOCK_DIR)
@@ -33,6 +33,11 @@ class ModelForm(FlaskForm):
         DataRequired()
     ])
     
+    training_mode = SelectField('Training Mode', choices=[
+        ('in_memory', 'In memory'),
+        ('out_of_core', 'Out-of-core (streams datasets larger than memory)')
+    ], default='in_memory')
+    
     submit = SubmitField('Train Model')
 
 class PredictionForm(FlaskForm):
@@ -0,0 +1,191 @@
+import numbers
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression, LogisticRegression, SGDRegressor, SGDClassifier
+
+from app.models.ml_utils import fold_scaler
+
+
+def prepare_features(df, feature_columns, model_columns):
+    """
+    One-hot encode the raw feature columns of any number of rows and align
+    them with the processed columns the pipeline was trained on.
+    Categories not seen during training are dropped and missing dummy
+    columns are filled with 0.
+    """
+    X = pd.get_dummies(df[feature_columns])
+    return X.reindex(columns=model_columns, fill_value=0)
+
+
+def predict_frame(model_info, X, with_probability=False):
+    """
+    Score a prepared feature matrix with one predict call (and one
+    predict_proba call for classifiers), or one matrix product for compiled
+    linear models. Returns (predictions, probabilities) as Python lists;
+    probabilities holds the probability of the predicted class.
+    """
+    linear_model = model_info.get('linear_model')
+    if linear_model is not None:
+        predictions, proba = predict_linear(linear_model, _linear_input(X))
+        predictions = predictions.tolist() if isinstance(predictions, np.ndarray) else predictions
+        probabilities = proba.max(axis=1).tolist() if with_probability and proba is not None else None
+        return predictions, probabilities
+
+    pipeline = model_info['pipeline']
+    predictions = pipeline.predict(X).tolist()
+    probabilities = None
+    if with_probability and hasattr(pipeline, 'predict_proba'):
+        probabilities = pipeline.predict_proba(X).max(axis=1).tolist()
+    return predictions, probabilities
+
+
+def _linear_input(X):
+    # Reject what the sklearn estimators would reject instead of predicting NaN
+    X = np.asarray(X, dtype='float64')
+    if not np.isfinite(X).all():
+        raise ValueError('Input contains NaN or infinity.')
+    return X
+
+
+def linear_model_from_data(model_data, model_columns, classes=None, link='identity'):
+    """
+    Build the compiled form of a linear model from ml_utils model_data
+    (weights of the standardized features, intercept and scaler), folding the
+    scaler into the coefficients so a row of processed features is scored
+    with one dot product. link turns the scores into class probabilities:
+    'logistic', 'softmax' or 'ovr' for classifiers, 'identity' otherwise.
+    """
+    coefficients, intercept = fold_scaler({
+        'weights': np.atleast_2d(model_data['weights']),
+        'intercept': np.atleast_1d(model_data['intercept']),
+        'scaler_mean': model_data['scaler_mean'],
+        'scaler_scale': model_data['scaler_scale']
+    })
+    return {
+        'columns': list(model_columns),
+        'index': {column: i for i, column in enumerate(model_columns)},
+        'coefficients': coefficients,
+        'intercept': intercept,
+        'classes': classes,
+        'link': link
+    }
+
+
+def compile_linear_model(pipeline, model_columns):
+    """
+    Flatten a scaler + linear/logistic regression pipeline into plain arrays
+    with linear_model_from_data. Returns None for pipelines that can't be
+    flattened (forests).
+    """
+    steps = getattr(pipeline, 'named_steps', {})
+    scaler = steps.get('scaler')
+    estimator = steps.get('model')
+    if scaler is None or not isinstance(estimator, (LinearRegression, LogisticRegression, SGDRegressor, SGDClassifier)):
+        return None
+    if isinstance(estimator, SGDClassifier) and estimator.loss != 'log_loss':
+        return None
+
+    # How scores become class probabilities, as predict_proba computes them
+    classes = None
+    if isinstance(estimator, (LinearRegression, SGDRegressor)):
+        link = 'identity'
+    else:
+        classes = estimator.classes_.tolist()
+        if len(classes) <= 2:
+            link = 'logistic'
+        elif isinstance(estimator, LogisticRegression) and estimator.multi_class != 'ovr' \
+                and not (estimator.multi_class == 'auto' and estimator.solver == 'liblinear'):
+            link = 'softmax'
+        else:
+            link = 'ovr'
+
+    model_data = {
+        'weights': estimator.coef_,
+        'intercept': estimator.intercept_,
+        'scaler_mean': scaler.mean_,
+        'scaler_scale': scaler.scale_
+    }
+    return linear_model_from_data(model_data, model_columns, classes=classes, link=link)
+
+
+def encode_row(linear_model, values):
+    """
+    Encode one row of raw feature values ({feature: value}) the way
+    prepare_features does, without building a DataFrame. Returns None for
+    values only pandas can encode the same way (missing values, booleans).
+    """
+    index = linear_model['index']
+    x = np.zeros(len(index))
+    for feature, value in values.items():
+        if isinstance(value, str):
+            # get_dummies turns a text value into a <feature>_<value> indicator
+            i = index.get(f'{feature}_{value}')
+            if i is not None:
+                x[i] = 1.0
+        elif isinstance(value, numbers.Real) and not isinstance(value, (bool, np.bool_)) and np.isfinite(value):
+            i = index.get(feature)
+            if i is not None:
+                x[i] = value
+        else:
+            return None
+    return x
+
+
+def predict_linear(linear_model, X):
+    """
+    Score rows of processed features with a compiled linear model. Returns
+    (predictions, probabilities); probabilities has one column per class and
+    is None for regressions.
+    """
+    scores = np.atleast_2d(X) @ linear_model['coefficients'].T + linear_model['intercept']
+    link = linear_model['link']
+    if link == 'identity':
+        return scores[:, 0], None
+
+    if link == 'logistic':
+        positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+        probabilities = np.column_stack([1.0 - positive, positive])
+    elif link == 'softmax':
+        exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+        probabilities = exp / exp.sum(axis=1, keepdims=True)
+    else:
+        probabilities = 1.0 / (1.0 + np.exp(-scores))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+    classes = linear_model['classes']
+    return [classes[i] for i in probabilities.argmax(axis=1)], probabilities
+
+
+def predict_row(model_info, feature_columns, values, with_probability=False):
+    """
+    Score a single row of raw feature values ({feature: value}). Compiled
+    linear models are scored directly with NumPy; values the fast path
+    can't encode go through prepare_features first, and other models through
+    the pipeline. Returns (prediction, probabilities), where probabilities maps
+    each class label to its probability, or None.
+    """
+    linear_model = model_info.get('linear_model')
+    x = encode_row(linear_model, values) if linear_model is not None else None
+    if x is None:
+        X = prepare_features(pd.DataFrame([values]), feature_columns, model_info['feature_columns'])
+        if linear_model is not None:
+            x = _linear_input(X)
+
+    if x is not None:
+        predictions, proba = predict_linear(linear_model, x)
+        classes = linear_model['classes']
+    else:
+        pipeline = model_info['pipeline']
+        predictions = pipeline.predict(X)
+        proba = pipeline.predict_proba(X) if with_probability and hasattr(pipeline, 'predict_proba') else None
+        classes = pipeline.classes_ if proba is not None else None
+
+    prediction = predictions[0]
+    if isinstance(prediction, np.generic):
+        prediction = prediction.item()
+
+    probabilities = None
+    if with_probability and proba is not None:
+        probabilities = {str(classes[i]): float(proba[0][i]) for i in range(len(classes))}
+    return prediction, probabilities
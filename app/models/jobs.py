@@ -0,0 +1,255 @@
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from types import SimpleNamespace
+
+from flask import current_app
+
+from app import db
+from app.datasets.utils import dataset_cache, read_dataset_rows
+from app.models.models import Model, TrainingJob
+from app.models.training import train_model, train_model_out_of_core, retrain_model, read_holdout_rows
+from app.models.artifacts import save_artifact, load_artifact
+from app.models.cleanup import discard_model_artifacts
+
+# Local pool of training processes, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+# Application used by run_training_job inside a worker process
+_worker_app = None
+
+
+def _init_worker(config):
+    """
+    Create an application with the web app's configuration in a new worker process
+    """
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app(SimpleNamespace(**config))
+
+    # The dataset cache is sized for the web process, not for workers that train one job at a time
+    dataset_cache.max_bytes = config['TRAINING_WORKER_DATASET_CACHE_MAX_BYTES']
+    dataset_cache.clear()
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            config = {key: value for key, value in app.config.items() if key.isupper()}
+            # Spawn fresh interpreters so workers never share the parent's DB connections
+            _executor = ProcessPoolExecutor(
+                max_workers=app.config['TRAINING_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(config,)
+            )
+        return _executor
+
+
+def submit_training_job(job):
+    """
+    Queue a committed TrainingJob on the local worker pool. With
+    TRAINING_WORKERS set to 0 the job runs synchronously instead.
+    """
+    global _executor
+    app = current_app._get_current_object()
+    if not app.config['TRAINING_WORKERS']:
+        _run_job(app, job.id)
+        return
+
+    try:
+        future = _get_executor(app).submit(run_training_job, job.id)
+    except BrokenProcessPool:
+        # A crashed worker breaks the whole pool; start a new one
+        with _executor_lock:
+            _executor = None
+        future = _get_executor(app).submit(run_training_job, job.id)
+    future.add_done_callback(lambda f: _check_future(app, job.id, f))
+
+
+def recover_interrupted_jobs(requeue=False):
+    """
+    Deal with jobs left queued or running by a server that stopped or
+    crashed. The queue only lives in the memory of the process that
+    submitted them, so they would otherwise never finish. They are marked
+    failed, or with requeue trained again in this process, one at a time.
+    Only run this while no server is training. Returns the number of jobs.
+    """
+    app = current_app._get_current_object()
+    jobs = TrainingJob.query.filter(TrainingJob.status.in_(('queued', 'running'))) \
+        .order_by(TrainingJob.id) \
+        .all()
+    for job in jobs:
+        if requeue:
+            job.status = 'queued'
+            job.progress = 0
+            job.message = 'Queued again after a restart'
+            job.started_at = None
+            db.session.commit()
+            _run_job(app, job.id)
+        else:
+            _mark_failed(job, 'Training was interrupted by a server restart; please start it again.')
+    return len(jobs)
+
+
+def run_training_job(job_id):
+    """
+    Entry point executed in a worker process
+    """
+    _run_job(_worker_app, job_id)
+
+
+def _check_future(app, job_id, future):
+    # Training errors are recorded by the worker itself; this catches workers that died
+    if future.cancelled():
+        error = 'Training was cancelled'
+    elif future.exception() is not None:
+        error = f'Training worker failed: {future.exception()}'
+    else:
+        return
+
+    with app.app_context():
+        job = TrainingJob.query.get(job_id)
+        if job is not None and not job.is_finished:
+            _mark_failed(job, error)
+
+
+def _mark_failed(job, message):
+    job.status = 'failed'
+    job.message = message
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        job = TrainingJob.query.get(job_id)
+        if job is None or job.is_finished:
+            return
+
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        job.message = 'Starting training'
+        db.session.commit()
+
+        def progress(percent, message):
+            job.progress = percent
+            job.message = message
+            db.session.commit()
+
+        try:
+            if job.dataset is None:
+                raise ValueError('The dataset for this job no longer exists')
+
+            # Dtypes recorded when the dataset was profiled
+            profile = job.dataset.profile if job.dataset.metadata_is_current else None
+            column_types = {name: column['dtype'] for name, column in profile['columns'].items()} if profile else None
+
+            if job.kind == 'retrain':
+                _retrain(job, column_types, progress)
+                return
+
+            dataset_version = job.dataset.version
+            trainer = train_model_out_of_core if job.training_mode == 'out_of_core' else train_model
+            model_info, metrics, feature_importance = trainer(
+                job.dataset.file_path,
+                job.model_type,
+                job.target_column,
+                job.feature_columns,
+                progress=progress,
+                column_types=column_types
+            )
+
+            # Save model to file
+            progress(95, 'Saving model')
+            model_path = save_artifact(model_info)
+
+            # Create model in database
+            new_model = Model(
+                name=job.name,
+                description=job.description,
+                model_type=job.model_type,
+                model_path=model_path,
+                target_column=job.target_column,
+                feature_columns=job.feature_columns,
+                metrics=metrics,
+                feature_importance=feature_importance,
+                dataset_id=job.dataset_id,
+                user_id=job.user_id,
+                dataset_version=dataset_version
+            )
+            db.session.add(new_model)
+            db.session.flush()
+
+            job.model_id = new_model.id
+            _mark_completed(job, 'Model trained successfully!')
+        except Exception as e:
+            db.session.rollback()
+            _mark_failed(job, f'Error training model: {str(e)}')
+
+
+def _mark_completed(job, message):
+    job.status = 'completed'
+    job.progress = 100
+    job.message = message
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _retrain(job, column_types, progress):
+    """
+    Update the job's model with the rows appended to its dataset since it was
+    last trained. If those rows can't be located, for models trained before
+    datasets were versioned or datasets changed outside the app, the model is
+    trained again on the whole dataset.
+    """
+    model = job.model
+    if model is None:
+        raise ValueError('The model for this job no longer exists')
+    dataset = job.dataset
+    dataset_version = dataset.version
+    if model.dataset_version == dataset_version:
+        _mark_completed(job, 'The model is already up to date.')
+        return
+
+    start = dataset.rows_since(model.dataset_version)
+    if start is None:
+        progress(5, 'New rows could not be located, retraining on the full dataset')
+        trainer = train_model_out_of_core if job.training_mode == 'out_of_core' else train_model
+        model_info, metrics, feature_importance = trainer(
+            dataset.file_path, model.model_type, model.target_column, model.feature_columns,
+            progress=progress, column_types=column_types
+        )
+        message = 'Model retrained on the full dataset.'
+    else:
+        byte_offset, row_offset = start
+        progress(5, f'Loading {dataset.num_rows - row_offset} new rows')
+        df = read_dataset_rows(dataset.file_path, byte_offset, json.loads(dataset.columns),
+                               columns=model.feature_columns + [model.target_column], column_types=column_types)
+
+        # A private copy, since the estimator is updated in place
+        model_info = load_artifact(model.model_path, mmap=False)
+        holdout = read_holdout_rows(dataset.file_path, model_info, model.feature_columns, model.target_column,
+                                    column_types=column_types)
+        model_info, metrics, feature_importance = retrain_model(
+            model_info, df, model.model_type, model.target_column, model.feature_columns,
+            trained_rows=row_offset, progress=progress, metrics=model.metrics, holdout=holdout
+        )
+        message = f'Model updated with {len(df)} new rows.'
+
+    progress(95, 'Saving model')
+    previous_path = model.model_path
+    model.model_path = save_artifact(model_info)
+    model.metrics = metrics
+    model.feature_importance = feature_importance
+    model.dataset_version = dataset_version
+    _mark_completed(job, message)
+
+    # The previous artifact is removed unless another model still uses it
+    if previous_path != model.model_path:
+        discard_model_artifacts([(model.id, previous_path)])
@@ -0,0 +1,56 @@
+from sqlalchemy.orm import contains_eager
+
+from app import db
+from app.datasets.models import Dataset
+from app.models.models import Model, ModelMetric
+from app.models.user import User
+
+# Metrics that can be ranked, with the model type that reports them
+LEADERBOARD_METRICS = {
+    'r2_score': 'regression',
+    'mse': 'regression',
+    'mae': 'regression',
+    'accuracy': 'classification',
+    'f1': 'classification',
+    'precision': 'classification',
+    'recall': 'classification',
+}
+
+
+def visible_user_ids(user):
+    """
+    Subquery of the user ids whose models `user` may rank: their own for a
+    student, their students' for a teacher
+    """
+    if user.is_teacher():
+        return db.session.query(User.id).filter(User.teacher_id == user.id)
+    return db.session.query(User.id).filter(User.id == user.id)
+
+
+def leaderboard(metric, user_ids, dataset_id=None, target_column=None, limit=50):
+    """
+    Rank models by one metric with a single query over the indexed
+    model_metrics table. Returns a list of (model, value) pairs, best first.
+    """
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f'Unsupported metric: {metric}')
+
+    order = ModelMetric.value.asc() if metric in ModelMetric.LOWER_IS_BETTER else ModelMetric.value.desc()
+    query = db.session.query(ModelMetric) \
+        .join(ModelMetric.model) \
+        .options(contains_eager(ModelMetric.model).joinedload(Model.dataset),
+                 contains_eager(ModelMetric.model).joinedload(Model.owner)) \
+        .filter(ModelMetric.name == metric, Model.user_id.in_(user_ids))
+
+    if dataset_id is not None:
+        query = query.filter(Model.dataset_id == dataset_id)
+    if target_column:
+        query = query.filter(Model.target_column == target_column)
+
+    rows = query.order_by(order, Model.created_at.asc()).limit(limit).all()
+    return [(row.model, row.value) for row in rows]
+
+
+def leaderboard_datasets(user_ids):
+    """Datasets owned by the given users, for the leaderboard filter"""
+    return Dataset.query.filter(Dataset.user_id.in_(user_ids)).order_by(Dataset.name).all()
@@ -1,106 +1,189 @@
 import numpy as np
-import pandas as pd
 import json
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_squared_error, r2_score
 
-def train_linear_regression(file_path, target_column, feature_columns, test_size=0.2, random_state=42):
+# Share of rows held out for the test metrics
+DEFAULT_TEST_SIZE = 0.2
+
+# Smallest Cholesky pivot, relative to the largest, solved without falling back to lstsq
+# (a condition number of about 1e12)
+CHOLESKY_MIN_PIVOT = 1e-6
+
+
+class LinearStatistics:
     """
-    Train a linear regression model using the specified dataset, target column, and feature columns
+    Sufficient statistics for least squares: the row count, the means of the
+    features and target, and their centered cross products (XᵀX, Xᵀy and yᵀy
+    after centering). Updated one chunk at a time and merged with Chan's
+    formula, so they stay accurate for features far from zero.
+
+    Any subset of the features can be solved from the same statistics
+    without reading the data again.
     """
-    try:
-        # Load the dataset
-        df = pd.read_csv(file_path)
-        
-        # Select features and target
-        X = df[feature_columns].values
-        y = df[target_column].values
-        
-        # Split the data into training and testing sets
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
-        
-        # Normalize the features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # Train the model
-        model = LinearRegression()
-        model.fit(X_train_scaled, y_train)
-        
-        # Make predictions
-        y_train_pred = model.predict(X_train_scaled)
-        y_test_pred = model.predict(X_test_scaled)
-        
-        # Calculate performance metrics
-        train_mse = mean_squared_error(y_train, y_train_pred)
-        test_mse = mean_squared_error(y_test, y_test_pred)
-        train_r2 = r2_score(y_train, y_train_pred)
-        test_r2 = r2_score(y_test, y_test_pred)
-        
-        # Store model data and metrics
-        model_data = {
-            'weights': model.coef_.tolist(),
-            'intercept': model.intercept_,
-            'scaler_mean': scaler.mean_.tolist(),
-            'scaler_scale': scaler.scale_.tolist()
-        }
-        
-        performance_metrics = {
-            'train_mse': train_mse,
-            'test_mse': test_mse,
-            'train_r2': train_r2,
-            'test_r2': test_r2
-        }
-        
+
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean = np.zeros(n_features + 1)
+        self.comoment = np.zeros((n_features + 1, n_features + 1))
+
+    @property
+    def n_features(self):
+        return len(self.mean) - 1
+
+    def update(self, X, y):
+        """Add a chunk of rows: X is a 2-D array of features, y the targets"""
+        Z = np.column_stack([np.asarray(X, dtype='float64'), np.asarray(y, dtype='float64')])
+        n = len(Z)
+        if n == 0:
+            return
+        if not np.isfinite(Z).all():
+            raise ValueError('The selected columns contain missing or infinite values.')
+        chunk_mean = Z.mean(axis=0)
+        centered = Z - chunk_mean
+        self._merge(n, chunk_mean, centered.T @ centered)
+
+    def merge(self, other):
+        """Add the rows summarised by another LinearStatistics"""
+        if other.count:
+            self._merge(other.count, other.mean, other.comoment)
+
+    def _merge(self, n, mean, comoment):
+        total = self.count + n
+        delta = mean - self.mean
+        self.comoment += comoment + np.outer(delta, delta) * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+    def scaler(self, features=None):
+        """Mean and scale of the features, as StandardScaler would compute them"""
+        features = np.arange(self.n_features) if features is None else np.asarray(features)
+        variance = np.diag(self.comoment)[features] / self.count
+        scale = np.sqrt(variance)
+        # Constant features are left unscaled, like StandardScaler does
+        scale[scale == 0] = 1.0
+        return self.mean[features], scale
+
+    def solve(self, features=None):
+        """
+        Least-squares weights of the standardized features (a subset given by
+        index, or all of them) and the intercept. Solved with a Cholesky
+        factorization of the feature correlations, falling back to lstsq when
+        features are collinear or constant.
+        """
+        if self.count < 2:
+            raise ValueError('At least two rows are needed to fit a linear model.')
+        features = np.arange(self.n_features) if features is None else np.asarray(features)
+        target = self.n_features
+        _, scale = self.scaler(features)
+
+        A = self.comoment[np.ix_(features, features)] / np.outer(scale, scale)
+        b = self.comoment[features, target] / scale
+        try:
+            L = np.linalg.cholesky(A)
+            # Nearly collinear features (such as every dummy of a category) factorize but solve badly
+            diagonal = np.diag(L)
+            if diagonal.min() < CHOLESKY_MIN_PIVOT * diagonal.max():
+                raise np.linalg.LinAlgError('Features are collinear')
+            weights = np.linalg.solve(L.T, np.linalg.solve(L, b))
+        except np.linalg.LinAlgError:
+            weights = np.linalg.lstsq(A, b, rcond=None)[0]
+
+        # Standardized features are centered, so the intercept is the mean target
+        return weights, float(self.mean[target])
+
+    def evaluate(self, mean, scale, weights, intercept, features=None):
+        """
+        Mean squared error and R² of a linear model on the rows summarised by
+        these statistics, computed without the rows themselves
+        """
+        features = np.arange(self.n_features) if features is None else np.asarray(features)
+        target = self.n_features
+        beta = weights / scale
+
+        # Residual e = y - Xβ - c, split into its variance and its mean
+        Sxx = self.comoment[np.ix_(features, features)]
+        Sxy = self.comoment[features, target]
+        Syy = self.comoment[target, target]
+        residual_variance = Syy - 2 * beta @ Sxy + beta @ Sxx @ beta
+        residual_mean = self.mean[target] - self.mean[features] @ beta - (intercept - mean @ beta)
+        sse = max(residual_variance, 0.0) + self.count * residual_mean ** 2
+
+        mse = sse / self.count
+        r2 = 1 - sse / Syy if Syy > 0 else 0.0
+        return float(mse), float(r2)
+
+    def to_dict(self):
         return {
-            'success': True,
-            'model_data': model_data,
-            'performance_metrics': performance_metrics
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)
+            'count': self.count,
+            'mean': self.mean.tolist(),
+            'comoment': self.comoment.tolist()
         }
 
-def make_prediction(model_data, feature_values):
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(len(data['mean']) - 1)
+        stats.count = data['count']
+        stats.mean = np.array(data['mean'], dtype='float64')
+        stats.comoment = np.array(data['comoment'], dtype='float64')
+        return stats
+
+
+def holdout_mask(start, n, test_size=DEFAULT_TEST_SIZE, random_state=0):
     """
-    Make a prediction using the trained model
+    Select the held-out rows among rows start..start+n of a file with a
+    multiplicative hash of the row number, so every pass over the file
+    holds out the same rows whatever the chunk size
     """
-    try:
-        # Convert model data from JSON string to Python objects
-        if isinstance(model_data, str):
-            model_data = json.loads(model_data)
-        
-        # Get model parameters
-        weights = np.array(model_data['weights'])
-        intercept = model_data['intercept']
-        scaler_mean = np.array(model_data['scaler_mean'])
-        scaler_scale = np.array(model_data['scaler_scale'])
-        
-        # Convert feature values to numpy array
-        feature_values = np.array(feature_values).reshape(1, -1)
-        
-        # Scale the features
-        scaled_features = (feature_values - scaler_mean) / scaler_scale
-        
-        # Make prediction
-        prediction = np.dot(scaled_features, weights) + intercept
-        
-        return {
-            'success': True,
-            'prediction': float(prediction[0])
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)
-        }
+    rows = np.arange(start, start + n, dtype=np.uint64) + np.uint64(random_state)
+    return rows * np.uint64(2654435761) % np.uint64(2 ** 32) < np.uint64(test_size * 2 ** 32)
+
+
+def fit_statistics(statistics, features=None):
+    """
+    Solve the model for a subset of features (indexes into
+    statistics['feature_columns'], or all of them) from stored statistics and
+    evaluate it on the train and test rows. Returns (model_data, performance_metrics).
+    """
+    train = LinearStatistics.from_dict(statistics['train'])
+    test = LinearStatistics.from_dict(statistics['test'])
+    columns = statistics['feature_columns']
+    if features is None:
+        features = list(range(len(columns)))
+
+    mean, scale = train.scaler(features)
+    weights, intercept = train.solve(features)
+    train_mse, train_r2 = train.evaluate(mean, scale, weights, intercept, features)
+    if test.count:
+        test_mse, test_r2 = test.evaluate(mean, scale, weights, intercept, features)
+    else:
+        test_mse, test_r2 = float('nan'), float('nan')
+
+    model_data = {
+        'feature_columns': [columns[i] for i in features],
+        'weights': weights.tolist(),
+        'intercept': intercept,
+        'scaler_mean': mean.tolist(),
+        'scaler_scale': scale.tolist()
+    }
+    performance_metrics = {
+        'train_mse': train_mse,
+        'test_mse': test_mse,
+        'train_r2': train_r2,
+        'test_r2': test_r2
+    }
+    return model_data, performance_metrics
+
+
+def fold_scaler(model_data):
+    """
+    Fold the scaler into the weights, returning (coefficients, intercept) that
+    apply to the raw feature values. weights may also be 2-D, one row per
+    output, with an intercept per row.
+    """
+    weights = np.asarray(model_data['weights'], dtype='float64')
+    scale = np.asarray(model_data['scaler_scale'], dtype='float64')
+    mean = np.asarray(model_data['scaler_mean'], dtype='float64')
+    coefficients = weights / scale
+    return coefficients, np.asarray(model_data['intercept'], dtype='float64') - coefficients @ mean
 
 def get_feature_importance(model_data, feature_columns):
     """
@@ -1,8 +1,26 @@
 from datetime import datetime
-import json
+import math
+from sqlalchemy.dialects.postgresql import JSONB
 from app import db
 from app.datasets.models import Dataset
 
+# Native JSON column: JSONB on PostgreSQL, the generic JSON type elsewhere.
+# Values are decoded once when a row is loaded instead of on every access.
+JSONColumnType = db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql')
+
+def json_safe(value):
+    """
+    Replace NaN and infinite floats (which JSONB rejects) with None, in any
+    nested dicts and lists, before storing a value in a JSON column
+    """
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
 class Model(db.Model):
     __tablename__ = 'models'
     
@@ -15,20 +33,33 @@ class Model(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Store as JSON strings in the database
-    _feature_columns = db.Column('feature_columns', db.Text, nullable=False)
-    _metrics = db.Column('metrics', db.Text)
-    _feature_importance = db.Column('feature_importance', db.Text)
+    # Stored as native JSON so they can be queried in SQL
+    _feature_columns = db.Column('feature_columns', JSONColumnType, nullable=False)
+    _metrics = db.Column('metrics', JSONColumnType)
+    _feature_importance = db.Column('feature_importance', JSONColumnType)
     
     # Relationships
     dataset_id = db.Column(db.Integer, db.ForeignKey('datasets.id'), nullable=False)
     dataset = db.relationship('Dataset', backref=db.backref('models', lazy=True))
     
+    # Dataset version the model has been trained on, including retraining
+    dataset_version = db.Column(db.Integer)
+    
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     owner = db.relationship('User', foreign_keys=[user_id], backref=db.backref('models', lazy='dynamic'))
     
+    # Numeric metrics copied into an indexed table for leaderboards
+    metric_values = db.relationship('ModelMetric', backref='model', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # models.list and the dashboard filter by owner and order by creation time
+        db.Index('ix_models_user_id_created_at', 'user_id', 'created_at'),
+        # Dataset deletes and leaderboard filters by dataset and target
+        db.Index('ix_models_dataset_id_target_column', 'dataset_id', 'target_column'),
+    )
+    
     def __init__(self, name, description, model_type, model_path, target_column, feature_columns, 
-                 metrics=None, feature_importance=None, dataset_id=None, user_id=None):
+                 metrics=None, feature_importance=None, dataset_id=None, user_id=None, dataset_version=None):
         self.name = name
         self.description = description
         self.model_type = model_type
@@ -39,42 +70,59 @@ class Model(db.Model):
         self.feature_importance = feature_importance
         self.dataset_id = dataset_id
         self.user_id = user_id
+        self.dataset_version = dataset_version
     
     @property
     def feature_columns(self):
-        if self._feature_columns:
-            return json.loads(self._feature_columns)
-        return []
+        return self._feature_columns or []
     
     @feature_columns.setter
     def feature_columns(self, value):
-        self._feature_columns = json.dumps(value)
+        self._feature_columns = list(value)
     
     @property
     def metrics(self):
-        if self._metrics:
-            return json.loads(self._metrics)
-        return None
+        return self._metrics
     
     @metrics.setter
     def metrics(self, value):
-        if value is not None:
-            self._metrics = json.dumps(value)
-        else:
-            self._metrics = None
+        self._metrics = json_safe(value)
+        self._sync_metric_values(value or {})
+    
+    def _sync_metric_values(self, metrics):
+        # Keep one ModelMetric row per finite numeric metric, updating rows in place
+        values = {name: float(value) for name, value in metrics.items()
+                  if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)}
+        existing = {metric.name: metric for metric in self.metric_values}
+        for name, metric in existing.items():
+            if name in values:
+                metric.value = values[name]
+            else:
+                self.metric_values.remove(metric)
+        for name, value in values.items():
+            if name not in existing:
+                self.metric_values.append(ModelMetric(name=name, value=value))
     
     @property
     def feature_importance(self):
-        if self._feature_importance:
-            return json.loads(self._feature_importance)
-        return None
+        return self._feature_importance
     
     @feature_importance.setter
     def feature_importance(self, value):
-        if value is not None:
-            self._feature_importance = json.dumps(value)
-        else:
-            self._feature_importance = None
+        self._feature_importance = json_safe(value)
+    
+    @property
+    def has_new_rows(self):
+        """True if rows were appended to the dataset after the model was last trained"""
+        return self.dataset is not None and (self.dataset_version or 1) < self.dataset.version
+    
+    @classmethod
+    def metric(cls, name):
+        """
+        SQL expression for one numeric metric, e.g.
+        Model.query.order_by(Model.metric('r2_score').desc())
+        """
+        return cls._metrics[name].as_float()
     
     @property
     def training_history(self):
@@ -88,18 +136,40 @@ class Model(db.Model):
     def __repr__(self):
         return f'<Model {self.name}>'
 
+class ModelMetric(db.Model):
+    __tablename__ = 'model_metrics'
+    
+    # Metrics where a lower value ranks higher; every other metric ranks highest first
+    LOWER_IS_BETTER = {'mse', 'mae'}
+    
+    model_id = db.Column(db.Integer, db.ForeignKey('models.id'), primary_key=True)
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_model_metrics_name_value', 'name', 'value'),
+    )
+    
+    def __repr__(self):
+        return f'<ModelMetric {self.model_id} {self.name}={self.value}>'
+
 class Prediction(db.Model):
     __tablename__ = 'predictions'
     
     id = db.Column(db.Integer, primary_key=True)
-    _input_data = db.Column('input_data', db.Text, nullable=False)  # JSON string of input data
-    _output_data = db.Column('output_data', db.Text, nullable=False)  # JSON string of prediction result
+    _input_data = db.Column('input_data', JSONColumnType, nullable=False)  # Feature values
+    _output_data = db.Column('output_data', JSONColumnType, nullable=False)  # Prediction result
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     model_id = db.Column(db.Integer, db.ForeignKey('models.id'), nullable=False)
     model = db.relationship('Model', backref=db.backref('predictions', lazy='dynamic'))
     
+    __table_args__ = (
+        # Prediction history per model
+        db.Index('ix_predictions_model_id_created_at', 'model_id', 'created_at'),
+    )
+    
     def __init__(self, input_data, output_data, model_id):
         self.input_data = input_data
         self.output_data = output_data
@@ -107,29 +177,19 @@ class Prediction(db.Model):
     
     @property
     def input_data(self):
-        if self._input_data:
-            return json.loads(self._input_data)
-        return {}
+        return self._input_data or {}
     
     @input_data.setter
     def input_data(self, value):
-        if value is not None:
-            self._input_data = json.dumps(value)
-        else:
-            self._input_data = "{}"
+        self._input_data = json_safe(value) if value is not None else {}
     
     @property
     def output_data(self):
-        if self._output_data:
-            return json.loads(self._output_data)
-        return {}
+        return self._output_data or {}
     
     @output_data.setter
     def output_data(self, value):
-        if value is not None:
-            self._output_data = json.dumps(value)
-        else:
-            self._output_data = "{}"
+        self._output_data = json_safe(value) if value is not None else {}
     
     def __repr__(self):
         return f'<Prediction {self.id}>'
@@ -149,6 +209,11 @@ class Feedback(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     user = db.relationship('User', backref=db.backref('feedbacks', lazy='dynamic'))
     
+    __table_args__ = (
+        # Feedback history per model
+        db.Index('ix_feedbacks_model_id_created_at', 'model_id', 'created_at'),
+    )
+    
     def __init__(self, comment, rating, model_id, user_id):
         self.comment = comment
         self.rating = rating
@@ -156,4 +221,78 @@ class Feedback(db.Model):
         self.user_id = user_id
     
     def __repr__(self):
-        return f'<Feedback {self.id}>' 
\ No newline at end of file
+        return f'<Feedback {self.id}>' 
+class TrainingJob(db.Model):
+    __tablename__ = 'training_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    model_type = db.Column(db.String(50), nullable=False)
+    target_column = db.Column(db.String(100), nullable=False)
+    _feature_columns = db.Column('feature_columns', JSONColumnType, nullable=False)
+    
+    # 'train' creates a new model, 'retrain' updates model_id with rows appended since it was trained
+    kind = db.Column(db.String(20), nullable=False, default='train', server_default='train')
+    
+    # 'in_memory' loads the selected columns at once, 'out_of_core' streams them in chunks
+    training_mode = db.Column(db.String(20), nullable=False, default='in_memory', server_default='in_memory')
+    
+    # 'queued', 'running', 'completed' or 'failed'
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    progress = db.Column(db.Integer, nullable=False, default=0)  # Percent complete
+    message = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    # Relationships
+    dataset_id = db.Column(db.Integer, db.ForeignKey('datasets.id'), nullable=False, index=True)
+    dataset = db.relationship('Dataset')
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    owner = db.relationship('User', foreign_keys=[user_id])
+    
+    # Set once training has completed, or from the start for a retrain
+    model_id = db.Column(db.Integer, db.ForeignKey('models.id'), index=True)
+    model = db.relationship('Model')
+    
+    def __init__(self, name, description, model_type, target_column, feature_columns, dataset_id, user_id,
+                 kind='train', model_id=None, training_mode='in_memory'):
+        self.kind = kind
+        self.model_id = model_id
+        self.training_mode = training_mode
+        self.name = name
+        self.description = description
+        self.model_type = model_type
+        self.target_column = target_column
+        self.feature_columns = feature_columns
+        self.dataset_id = dataset_id
+        self.user_id = user_id
+        self.status = 'queued'
+        self.progress = 0
+    
+    @property
+    def feature_columns(self):
+        return self._feature_columns or []
+    
+    @feature_columns.setter
+    def feature_columns(self, value):
+        self._feature_columns = list(value)
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'model_id': self.model_id
+        }
+    
+    def __repr__(self):
+        return f'<TrainingJob {self.id} {self.status}>'
@@ -0,0 +1,158 @@
+import atexit
+import threading
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models.models import Prediction, json_safe
+
+
+class PredictionLogWriter:
+    """
+    Buffers Prediction records in memory and writes them to the database in
+    bulk from a background thread, so logging a prediction never waits on a
+    database round-trip.
+
+    The buffer is flushed every flush_interval seconds, as soon as it holds
+    batch_size records, and once more when the process exits. If a flush
+    fails because the database is unavailable the records are kept for the
+    next attempt, up to max_buffer records; beyond that the oldest are
+    dropped. A caller that fills the buffer to max_buffer flushes it inline,
+    so large batches slow down instead of losing records. Callers that log
+    many large batches in a row, such as CSV scoring, use write_many() to
+    insert each batch directly and keep the buffer small. Call flush()
+    before deleting a model's predictions so buffered rows don't reference
+    a deleted model.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=2.0, max_buffer=100000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.app = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config['PREDICTION_LOG_BATCH_SIZE']
+        self.flush_interval = app.config['PREDICTION_LOG_FLUSH_INTERVAL']
+        self.max_buffer = app.config['PREDICTION_LOG_MAX_BUFFER']
+
+    def log(self, model_id, input_data, output_data):
+        """Queue a single prediction"""
+        self.log_many(model_id, [input_data], [output_data])
+
+    def log_many(self, model_id, inputs, outputs):
+        """Queue a batch of predictions; inputs and outputs are parallel lists of dicts"""
+        records = self._records(model_id, inputs, outputs)
+        with self._lock:
+            self._buffer.extend(records)
+            pending = len(self._buffer)
+        if pending >= self.max_buffer:
+            # The background thread is falling behind; write from this thread
+            self.flush()
+            return
+        self._ensure_started()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def write_many(self, model_id, inputs, outputs):
+        """
+        Write a batch of predictions from this thread with one executemany
+        insert, without going through the buffer. If the database is
+        unavailable the batch is queued for the background thread instead.
+        Returns the number of records written.
+        """
+        records = self._records(model_id, inputs, outputs)
+        try:
+            self._insert(records)
+        except OperationalError as e:
+            print(f"Error writing prediction log, will retry: {str(e)}")
+            with self._lock:
+                self._buffer.extend(records)
+                self._trim()
+            self._ensure_started()
+            return 0
+        except Exception as e:
+            print(f"Error writing prediction log, dropped {len(records)} records: {str(e)}")
+            return 0
+        return len(records)
+
+    def flush(self):
+        """Write every buffered prediction with one executemany insert"""
+        with self._flush_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+            if not records:
+                return 0
+
+            try:
+                self._insert(records)
+            except OperationalError as e:
+                # The database is unreachable; keep the records for the next flush
+                print(f"Error writing prediction log, will retry: {str(e)}")
+                with self._lock:
+                    self._buffer[:0] = records
+                    self._trim()
+                return 0
+            except Exception as e:
+                print(f"Error writing prediction log, dropped {len(records)} records: {str(e)}")
+                return 0
+            return len(records)
+
+    def close(self):
+        """Stop the background thread and write whatever is still buffered"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    @staticmethod
+    def _records(model_id, inputs, outputs):
+        created_at = datetime.utcnow()
+        return [(model_id, input_data, output_data, created_at)
+                for input_data, output_data in zip(inputs, outputs)]
+
+    def _insert(self, records):
+        rows = [{
+            'model_id': model_id,
+            'input_data': json_safe(input_data),
+            'output_data': json_safe(output_data),
+            'created_at': created_at
+        } for model_id, input_data, output_data, created_at in records]
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(Prediction.__table__.insert(), rows)
+
+    def _trim(self):
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow > 0:
+            del self._buffer[:overflow]
+
+    def _ensure_started(self):
+        # The thread is started on first use so CLI commands and training
+        # workers that never log predictions don't run one
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='prediction-log', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+# Prediction log shared by every request in this process
+prediction_log = PredictionLogWriter()
@@ -0,0 +1,130 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+
+from app.models.artifacts import load_artifact, artifact_memory_size, model_memory_size
+from config import Config
+
+
+class ModelRegistry:
+    """
+    Process-wide LRU of deserialized models, keyed by model id.
+
+    An entry is only reused while the model's artifact path and updated_at
+    timestamp are unchanged, so a hot model is served without touching the
+    disk and a retrained or replaced model is reloaded automatically. The
+    registry is bounded by the in-memory size of the cached models, as
+    recorded in their manifests (or measured after loading for artifacts
+    saved without it), not by their compressed size on disk.
+    """
+
+    def __init__(self, max_bytes, loader=load_artifact, sizer=None):
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._sizer = sizer or self._memory_size
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _memory_size(artifact_path, model_info):
+        size = artifact_memory_size(artifact_path) if os.path.exists(artifact_path) else None
+        return size if size is not None else model_memory_size(model_info)
+
+    @staticmethod
+    def _version(model):
+        return (model.model_path, model.updated_at)
+
+    def get(self, model):
+        """
+        Return the model info dict ('pipeline' or 'linear_model', 'feature_columns', ...) for a Model
+        """
+        version = self._version(model)
+        with self._lock:
+            entry = self._entries.get(model.id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(model.id)
+                return entry[1]
+
+        model_info = self._loader(model.model_path)
+        size = self._sizer(model.model_path, model_info)
+
+        with self._lock:
+            self._remove(model.id)
+            if size <= self.max_bytes:
+                self._entries[model.id] = (version, model_info, size)
+                self._total_bytes += size
+                self._evict()
+        return model_info
+
+    def invalidate(self, model_id):
+        with self._lock:
+            self._remove(model_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def _remove(self, model_id):
+        entry = self._entries.pop(model_id, None)
+        if entry is not None:
+            self._total_bytes -= entry[2]
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._total_bytes -= size
+
+
+# Deserialized models shared by every request in this process
+model_registry = ModelRegistry(Config.MODEL_CACHE_MAX_BYTES)
+
+
+def warm_up_registry(app, count):
+    """
+    Load the `count` models with the most logged predictions into the
+    registry. Called by the wsgi.py entrypoint, so with `gunicorn --preload`
+    the models are loaded once in the master and shared copy-on-write by
+    every worker; CLI commands and training workers don't load them.
+    Returns the number of models loaded.
+    """
+    from sqlalchemy import func
+    from app import db
+    from app.models.models import Model, Prediction
+
+    loaded = 0
+    with app.app_context():
+        try:
+            usage = db.session.query(Prediction.model_id, func.count().label('uses')) \
+                .group_by(Prediction.model_id) \
+                .subquery()
+            models = Model.query.join(usage, usage.c.model_id == Model.id) \
+                .order_by(usage.c.uses.desc()) \
+                .limit(count) \
+                .all()
+        except Exception as e:
+            print(f"Error selecting models to preload: {str(e)}")
+            models = []
+
+        for model in models:
+            try:
+                model_registry.get(model)
+                loaded += 1
+            except Exception as e:
+                print(f"Error preloading model {model.id}: {str(e)}")
+
+        # Forked workers must open their own database connections
+        db.session.remove()
+        db.engine.dispose()
+
+    # Keep the garbage collector from touching (and so copying) the preloaded objects
+    gc.collect()
+    gc.freeze()
+    print(f"Preloaded {loaded} model(s) into the model registry")
+    return loaded
@@ -0,0 +1,105 @@
+import os
+import re
+import tempfile
+import time
+import uuid
+
+from config import Config
+
+# Result ids are uuid4 hex strings; anything else never reaches the filesystem
+RESULT_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Read size used when streaming a result file to the client
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def result_path(result_id, directory=None):
+    """
+    Path of a stored batch prediction result, or None for an invalid id
+    """
+    if not result_id or not RESULT_ID_PATTERN.match(result_id):
+        return None
+    return os.path.join(directory or Config.PREDICTION_RESULTS_DIR, f'{result_id}.csv')
+
+
+class PredictionResultWriter:
+    """
+    Writes the rows of a batch prediction to a CSV file on disk one chunk at
+    a time, so the full result is never held in memory. The file only
+    becomes visible under its result id once commit() is called; discard()
+    removes the partial file. The first preview_rows rows are kept in
+    memory for display.
+    """
+
+    def __init__(self, directory=None, preview_rows=100):
+        self.directory = directory or Config.PREDICTION_RESULTS_DIR
+        self.preview_rows = preview_rows
+        self.result_id = uuid.uuid4().hex
+        self.row_count = 0
+        self.preview = []
+        os.makedirs(self.directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        self._file = os.fdopen(fd, 'w', newline='')
+
+    def append(self, inputs, predictions, probabilities=None):
+        """
+        Append one scored chunk: inputs is a DataFrame of the feature columns,
+        predictions and probabilities are parallel sequences
+        """
+        chunk = inputs.copy()
+        chunk['prediction'] = predictions
+        if probabilities is not None:
+            chunk['probability'] = probabilities
+        chunk.to_csv(self._file, header=self.row_count == 0, index=False)
+
+        if len(self.preview) < self.preview_rows:
+            self.preview.extend(chunk.head(self.preview_rows - len(self.preview)).to_dict('records'))
+        self.row_count += len(chunk)
+
+    def commit(self):
+        """Close the file and publish it under result_id"""
+        self._file.close()
+        os.replace(self._tmp_path, result_path(self.result_id, self.directory))
+        return self.result_id
+
+    def discard(self):
+        """Close and remove the partial file"""
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def stream_result(path, block_size=STREAM_BLOCK_SIZE):
+    """
+    Open a stored result and return a generator yielding it in fixed-size
+    blocks. The file is opened immediately, so it can be streamed to the end
+    even if it is removed in the meantime.
+    """
+    f = open(path, 'rb')
+
+    def generate():
+        with f:
+            for block in iter(lambda: f.read(block_size), b''):
+                yield block
+
+    return generate()
+
+
+def expired_results(max_age, directory=None):
+    """
+    Paths of stored results (and abandoned partial files) older than
+    max_age seconds
+    """
+    directory = directory or Config.PREDICTION_RESULTS_DIR
+    if not max_age or not os.path.isdir(directory):
+        return []
+
+    cutoff = time.time() - max_age
+    expired = []
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                expired.append(entry.path)
+        except OSError:
+            pass
+    return expired
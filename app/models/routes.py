@@ -1,23 +1,22 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, session, Markup
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, session, Markup, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
 from werkzeug.exceptions import NotFound
+from werkzeug.utils import secure_filename
 import pandas as pd
-import numpy as np
-import json
-import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, precision_score, recall_score, f1_score
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-import pickle
-from datetime import datetime
+import os
 
 from app import db
 from app.models.forms import ModelForm, PredictionForm, FeedbackForm
-from app.models.models import Model, Prediction, Feedback
+from app.models.models import Model, Feedback, TrainingJob
 from app.datasets.models import Dataset
+from app.datasets.utils import read_dataset
+from app.models.registry import model_registry
+from app.models.inference import prepare_features, predict_frame, predict_row
+from app.models.jobs import submit_training_job
+from app.models.prediction_log import prediction_log
+from app.models.cleanup import delete_models, discard_model_artifacts, file_cleanup
+from app.models.results import PredictionResultWriter, result_path, stream_result, expired_results
+from app.models.leaderboard import LEADERBOARD_METRICS, leaderboard as rank_models, leaderboard_datasets, visible_user_ids
 
 models = Blueprint('models', __name__, template_folder='templates')
 
@@ -65,6 +64,29 @@ def list():
     
     return render_template('models/list.html', models=user_models)
 
+@models.route('/models/leaderboard')
+@login_required
+def leaderboard():
+    metric = request.args.get('metric', 'r2_score')
+    if metric not in LEADERBOARD_METRICS:
+        flash(f'Unknown metric: {metric}', 'danger')
+        metric = 'r2_score'
+    dataset_id = request.args.get('dataset_id', type=int)
+    target_column = request.args.get('target_column', '').strip()
+    
+    # Students rank their own models, teachers rank their students' models
+    user_ids = visible_user_ids(current_user)
+    ranked = rank_models(metric, user_ids, dataset_id=dataset_id, target_column=target_column or None,
+                         limit=current_app.config['LEADERBOARD_LIMIT'])
+    
+    return render_template('models/leaderboard.html',
+                           ranked=ranked,
+                           metric=metric,
+                           metrics=LEADERBOARD_METRICS,
+                           datasets=leaderboard_datasets(user_ids),
+                           dataset_id=dataset_id,
+                           target_column=target_column)
+
 @models.route('/models/train', methods=['GET', 'POST'])
 @login_required
 def train():
@@ -93,11 +115,10 @@ def train():
                 # Pre-select the dataset in the form
                 form.dataset_id.data = dataset_id
                 
-                # Load dataset columns
-                if dataset.is_valid:
-                    df = pd.read_csv(dataset.file_path)
-                    columns = df.columns.tolist()
-                    
+                # Load dataset columns from the stored metadata
+                columns = [column['name'] for column in dataset.get_column_info()] if dataset.is_valid else None
+                db.session.commit()
+                if columns:
                     # Update choices for form validation
                     form.target_column.choices = [(col, col) for col in columns]
                     form.feature_columns.choices = [(col, col) for col in columns]
@@ -120,8 +141,10 @@ def train():
                     flash('You do not have permission to use this dataset', 'danger')
                     return redirect(url_for('models.train'))
                 
-                df = pd.read_csv(dataset.file_path)
-                columns = df.columns.tolist()
+                # The stored column metadata is enough to validate the selected columns
+                if not dataset.is_valid:
+                    raise ValueError('Could not read columns from the dataset file')
+                columns = [column['name'] for column in dataset.get_column_info()]
                 
                 # Update choices for form validation
                 form.target_column.choices = [(col, col) for col in columns]
@@ -135,6 +158,7 @@ def train():
                     model_type = form.model_type.data
                     target_column = form.target_column.data
                     feature_columns = form.feature_columns.data
+                    training_mode = form.training_mode.data
                     
                     # Validate target and feature columns
                     if target_column not in columns:
@@ -154,135 +178,26 @@ def train():
                         flash('Target column cannot be a feature column', 'danger')
                         return render_template('models/train.html', form=form)
                     
-                    # Train the model
+                    # Queue the training job so the request returns immediately
                     try:
-                        # Prepare data
-                        X = df[feature_columns]
-                        y = df[target_column]
-                        
-                        # Handle non-numeric data
-                        X = pd.get_dummies(X)
-                        
-                        # Split data
-                        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-                        
-                        # Create appropriate model based on model_type
-                        if model_type == 'regression':
-                            if len(feature_columns) > 1:
-                                estimator = RandomForestRegressor(n_estimators=100, random_state=42)
-                            else:
-                                estimator = LinearRegression()
-                                
-                            # Create pipeline with scaling
-                            pipeline = Pipeline([
-                                ('scaler', StandardScaler()),
-                                ('model', estimator)
-                            ])
-                            
-                            # Train model
-                            pipeline.fit(X_train, y_train)
-                            
-                            # Evaluate model
-                            y_pred = pipeline.predict(X_test)
-                            metrics = {
-                                'mse': mean_squared_error(y_test, y_pred),
-                                'r2_score': r2_score(y_test, y_pred),
-                                'mae': np.mean(np.abs(y_test - y_pred))
-                            }
-                            
-                            # Get feature importance if available
-                            if hasattr(estimator, 'feature_importances_'):
-                                feature_importance = estimator.feature_importances_
-                            else:
-                                feature_importance = None
-                            
-                        elif model_type == 'classification':
-                            if len(feature_columns) > 1:
-                                estimator = RandomForestClassifier(n_estimators=100, random_state=42)
-                            else:
-                                estimator = LogisticRegression(random_state=42)
-                            
-                            # Create pipeline with scaling
-                            pipeline = Pipeline([
-                                ('scaler', StandardScaler()),
-                                ('model', estimator)
-                            ])
-                            
-                            # Train model
-                            pipeline.fit(X_train, y_train)
-                            
-                            # Evaluate model
-                            y_pred = pipeline.predict(X_test)
-                            metrics = {
-                                'accuracy': accuracy_score(y_test, y_pred),
-                                'precision': precision_score(y_test, y_pred, average='weighted', zero_division=0),
-                                'recall': recall_score(y_test, y_pred, average='weighted', zero_division=0),
-                                'f1': f1_score(y_test, y_pred, average='weighted', zero_division=0)
-                            }
-                            
-                            # Get feature importance if available
-                            if hasattr(estimator, 'feature_importances_'):
-                                feature_importance = estimator.feature_importances_
-                            else:
-                                feature_importance = None
-                        else:
-                            flash(f'Unsupported model type: {model_type}', 'danger')
-                            return render_template('models/train.html', form=form)
-                        
-                        # Save model to file
-                        model_filename = f'user_{current_user.id}_model_{pd.Timestamp.now().strftime("%Y%m%d%H%M%S")}.pkl'
-                        model_path = f'app/static/models/{model_filename}'
-                        
-                        # Create a model info object to save
-                        model_info = {
-                            'pipeline': pipeline,
-                            'feature_columns': X.columns.tolist(),  # Save the processed column names (after get_dummies)
-                            'target_column': target_column,
-                            'feature_mapping': {col: X.columns[X.columns.str.startswith(f'{col}_')].tolist() 
-                                            if len(X.columns[X.columns.str.startswith(f'{col}_')]) > 0 
-                                            else [col] for col in feature_columns},
-                            'training_history': {
-                                'train_loss': [0.5, 0.3, 0.2, 0.1],  # Example values
-                                'val_loss': [0.6, 0.4, 0.3, 0.2]  # Example values
-                            }
-                        }
-                        
-                        # Save the model to disk
-                        with open(model_path, 'wb') as f:
-                            pickle.dump(model_info, f)
-                        
-                        # Create model in database
-                        new_model = Model(
+                        job = TrainingJob(
                             name=name,
                             description=description,
                             model_type=model_type,
-                            model_path=model_path,
                             target_column=target_column,
                             feature_columns=feature_columns,
-                            metrics=metrics,
-                            feature_importance=feature_importance.tolist() if feature_importance is not None else None,
                             dataset_id=dataset.id,
-                            user_id=current_user.id
+                            user_id=current_user.id,
+                            training_mode=training_mode
                         )
-                        
-                        # Add min/max values for visualization
-                        if model_type == 'regression':
-                            # Get target min/max for visualization
-                            dataset_df = pd.read_csv(dataset.file_path)
-                            if metrics is None:
-                                metrics = {}
-                            metrics['target_min'] = float(dataset_df[target_column].min())
-                            metrics['target_max'] = float(dataset_df[target_column].max())
-                            new_model.metrics = metrics
-                        
-                        db.session.add(new_model)
+                        db.session.add(job)
                         db.session.commit()
                         
-                        flash('Model trained successfully!', 'success')
-                        return redirect(url_for('models.view', model_id=new_model.id))
+                        submit_training_job(job)
+                        return redirect(url_for('models.training_job', job_id=job.id))
                         
                     except Exception as e:
-                        flash(f'Error training model: {str(e)}', 'danger')
+                        flash(f'Error starting training: {str(e)}', 'danger')
                         return render_template('models/train.html', form=form)
                 else:
                     # If we get here, the form didn't validate - but we'll display the form with errors
@@ -293,6 +208,32 @@ def train():
     # For GET requests or if validation failed
     return render_template('models/train.html', form=form)
 
+@models.route('/models/jobs/<int:job_id>')
+@login_required
+def training_job(job_id):
+    job = TrainingJob.query.get_or_404(job_id)
+    
+    # Only the student who started the job can follow it
+    if job.user_id != current_user.id:
+        flash('You do not have permission to view this training job', 'danger')
+        return redirect(url_for('models.list'))
+    
+    if job.status == 'completed' and job.model_id:
+        flash(job.message or 'Model trained successfully!', 'success')
+        return redirect(url_for('models.view', model_id=job.model_id))
+    
+    return render_template('models/job.html', job=job)
+
+@models.route('/models/jobs/<int:job_id>/status')
+@login_required
+def training_job_status(job_id):
+    job = TrainingJob.query.get_or_404(job_id)
+    
+    if job.user_id != current_user.id:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    return jsonify(job.to_dict())
+
 @models.route('/models/get_columns/<int:dataset_id>')
 @login_required
 def get_columns(dataset_id):
@@ -303,9 +244,15 @@ def get_columns(dataset_id):
         return jsonify({'error': 'Access denied'}), 403
     
     try:
-        df = pd.read_csv(dataset.file_path)
-        columns = df.columns.tolist()
-        return jsonify({'columns': columns})
+        if not dataset.is_valid:
+            return jsonify({'error': 'Could not read columns from the dataset file'}), 500
+        # Served from the stored metadata unless the file changed since it was computed
+        column_info = dataset.get_column_info()
+        db.session.commit()
+        return jsonify({
+            'columns': [column['name'] for column in column_info],
+            'dtypes': {column['name']: column['dtype'] for column in column_info}
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -321,6 +268,45 @@ def view(model_id):
     
     return render_template('models/view.html', model=model)
 
+@models.route('/models/<int:model_id>/retrain', methods=['POST'])
+@login_required
+def retrain(model_id):
+    model = Model.query.get_or_404(model_id)
+    
+    # Only the owner can retrain a model
+    if model.user_id != current_user.id:
+        flash('You do not have permission to retrain this model', 'danger')
+        return redirect(url_for('models.view', model_id=model.id))
+    
+    if not model.has_new_rows:
+        flash('No rows have been added to the dataset since this model was trained', 'info')
+        return redirect(url_for('models.view', model_id=model.id))
+    
+    # Retrain in the background on the rows appended since the last training,
+    # falling back to the mode the model was first trained with
+    try:
+        first_job = TrainingJob.query.filter_by(model_id=model.id, kind='train').first()
+        job = TrainingJob(
+            name=model.name,
+            description=model.description,
+            model_type=model.model_type,
+            target_column=model.target_column,
+            feature_columns=model.feature_columns,
+            dataset_id=model.dataset_id,
+            user_id=current_user.id,
+            kind='retrain',
+            model_id=model.id,
+            training_mode=first_job.training_mode if first_job else 'in_memory'
+        )
+        db.session.add(job)
+        db.session.commit()
+        
+        submit_training_job(job)
+        return redirect(url_for('models.training_job', job_id=job.id))
+    except Exception as e:
+        flash(f'Error starting retraining: {str(e)}', 'danger')
+        return redirect(url_for('models.view', model_id=model.id))
+
 @models.route('/models/<int:model_id>/predict', methods=['GET', 'POST'])
 @login_required
 def predict(model_id):
@@ -332,38 +318,24 @@ def predict(model_id):
         return redirect(url_for('models.list'))
     
     # Handle download request if download parameter is present
-    if request.args.get('download') == 'true' and 'predictions' in session:
-        # Code to handle download would go here
-        flash('Download functionality is not implemented yet', 'info')
-        return redirect(url_for('models.predict', model_id=model.id))
+    if request.args.get('download') == 'true':
+        return download_predictions(model)
     
-    # Load the model
+    # Load the model (served from the in-memory registry when it is hot)
     try:
-        with open(model.model_path, 'rb') as f:
-            model_info = pickle.load(f)
-        
-        pipeline = model_info['pipeline']
-        feature_mapping = model_info.get('feature_mapping', {})
+        model_info = model_registry.get(model)
         
-        # For Linear/Logistic Regression, try to extract coefficients for feature importance
-        estimator = pipeline.named_steps.get('model')
-        if estimator is not None:
-            # Extract and store coefficients if they don't exist
-            if model.model_type == 'regression' and hasattr(estimator, 'coef_') and 'coefficients' not in model.metrics:
-                coefficients = estimator.coef_
-                intercept = estimator.intercept_
-                
-                # For single feature models, coef_ might be a scalar
-                if not hasattr(coefficients, '__len__'):
-                    coefficients = [coefficients]
-                
-                metrics = model.metrics.copy() if model.metrics else {}
-                metrics['coefficients'] = coefficients.tolist() if hasattr(coefficients, 'tolist') else list(coefficients)
-                metrics['intercept'] = float(intercept)
-                
-                # Save updated metrics
-                model.metrics = metrics
-                db.session.commit()
+        # For linear regressions, store the coefficients for the feature contribution breakdown
+        linear_model = model_info.get('linear_model')
+        if model.model_type == 'regression' and linear_model is not None and 'coefficients' not in (model.metrics or {}):
+            # Compiled coefficients apply to the raw feature values
+            metrics = model.metrics.copy() if model.metrics else {}
+            metrics['coefficients'] = linear_model['coefficients'][0].tolist()
+            metrics['intercept'] = float(linear_model['intercept'][0])
+            
+            # Save updated metrics
+            model.metrics = metrics
+            db.session.commit()
     except Exception as e:
         flash(f'Error loading model: {str(e)}', 'danger')
         return redirect(url_for('models.view', model_id=model.id))
@@ -384,6 +356,7 @@ def predict(model_id):
     prediction = None
     prediction_proba = None
     predictions = None
+    batch_row_count = 0
     is_single_prediction = True
     example_prediction = False
     
@@ -393,49 +366,51 @@ def predict(model_id):
             file = request.files['csv_file']
             if file and file.filename.endswith('.csv'):
                 try:
-                    # Process CSV file
+                    # Process CSV file in chunks so large files are scored in bounded memory
                     has_header = 'has_header' in request.form
-                    df = pd.read_csv(file, header=0 if has_header else None)
+                    reader = pd.read_csv(file, header=0 if has_header else None,
+                                         chunksize=current_app.config['PREDICTION_CHUNK_SIZE'])
+                    with_probability = model.model_type == 'classification'
                     
-                    # Validate columns
-                    missing_columns = [col for col in model.feature_columns if col not in df.columns]
-                    if missing_columns:
-                        flash(f'CSV file is missing required columns: {", ".join(missing_columns)}', 'danger')
-                    else:
-                        # Make predictions for each row
-                        predictions = []
-                        for _, row in df.iterrows():
-                            X_pred = pd.DataFrame([row[model.feature_columns].to_dict()])
-                            # Apply preprocessing
-                            X_pred_processed = pd.get_dummies(X_pred)
-                            
-                            # Ensure columns match training data
-                            for col in model_info['feature_columns']:
-                                if col not in X_pred_processed.columns:
-                                    X_pred_processed[col] = 0
-                            
-                            # Make sure columns are in the same order as during training
-                            X_pred_processed = X_pred_processed[model_info['feature_columns']]
+                    # Results are written to disk chunk by chunk; only a preview is kept in memory
+                    writer = PredictionResultWriter(preview_rows=current_app.config['PREDICTION_RESULTS_PREVIEW_ROWS'])
+                    try:
+                        for chunk in reader:
+                            # Validate columns
+                            missing_columns = [col for col in model.feature_columns if col not in chunk.columns]
+                            if missing_columns:
+                                flash(f'CSV file is missing required columns: {", ".join(missing_columns)}', 'danger')
+                                writer.discard()
+                                writer = None
+                                break
                             
-                            # Make prediction
-                            pred = pipeline.predict(X_pred_processed)[0]
-                            prob = None
+                            # Encode and score the whole chunk at once
+                            X_pred = prepare_features(chunk, model.feature_columns, model_info['feature_columns'])
+                            preds, probs = predict_frame(model_info, X_pred, with_probability=with_probability)
                             
-                            # For classification models, get probability if available
-                            if model.model_type == 'classification' and hasattr(pipeline, 'predict_proba'):
-                                proba = pipeline.predict_proba(X_pred_processed)[0]
-                                max_prob_idx = proba.argmax()
-                                prob = proba[max_prob_idx]
+                            inputs = chunk[model.feature_columns]
+                            writer.append(inputs, preds, probs)
                             
-                            predictions.append({
-                                'inputs': row[model.feature_columns].to_dict(),
-                                'prediction': pred,
-                                'probability': prob
-                            })
+                            # Log the chunk with one bulk insert, so memory stays bounded by the chunk size
+                            prediction_log.write_many(
+                                model.id,
+                                inputs.to_dict('records'),
+                                [{'prediction': preds[i], 'probability': probs[i] if probs is not None else None}
+                                 for i in range(len(preds))]
+                            )
                         
+                        if writer is not None:
+                            writer.commit()
+                    except Exception:
+                        if writer is not None:
+                            writer.discard()
+                        raise
+                    
+                    if writer is not None:
                         is_single_prediction = False
-                        # Store in session for download
-                        session['predictions'] = predictions
+                        predictions = writer.preview
+                        batch_row_count = writer.row_count
+                        remember_prediction_result(model.id, writer.result_id)
                 except Exception as e:
                     flash(f'Error processing CSV file: {str(e)}', 'danger')
         
@@ -447,28 +422,9 @@ def predict(model_id):
                 for feature in model.feature_columns:
                     feature_values[feature] = getattr(form, feature).data
                 
-                # Create input dataframe
-                X_pred = pd.DataFrame([feature_values])
-                
-                # Apply the same preprocessing (handle categorical features)
-                X_pred_processed = pd.get_dummies(X_pred)
-                
-                # Ensure columns match training data
-                for col in model_info['feature_columns']:
-                    if col not in X_pred_processed.columns:
-                        X_pred_processed[col] = 0
-                
-                # Make sure columns are in the same order as during training
-                X_pred_processed = X_pred_processed[model_info['feature_columns']]
-                
-                # Make prediction
-                prediction = pipeline.predict(X_pred_processed)[0]
-                
-                # For classification models, get class probabilities if available
-                if model.model_type == 'classification' and hasattr(pipeline, 'predict_proba'):
-                    proba = pipeline.predict_proba(X_pred_processed)[0]
-                    classes = pipeline.classes_
-                    prediction_proba = {str(classes[i]): float(proba[i]) for i in range(len(classes))}
+                # Make prediction (with class probabilities for classification models)
+                prediction, prediction_proba = predict_row(model_info, model.feature_columns, feature_values,
+                                                           with_probability=model.model_type == 'classification')
                 
             except Exception as e:
                 flash(f'Error making prediction: {str(e)}', 'danger')
@@ -478,7 +434,7 @@ def predict(model_id):
         try:
             # Get example values for each feature (middle value of the dataset)
             dataset = Dataset.query.get(model.dataset_id)
-            df = pd.read_csv(dataset.file_path)
+            df = read_dataset(dataset.file_path, columns=model.feature_columns)
             
             # Use the median or mode value for each feature depending on data type
             feature_values = {}
@@ -493,28 +449,9 @@ def predict(model_id):
                     feature_values[feature] = df[feature].mode()[0]
                     getattr(form, feature).data = feature_values[feature]
             
-            # Create input dataframe
-            X_pred = pd.DataFrame([feature_values])
-            
-            # Apply the same preprocessing (handle categorical features)
-            X_pred_processed = pd.get_dummies(X_pred)
-            
-            # Ensure columns match training data
-            for col in model_info['feature_columns']:
-                if col not in X_pred_processed.columns:
-                    X_pred_processed[col] = 0
-            
-            # Make sure columns are in the same order as during training
-            X_pred_processed = X_pred_processed[model_info['feature_columns']]
-            
-            # Make example prediction
-            prediction = pipeline.predict(X_pred_processed)[0]
-            
-            # For classification models, get class probabilities if available
-            if model.model_type == 'classification' and hasattr(pipeline, 'predict_proba'):
-                proba = pipeline.predict_proba(X_pred_processed)[0]
-                classes = pipeline.classes_
-                prediction_proba = {str(classes[i]): float(proba[i]) for i in range(len(classes))}
+            # Make example prediction (with class probabilities for classification models)
+            prediction, prediction_proba = predict_row(model_info, model.feature_columns, feature_values,
+                                                       with_probability=model.model_type == 'classification')
             
             example_prediction = True
             flash('Here is an example prediction using typical values from your dataset. Adjust the values to see how they affect the prediction.', 'info')
@@ -529,10 +466,47 @@ def predict(model_id):
                            prediction=prediction, 
                            probabilities=prediction_proba,
                            predictions=predictions,
+                           batch_row_count=batch_row_count,
                            is_single_prediction=is_single_prediction,
                            feature_descriptions=feature_descriptions,
                            example_prediction=example_prediction)
 
+def remember_prediction_result(model_id, result_id):
+    """
+    Point the session at the latest batch result for a model. Only the result
+    id is kept in the cookie; the rows stay on disk. The result it replaces
+    and any expired results are removed in the background.
+    """
+    results = dict(session.get('prediction_results', {}))
+    previous = result_path(results.get(str(model_id)))
+    results[str(model_id)] = result_id
+    session['prediction_results'] = results
+    
+    stale = expired_results(current_app.config['PREDICTION_RESULTS_MAX_AGE'])
+    if previous:
+        stale.append(previous)
+    file_cleanup.remove(stale)
+
+def download_predictions(model):
+    """
+    Stream the session's latest batch result for a model as a CSV download
+    """
+    path = result_path(session.get('prediction_results', {}).get(str(model.id)))
+    try:
+        size = os.path.getsize(path) if path else None
+        body = stream_result(path) if path else None
+    except OSError:
+        body = None
+    if body is None:
+        flash('No batch predictions to download. Upload a CSV file to generate them.', 'info')
+        return redirect(url_for('models.predict', model_id=model.id))
+    
+    filename = secure_filename(f'{model.name}_predictions.csv') or 'predictions.csv'
+    return Response(stream_with_context(body),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}',
+                             'Content-Length': str(size)})
+
 @models.route('/models/<int:model_id>/delete', methods=['POST'])
 @login_required
 def delete(model_id):
@@ -544,21 +518,16 @@ def delete(model_id):
         return redirect(url_for('models.list'))
     
     try:
-        # First delete any associated feedback records
-        Feedback.query.filter_by(model_id=model.id).delete()
-        
-        # Then delete any associated prediction records
-        Prediction.query.filter_by(model_id=model.id).delete()
+        # Write buffered predictions first so they are deleted with the model
+        prediction_log.flush()
         
-        # Delete the model file
-        import os
-        if os.path.exists(model.model_path):
-            os.remove(model.model_path)
-        
-        # Delete from database
-        db.session.delete(model)
+        # Delete the model with its feedback and predictions in one transaction
+        deleted_models = delete_models(Model.id == model.id)
         db.session.commit()
         
+        # The model file is removed in the background
+        discard_model_artifacts(deleted_models)
+        
         flash('Model deleted successfully', 'success')
     except Exception as e:
         flash(f'Error deleting model: {str(e)}', 'danger')
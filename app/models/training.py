@@ -0,0 +1,549 @@
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
+from sklearn.linear_model import LinearRegression, LogisticRegression, SGDRegressor, SGDClassifier
+from sklearn.metrics import (mean_squared_error, r2_score, accuracy_score, precision_score, recall_score, f1_score,
+                             confusion_matrix)
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
+
+from app.datasets.utils import read_dataset, infer_column_types
+from app.models.cpu_budget import cpu_budget
+from app.models.inference import prepare_features, linear_model_from_data, predict_linear
+from app.models.ml_utils import LinearStatistics, fit_statistics, holdout_mask
+from config import Config
+
+# Trees added between progress reports when fitting a random forest
+FOREST_BATCH_SIZE = 10
+
+# Passes over the new rows when updating a linear model with partial_fit
+RETRAIN_EPOCHS = 5
+
+# Share of rows held out for metrics by train_model, drawn with a fixed seed
+TEST_SIZE = 0.2
+
+# Share of rows held out for metrics by out-of-core training
+OUT_OF_CORE_TEST_SIZE = 0.2
+
+# Distinct values allowed per categorical feature (or class) in out-of-core training
+OUT_OF_CORE_MAX_CATEGORIES = 1000
+
+
+def _report(progress, percent, message):
+    if progress is not None:
+        progress(percent, message)
+
+
+@contextmanager
+def _training_cores(estimator, progress=None, percent=20):
+    """
+    Run a fit on the cores reserved from the host CPU budget (TRAINING_N_JOBS)
+    using TRAINING_JOBLIB_BACKEND, yielding the number of cores. While every
+    core is taken by other trainings the job reports that it is waiting.
+    """
+    parallel = 'n_jobs' in estimator.get_params()
+    on_wait = lambda: _report(progress, percent, 'Waiting for a free CPU core')
+    with cpu_budget.acquire(Config.TRAINING_N_JOBS if parallel else 1, on_wait=on_wait) as n_jobs, \
+            joblib.parallel_backend(Config.TRAINING_JOBLIB_BACKEND, n_jobs=n_jobs):
+        if parallel:
+            estimator.set_params(n_jobs=n_jobs)
+        yield n_jobs
+
+    # Saved models predict on a single core unless the caller asks otherwise
+    if parallel:
+        estimator.set_params(n_jobs=None)
+
+
+def _grow_forest(estimator, X, y, n_estimators, progress=None):
+    """
+    Grow a random forest to n_estimators trees in batches with warm_start so
+    progress can be reported while it trains. Trees the forest already has
+    are kept; for a new forest the result is identical to fitting all trees
+    at once. Cores are reserved again for every batch, so a long fit gives
+    some up to trainings started after it.
+    """
+    start = len(getattr(estimator, 'estimators_', []))
+    estimator.set_params(warm_start=True)
+    n_trees = start
+    while n_trees < n_estimators:
+        percent = 20 + int(65 * (n_trees - start) / (n_estimators - start))
+        with _training_cores(estimator, progress, percent) as n_jobs:
+            # Grow at least one tree per core in each batch
+            n_trees = min(n_trees + max(FOREST_BATCH_SIZE, n_jobs), n_estimators)
+            estimator.set_params(n_estimators=n_trees)
+            estimator.fit(X, y)
+        grown = n_trees - start
+        _report(progress, 20 + int(65 * grown / (n_estimators - start)),
+                f'Trained {grown} of {n_estimators - start} trees on {n_jobs} core(s)')
+    estimator.set_params(warm_start=False)
+
+
+def _fit_pipeline(estimator, X_train, y_train, progress=None):
+    """
+    Fit the scaler and estimator of a training pipeline. Estimators that
+    support n_jobs are fitted on the cores reserved from the CPU budget.
+    """
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+
+    if isinstance(estimator, (RandomForestRegressor, RandomForestClassifier)):
+        _grow_forest(estimator, X_train_scaled, y_train, estimator.n_estimators, progress)
+    else:
+        with _training_cores(estimator, progress) as n_jobs:
+            _report(progress, 20, f'Fitting model on {n_jobs} core(s)')
+            estimator.fit(X_train_scaled, y_train)
+
+    return Pipeline([
+        ('scaler', scaler),
+        ('model', estimator)
+    ])
+
+
+def _evaluate(pipeline, model_type, X_test, y_test):
+    return _metrics(model_type, y_test, pipeline.predict(X_test))
+
+
+def _metrics(model_type, y_test, y_pred):
+    if model_type == 'regression':
+        return {
+            'mse': mean_squared_error(y_test, y_pred),
+            'r2_score': r2_score(y_test, y_pred),
+            'mae': np.mean(np.abs(y_test - y_pred))
+        }
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred, average='weighted', zero_division=0),
+        'recall': recall_score(y_test, y_pred, average='weighted', zero_division=0),
+        'f1': f1_score(y_test, y_pred, average='weighted', zero_division=0)
+    }
+
+
+def _fit_linear(X_train, y_train, X_test=None, y_test=None, statistics=None):
+    """
+    Solve a linear regression from the XᵀX and Xᵀy statistics of the rows
+    (see ml_utils.LinearStatistics) instead of fitting a sklearn estimator,
+    so the model is stored as plain coefficients. Passing the statistics of
+    an earlier fit adds the rows to them, which refits the model exactly as
+    if it had been trained on all rows at once. The statistics of the test
+    rows are kept too, so the model can be evaluated on them after a refit.
+    Returns (linear_model, statistics, performance_metrics).
+    """
+    model_columns = X_train.columns.tolist()
+    if statistics is None:
+        statistics = {
+            'feature_columns': model_columns,
+            'train': LinearStatistics(len(model_columns)).to_dict(),
+            'test': LinearStatistics(len(model_columns)).to_dict()
+        }
+
+    train = LinearStatistics.from_dict(statistics['train'])
+    train.update(X_train.to_numpy(dtype='float64'), np.asarray(y_train, dtype='float64'))
+    test = LinearStatistics.from_dict(statistics['test'])
+    if X_test is not None:
+        test.update(X_test.to_numpy(dtype='float64'), np.asarray(y_test, dtype='float64'))
+    statistics = dict(statistics, train=train.to_dict(), test=test.to_dict())
+
+    model_data, performance_metrics = fit_statistics(statistics)
+    return linear_model_from_data(model_data, model_columns), statistics, performance_metrics
+
+
+def _feature_mapping(feature_columns, model_columns):
+    # Processed (one-hot) columns belonging to each raw feature
+    model_columns = pd.Index(model_columns)
+    return {col: model_columns[model_columns.str.startswith(f'{col}_')].tolist()
+            if len(model_columns[model_columns.str.startswith(f'{col}_')]) > 0
+            else [col] for col in feature_columns}
+
+
+def train_model(file_path, model_type, target_column, feature_columns, progress=None, column_types=None):
+    """
+    Train a regression or classification pipeline on the selected columns of
+    a dataset. column_types, the dtypes from the dataset profile, saves the
+    loader from inferring them. progress, if given, is called as
+    progress(percent, message). Returns (model_info, metrics, feature_importance).
+    """
+    _report(progress, 5, 'Loading dataset')
+
+    # Load only the selected columns
+    df = read_dataset(file_path, columns=feature_columns + [target_column], column_types=column_types)
+
+    # Prepare data
+    X = df[feature_columns]
+    y = df[target_column]
+
+    # Handle non-numeric data
+    X = pd.get_dummies(X)
+
+    # Split data
+    _report(progress, 15, 'Splitting data')
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=42)
+
+    # Create appropriate model based on model_type
+    if model_type == 'regression':
+        if len(feature_columns) > 1:
+            estimator = RandomForestRegressor(n_estimators=100, random_state=42)
+
+            # Train model
+            pipeline = _fit_pipeline(estimator, X_train, y_train, progress)
+
+            # Evaluate model
+            _report(progress, 90, 'Evaluating model')
+            metrics = _evaluate(pipeline, model_type, X_test, y_test)
+        else:
+            # Solved in closed form; the model is stored without a sklearn pipeline
+            estimator = None
+            pipeline = None
+            _report(progress, 20, 'Solving linear regression')
+            linear_model, statistics, _ = _fit_linear(X_train, y_train, X_test, y_test)
+            # The number of rows split, so read_holdout_rows can find the test rows again
+            statistics['holdout_rows'] = len(df)
+
+            # Evaluate model
+            y_pred, _ = predict_linear(linear_model, X_test.to_numpy(dtype='float64'))
+            metrics = _metrics(model_type, np.asarray(y_test), y_pred)
+            metrics['coefficients'] = linear_model['coefficients'][0].tolist()
+            metrics['intercept'] = float(linear_model['intercept'][0])
+
+        # Get target min/max for visualization from the frame already loaded
+        metrics['target_min'] = float(y.min())
+        metrics['target_max'] = float(y.max())
+
+    elif model_type == 'classification':
+        if len(feature_columns) > 1:
+            estimator = RandomForestClassifier(n_estimators=100, random_state=42)
+        else:
+            estimator = LogisticRegression(random_state=42)
+
+        # Train model
+        pipeline = _fit_pipeline(estimator, X_train, y_train, progress)
+
+        # Evaluate model
+        _report(progress, 90, 'Evaluating model')
+        metrics = _evaluate(pipeline, model_type, X_test, y_test)
+    else:
+        raise ValueError(f'Unsupported model type: {model_type}')
+
+    # Get feature importance if available
+    if hasattr(estimator, 'feature_importances_'):
+        feature_importance = estimator.feature_importances_.tolist()
+    else:
+        feature_importance = None
+
+    # Create a model info object to save
+    model_info = {
+        'feature_columns': X.columns.tolist(),  # Save the processed column names (after get_dummies)
+        'target_column': target_column,
+        'feature_mapping': _feature_mapping(feature_columns, X.columns),
+        'training_history': {
+            'train_loss': [0.5, 0.3, 0.2, 0.1],  # Example values
+            'val_loss': [0.6, 0.4, 0.3, 0.2]  # Example values
+        }
+    }
+    if pipeline is not None:
+        model_info['pipeline'] = pipeline
+    else:
+        model_info['linear_model'] = linear_model
+        model_info['statistics'] = statistics
+
+    return model_info, metrics, feature_importance
+
+
+def _to_sgd(estimator, trained_rows):
+    """
+    Convert a fitted LinearRegression or LogisticRegression into the
+    equivalent SGD estimator, which can be updated with partial_fit. The
+    coefficients are carried over unchanged; the step counter starts at the
+    number of rows already seen so updates are small, with the same decaying
+    learning rate for both.
+    """
+    if isinstance(estimator, LinearRegression):
+        sgd = SGDRegressor(random_state=42)
+        sgd.coef_ = np.ravel(estimator.coef_).astype('float64')
+        sgd.intercept_ = np.atleast_1d(estimator.intercept_).astype('float64')
+    else:
+        # Multinomial coefficients become one-vs-rest ones with the same argmax
+        sgd = SGDClassifier(loss='log_loss', learning_rate='invscaling', eta0=0.01, random_state=42)
+        sgd.coef_ = estimator.coef_.astype('float64')
+        sgd.intercept_ = estimator.intercept_.astype('float64')
+        sgd.classes_ = estimator.classes_
+    sgd.n_features_in_ = estimator.n_features_in_
+    sgd.t_ = float(trained_rows + 1)
+    return sgd
+
+
+def read_holdout_rows(file_path, model_info, feature_columns, target_column, column_types=None):
+    """
+    Load the rows a closed-form regression was tested on when train_model
+    trained it, or None if they aren't known. The test split is drawn from
+    the first rows of the dataset, which appending rows leaves unchanged.
+    """
+    n = model_info.get('statistics', {}).get('holdout_rows')
+    if n is None:
+        return None
+    df = read_dataset(file_path, columns=feature_columns + [target_column], column_types=column_types)
+    _, test_rows = train_test_split(np.arange(n), test_size=TEST_SIZE, random_state=42)
+    return df.iloc[test_rows]
+
+
+def retrain_model(model_info, df, model_type, target_column, feature_columns, trained_rows, progress=None,
+                  metrics=None, holdout=None):
+    """
+    Update a trained pipeline with new rows only, so the cost is proportional
+    to the rows added rather than to the whole dataset. df holds the new rows
+    and trained_rows is the number of rows the model has already seen.
+
+    Random forests get new trees grown on the new rows with warm_start, in
+    proportion to the share of the data they represent. Closed-form linear
+    regressions add the new rows to their XᵀX/Xᵀy statistics and are solved
+    again, which gives the same model as training on every row. Other
+    linear and logistic regressions are converted to SGD estimators and
+    updated with partial_fit. The scaler is kept as it is so the existing
+    trees and coefficients stay valid.
+
+    Every new row is trained on. The model's metrics (the dict passed as
+    metrics) are kept, since they were measured on a holdout of all the
+    original rows; closed-form regressions have their MSE and R² measured
+    again on that holdout from its statistics, and their MAE from the
+    holdout rows given by read_holdout_rows as holdout. Returns
+    (model_info, metrics, feature_importance).
+    """
+    if len(df) == 0:
+        raise ValueError('There are no new rows to retrain the model on.')
+
+    X = prepare_features(df, feature_columns, model_info['feature_columns'])
+    y = df[target_column]
+
+    metrics = dict(metrics or {})
+    if model_type == 'regression':
+        # The target range covers the old rows as well as the new ones
+        metrics['target_min'] = min(float(y.min()), metrics.get('target_min', float('inf')))
+        metrics['target_max'] = max(float(y.max()), metrics.get('target_max', float('-inf')))
+
+    if 'statistics' in model_info:
+        # Closed-form linear regressions are solved again from their statistics plus the new rows
+        _report(progress, 20, f'Solving linear regression with {len(X)} new rows')
+        linear_model, statistics, performance_metrics = _fit_linear(X, y, statistics=model_info['statistics'])
+        metrics['mse'] = performance_metrics['test_mse']
+        metrics['r2_score'] = performance_metrics['test_r2']
+        if holdout is not None:
+            X_test = prepare_features(holdout, feature_columns, model_info['feature_columns'])
+            y_pred, _ = predict_linear(linear_model, X_test.to_numpy(dtype='float64'))
+            metrics['mae'] = float(np.mean(np.abs(holdout[target_column].to_numpy(dtype='float64') - y_pred)))
+        else:
+            # An MAE measured with the old coefficients would be stale
+            metrics.pop('mae', None)
+        metrics['coefficients'] = linear_model['coefficients'][0].tolist()
+        metrics['intercept'] = float(linear_model['intercept'][0])
+        return dict(model_info, linear_model=linear_model, statistics=statistics), metrics, None
+
+    pipeline = model_info['pipeline']
+    X_scaled = pipeline.named_steps['scaler'].transform(X)
+    estimator = pipeline.named_steps['model']
+
+    if isinstance(estimator, (RandomForestRegressor, RandomForestClassifier)):
+        if isinstance(estimator, RandomForestClassifier) and not np.array_equal(np.unique(y), estimator.classes_):
+            raise ValueError('The new rows must contain every class the model was trained on '
+                             f'({", ".join(map(str, estimator.classes_))}); train a new model instead.')
+        n_estimators = estimator.n_estimators + max(1, round(estimator.n_estimators * len(df) / max(trained_rows, 1)))
+        _grow_forest(estimator, X_scaled, y, n_estimators, progress)
+    else:
+        if not isinstance(estimator, (SGDRegressor, SGDClassifier)):
+            estimator = _to_sgd(estimator, trained_rows)
+            pipeline.steps[-1] = ('model', estimator)
+
+        # Shuffle between passes since partial_fit visits rows in order
+        rng = np.random.default_rng(42)
+        for epoch in range(RETRAIN_EPOCHS):
+            order = rng.permutation(len(X_scaled))
+            estimator.partial_fit(X_scaled[order], np.asarray(y)[order])
+            _report(progress, 20 + int(65 * (epoch + 1) / RETRAIN_EPOCHS),
+                    f'Updated model with pass {epoch + 1} of {RETRAIN_EPOCHS} over {len(X)} new rows')
+
+    if hasattr(estimator, 'feature_importances_'):
+        feature_importance = estimator.feature_importances_.tolist()
+    else:
+        feature_importance = None
+
+    return dict(model_info, pipeline=pipeline), metrics, feature_importance
+
+
+def _scan_chunks(file_path, columns, column_types, chunksize):
+    # Yield (first row number, chunk) for every chunk of the selected columns
+    dtype = {name: column_types[name] for name in columns if name in column_types} if column_types else None
+    start = 0
+    for chunk in pd.read_csv(file_path, usecols=columns, dtype=dtype, chunksize=chunksize):
+        yield start, chunk
+        start += len(chunk)
+
+
+def _classification_metrics(matrix):
+    """
+    Accuracy and support-weighted precision, recall and F1 from a confusion
+    matrix, matching the values sklearn computes from the predictions
+    """
+    true_positives = np.diag(matrix).astype('float64')
+    support = matrix.sum(axis=1)
+    predicted = matrix.sum(axis=0)
+    precision = np.divide(true_positives, predicted, out=np.zeros_like(true_positives), where=predicted > 0)
+    recall = np.divide(true_positives, support, out=np.zeros_like(true_positives), where=support > 0)
+    denominator = precision + recall
+    f1 = np.divide(2 * precision * recall, denominator, out=np.zeros_like(true_positives), where=denominator > 0)
+    weights = support / support.sum()
+    return {
+        'accuracy': float(true_positives.sum() / matrix.sum()),
+        'precision': float((precision * weights).sum()),
+        'recall': float((recall * weights).sum()),
+        'f1': float((f1 * weights).sum())
+    }
+
+
+def train_model_out_of_core(file_path, model_type, target_column, feature_columns, progress=None,
+                            column_types=None, chunksize=None, epochs=None):
+    """
+    Train a linear model on a dataset without loading it into memory. The
+    selected columns are streamed in chunks of chunksize rows, so memory use
+    depends on the chunk size rather than on the size of the file.
+
+    The passes over the file are: one to infer the dtypes if column_types
+    doesn't give them, one to collect the categories and classes if there
+    are any, one to fit the scaler with StandardScaler.partial_fit, `epochs`
+    passes fitting an SGDRegressor or SGDClassifier with partial_fit, and one
+    to compute the metrics. A fixed 20% of the rows, chosen by row number, is
+    held out from training for the metrics.
+    Returns (model_info, metrics, feature_importance) like train_model.
+    """
+    chunksize = chunksize or Config.DATASET_CHUNK_SIZE
+    epochs = epochs or Config.TRAINING_OUT_OF_CORE_EPOCHS
+    columns = feature_columns + [target_column]
+    classification = model_type == 'classification'
+    if model_type not in ('regression', 'classification'):
+        raise ValueError(f'Unsupported model type: {model_type}')
+
+    known_types = column_types is not None and all(name in column_types for name in columns)
+    categorical = [name for name in feature_columns if known_types and column_types[name] == 'object']
+    passes = (0 if known_types else 1) + (1 if categorical or classification else 0) + 1 + epochs + 1
+    completed = 0
+
+    def next_pass(message):
+        nonlocal completed
+        _report(progress, 5 + int(85 * completed / passes), message)
+        completed += 1
+
+    # Every chunk is parsed with the dtypes of the whole file, so categorical
+    # columns are read as text throughout
+    if not known_types:
+        next_pass('Inferring column types')
+        column_types = infer_column_types(file_path, chunksize)
+        categorical = [name for name in feature_columns if column_types[name] == 'object']
+
+    # Categories of the categorical features and the classes of the target
+    categories = {name: set() for name in categorical}
+    classes = set()
+    if categorical or classification:
+        next_pass('Scanning dataset for categories')
+        for _, chunk in _scan_chunks(file_path, columns, column_types, chunksize):
+            for name in categorical:
+                categories[name].update(chunk[name].dropna().unique().tolist())
+            if classification:
+                classes.update(chunk[target_column].dropna().unique().tolist())
+            if (any(len(values) > OUT_OF_CORE_MAX_CATEGORIES for values in categories.values())
+                    or len(classes) > OUT_OF_CORE_MAX_CATEGORIES):
+                raise ValueError(f'Out-of-core training supports at most {OUT_OF_CORE_MAX_CATEGORIES} '
+                                 'distinct values per categorical column or class.')
+
+    # Processed columns in the order pd.get_dummies gives on the whole frame
+    model_columns = [name for name in feature_columns if name not in categories] + \
+        [f'{name}_{value}' for name in categorical for value in sorted(categories[name])]
+
+    # Fit the scaler on the training rows and find the target range
+    next_pass('Fitting scaler')
+    scaler = StandardScaler()
+    target_min, target_max = None, None
+    train_rows = 0
+    for start, chunk in _scan_chunks(file_path, columns, column_types, chunksize):
+        train = chunk[~holdout_mask(start, len(chunk), OUT_OF_CORE_TEST_SIZE)]
+        if len(train):
+            scaler.partial_fit(prepare_features(train, feature_columns, model_columns))
+            train_rows += len(train)
+        y = chunk[target_column]
+        if not classification and len(y):
+            target_min = float(y.min()) if target_min is None else min(target_min, float(y.min()))
+            target_max = float(y.max()) if target_max is None else max(target_max, float(y.max()))
+    if train_rows == 0:
+        raise ValueError('The dataset contains no rows to train on.')
+
+    if classification:
+        classes = np.array(sorted(classes))
+        estimator = SGDClassifier(loss='log_loss', learning_rate='adaptive', eta0=0.1, random_state=42)
+    else:
+        estimator = SGDRegressor(random_state=42)
+
+    # Shuffle each chunk since partial_fit visits rows in order
+    rng = np.random.default_rng(42)
+    with _training_cores(estimator, progress, 5 + int(85 * completed / passes)):
+        for epoch in range(epochs):
+            next_pass(f'Training pass {epoch + 1} of {epochs} over {train_rows} rows')
+            for start, chunk in _scan_chunks(file_path, columns, column_types, chunksize):
+                train = chunk[~holdout_mask(start, len(chunk), OUT_OF_CORE_TEST_SIZE)]
+                if not len(train):
+                    continue
+                order = rng.permutation(len(train))
+                X = scaler.transform(prepare_features(train, feature_columns, model_columns))[order]
+                y = train[target_column].to_numpy()[order]
+                if classification:
+                    estimator.partial_fit(X, y, classes=classes)
+                else:
+                    estimator.partial_fit(X, y)
+
+    pipeline = Pipeline([
+        ('scaler', scaler),
+        ('model', estimator)
+    ])
+
+    # Evaluate on the held-out rows, accumulating the metrics chunk by chunk
+    next_pass('Evaluating model')
+    matrix = np.zeros((len(classes), len(classes)), dtype='int64') if classification else None
+    count, squared_error, absolute_error, target_sum, target_squares = 0, 0.0, 0.0, 0.0, 0.0
+    for start, chunk in _scan_chunks(file_path, columns, column_types, chunksize):
+        test = chunk[holdout_mask(start, len(chunk), OUT_OF_CORE_TEST_SIZE)]
+        if not len(test):
+            continue
+        y_pred = pipeline.predict(prepare_features(test, feature_columns, model_columns))
+        y_test = test[target_column].to_numpy()
+        if classification:
+            matrix += confusion_matrix(y_test, y_pred, labels=classes)
+        else:
+            count += len(y_test)
+            squared_error += float(((y_test - y_pred) ** 2).sum())
+            absolute_error += float(np.abs(y_test - y_pred).sum())
+            target_sum += float(y_test.sum())
+            target_squares += float((y_test ** 2).sum())
+
+    if classification:
+        if matrix.sum() == 0:
+            raise ValueError('The dataset has too few rows to hold some out for evaluation.')
+        metrics = _classification_metrics(matrix)
+    else:
+        if count == 0:
+            raise ValueError('The dataset has too few rows to hold some out for evaluation.')
+        total_squares = target_squares - target_sum ** 2 / count
+        metrics = {
+            'mse': squared_error / count,
+            'r2_score': 1 - squared_error / total_squares if total_squares > 0 else 0.0,
+            'mae': absolute_error / count,
+            'target_min': target_min,
+            'target_max': target_max
+        }
+
+    model_info = {
+        'pipeline': pipeline,
+        'feature_columns': model_columns,
+        'target_column': target_column,
+        'feature_mapping': _feature_mapping(feature_columns, model_columns)
+    }
+
+    return model_info, metrics, None
@@ -14,7 +14,7 @@ class User(UserMixin, db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Student-Teacher relationship
-    teacher_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    teacher_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
     students = db.relationship('User', 
                                backref=db.backref('teacher', remote_side=[id]),
                                lazy='dynamic')
@@ -0,0 +1,142 @@
+"""
+Seed a throwaway SQLite database and compare query plans and timings of the
+hottest lookups with and without the foreign key indexes.
+
+Usage: python benchmark_indexes.py [--students N] [--models-per-student N] [--predictions-per-model N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from app import create_app, db
+
+# Indexes added by migration f84b0d2e5c63
+INDEXES = [
+    'ix_users_teacher_id',
+    'ix_datasets_user_id_created_at',
+    'ix_models_user_id_created_at',
+    'ix_models_dataset_id_target_column',
+    'ix_predictions_model_id_created_at',
+    'ix_feedbacks_model_id_created_at',
+    'ix_training_jobs_dataset_id',
+    'ix_training_jobs_model_id',
+]
+
+# Queries issued by the dashboard, models.list, view_feedback and the delete routes
+QUERIES = [
+    ('students of a teacher', 'SELECT id FROM users WHERE teacher_id = :teacher_id'),
+    ('datasets of a student', 'SELECT * FROM datasets WHERE user_id = :user_id ORDER BY created_at DESC'),
+    ('models.list', 'SELECT * FROM models WHERE user_id = :user_id ORDER BY created_at DESC'),
+    ('models of a dataset', 'SELECT * FROM models WHERE dataset_id = :dataset_id'),
+    ('models per dataset (dashboard)',
+     'SELECT dataset_id, count(*) FROM models WHERE dataset_id IN (:dataset_id) GROUP BY dataset_id'),
+    ('prediction history', 'SELECT * FROM predictions WHERE model_id = :model_id ORDER BY created_at DESC LIMIT 50'),
+    ('view_feedback', 'SELECT * FROM feedbacks WHERE model_id = :model_id ORDER BY created_at DESC'),
+    ('delete predictions of a model', 'SELECT count(*) FROM predictions WHERE model_id = :model_id'),
+]
+
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = None
+    TRAINING_WORKERS = 0
+
+
+def seed(teachers, students, models_per_student, predictions_per_model):
+    now = datetime.utcnow()
+    users = [{'id': t + 1, 'username': f'teacher{t}', 'email': f'teacher{t}@example.com',
+              'password_hash': 'x', 'role': 'teacher', 'teacher_id': None} for t in range(teachers)]
+    users += [{'id': teachers + s + 1, 'username': f'student{s}', 'email': f'student{s}@example.com',
+               'password_hash': 'x', 'role': 'student', 'teacher_id': s % teachers + 1} for s in range(students)]
+    datasets, models, predictions, feedbacks = [], [], [], []
+    for s in range(students):
+        user_id = teachers + s + 1
+        dataset_id = s + 1
+        datasets.append({'id': dataset_id, 'name': f'dataset{s}', 'file_path': f'/tmp/{s}.csv',
+                         'user_id': user_id, 'created_at': now - timedelta(minutes=s)})
+        for m in range(models_per_student):
+            model_id = len(models) + 1
+            created_at = now - timedelta(minutes=model_id)
+            models.append({'id': model_id, 'name': f'model{model_id}', 'model_type': 'regression',
+                           'model_path': f'/tmp/{model_id}.pkl', 'target_column': 'y',
+                           'feature_columns': ['x'], 'metrics': {'r2_score': 0.5},
+                           'dataset_id': dataset_id, 'user_id': user_id,
+                           'created_at': created_at, 'updated_at': created_at})
+            feedbacks.append({'comment': 'Nice', 'rating': 5, 'model_id': model_id,
+                              'user_id': s % teachers + 1, 'created_at': created_at})
+            for p in range(predictions_per_model):
+                predictions.append({'model_id': model_id, 'input_data': {'x': p}, 'output_data': {'prediction': p},
+                                    'created_at': created_at + timedelta(seconds=p)})
+
+    tables = db.metadata.tables
+    with db.engine.begin() as connection:
+        for table, rows in [('users', users), ('datasets', datasets), ('models', models),
+                            ('feedbacks', feedbacks), ('predictions', predictions)]:
+            connection.execute(tables[table].insert(), rows)
+    return {'teacher_id': 1, 'user_id': teachers + 1, 'dataset_id': 1, 'model_id': len(models) // 2}
+
+
+def run_queries(params, repeat):
+    results = []
+    with db.engine.connect() as connection:
+        for label, sql in QUERIES:
+            plan = connection.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'), params).fetchall()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                connection.execute(db.text(sql), params).fetchall()
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            results.append((label, ' / '.join(row[-1] for row in plan), elapsed))
+    return results
+
+
+def print_results(title, results):
+    print(f'\n## {title}\n')
+    print('| Query | Plan | Time (ms) |')
+    print('|---|---|---|')
+    for label, plan, elapsed in results:
+        print(f'| {label} | `{plan}` | {elapsed:.3f} |')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--teachers', type=int, default=20)
+    parser.add_argument('--students', type=int, default=3000)
+    parser.add_argument('--models-per-student', type=int, default=10)
+    parser.add_argument('--predictions-per-model', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    BenchmarkConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+    app = create_app(BenchmarkConfig)
+    try:
+        with app.app_context():
+            db.create_all()
+            params = seed(args.teachers, args.students, args.models_per_student, args.predictions_per_model)
+            with db.engine.begin() as connection:
+                connection.execute(db.text('ANALYZE'))
+            print(f'Seeded {args.students} students, {args.students * args.models_per_student} models, '
+                  f'{args.students * args.models_per_student * args.predictions_per_model} predictions')
+
+            with db.engine.begin() as connection:
+                for name in INDEXES:
+                    connection.execute(db.text(f'DROP INDEX {name}'))
+                connection.execute(db.text('ANALYZE'))
+            print_results('Before (no foreign key indexes)', run_queries(params, args.repeat))
+
+            with db.engine.begin() as connection:
+                for table in db.metadata.sorted_tables:
+                    for index in table.indexes:
+                        if index.name in INDEXES:
+                            index.create(connection)
+                connection.execute(db.text('ANALYZE'))
+            print_results('After (migration f84b0d2e5c63 applied)', run_queries(params, args.repeat))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
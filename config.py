@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -13,4 +14,71 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
-    ALLOWED_EXTENSIONS = {'csv'} 
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'csv'}
+    
+    # Limits enforced while uploaded datasets are streamed to disk and ingested
+    DATASET_MAX_BYTES = int(os.environ.get('DATASET_MAX_BYTES') or 10 * 1024 * 1024)
+    DATASET_MAX_ROWS = int(os.environ.get('DATASET_MAX_ROWS') or 0)  # 0 means no row limit
+    DATASET_CHUNK_SIZE = int(os.environ.get('DATASET_CHUNK_SIZE') or 100000)
+    
+    # Memory budget for parsed datasets kept in the per-process dataset cache
+    DATASET_CACHE_MAX_BYTES = int(os.environ.get('DATASET_CACHE_MAX_BYTES') or 512 * 1024 * 1024) 
+    
+    # Memory budget for deserialized models kept in the per-process model registry
+    MODEL_CACHE_MAX_BYTES = int(os.environ.get('MODEL_CACHE_MAX_BYTES') or 1024 * 1024 * 1024)
+    
+    # Rows scored per vectorized batch when predicting from an uploaded CSV
+    PREDICTION_CHUNK_SIZE = int(os.environ.get('PREDICTION_CHUNK_SIZE') or 50000)
+    
+    # Batch prediction results are written here and streamed back on download;
+    # results older than PREDICTION_RESULTS_MAX_AGE seconds are removed (0 keeps them)
+    PREDICTION_RESULTS_DIR = os.environ.get('PREDICTION_RESULTS_DIR') or os.path.join(basedir, 'instance', 'prediction_results')
+    PREDICTION_RESULTS_MAX_AGE = int(os.environ.get('PREDICTION_RESULTS_MAX_AGE') or 24 * 60 * 60)
+    PREDICTION_RESULTS_PREVIEW_ROWS = int(os.environ.get('PREDICTION_RESULTS_PREVIEW_ROWS') or 100)
+    
+    # Worker processes used to train models in the background (0 trains inside the request).
+    # Every web server process starts its own pool, so keep this small.
+    TRAINING_WORKERS = int(os.environ.get('TRAINING_WORKERS') or 2)
+    
+    # Dataset cache of each training worker; workers read each dataset once per job,
+    # so by default they don't keep datasets in memory between jobs
+    TRAINING_WORKER_DATASET_CACHE_MAX_BYTES = int(os.environ.get('TRAINING_WORKER_DATASET_CACHE_MAX_BYTES') or 0)
+    
+    # Cores a single training may use (-1 for its fair share of the free cores, 0 or 1 for one core)
+    # and the joblib backend it runs on
+    TRAINING_N_JOBS = int(os.environ.get('TRAINING_N_JOBS', '').strip() or -1)
+    TRAINING_JOBLIB_BACKEND = os.environ.get('TRAINING_JOBLIB_BACKEND') or 'threading'
+    
+    # Cores shared by all trainings on this host, tracked with lock files in TRAINING_CPU_LOCK_DIR
+    TRAINING_CPU_BUDGET = int(os.environ.get('TRAINING_CPU_BUDGET') or os.cpu_count() or 1)
+    TRAINING_CPU_LOCK_DIR = os.environ.get('TRAINING_CPU_LOCK_DIR') or \
+        os.path.join(tempfile.gettempdir(), 'ai_experiment_platform_cpu')
+    
+    # Passes over the data made by out-of-core training, which reads DATASET_CHUNK_SIZE rows at a time
+    TRAINING_OUT_OF_CORE_EPOCHS = int(os.environ.get('TRAINING_OUT_OF_CORE_EPOCHS') or 3)
+    
+    # Largest number of rows accepted by the batch prediction API in one request
+    API_MAX_BATCH_ROWS = int(os.environ.get('API_MAX_BATCH_ROWS') or 100000)
+    
+    # Predictions are logged in the background and inserted in batches of this size,
+    # at least every PREDICTION_LOG_FLUSH_INTERVAL seconds
+    PREDICTION_LOG_BATCH_SIZE = int(os.environ.get('PREDICTION_LOG_BATCH_SIZE') or 500)
+    PREDICTION_LOG_FLUSH_INTERVAL = float(os.environ.get('PREDICTION_LOG_FLUSH_INTERVAL') or 2.0)
+    PREDICTION_LOG_MAX_BUFFER = int(os.environ.get('PREDICTION_LOG_MAX_BUFFER') or 100000)
+    
+    # Most models shown on the leaderboard page and returned by the leaderboard API
+    LEADERBOARD_LIMIT = int(os.environ.get('LEADERBOARD_LIMIT') or 100)
+    
+    # Trained models are stored as content-addressed joblib artifacts. With
+    # MODEL_ARTIFACT_COMPRESS=0, MODEL_ARTIFACT_MMAP=1 memory-maps the plain numpy
+    # arrays of a model (coefficients, scalers) instead of copying them; random
+    # forests copy their tree arrays on load either way, so to share those between
+    # workers preload them with MODEL_WARMUP_COUNT.
+    MODEL_ARTIFACT_DIR = os.environ.get('MODEL_ARTIFACT_DIR') or os.path.join(basedir, 'app', 'static', 'models')
+    MODEL_ARTIFACT_COMPRESS = int(os.environ.get('MODEL_ARTIFACT_COMPRESS') or 3)
+    MODEL_ARTIFACT_MMAP = os.environ.get('MODEL_ARTIFACT_MMAP', '0').lower() in ('1', 'true', 'yes')
+    MODEL_ARTIFACT_VERIFY = os.environ.get('MODEL_ARTIFACT_VERIFY', '1').lower() in ('1', 'true', 'yes')
+    
+    # Number of most-used models the wsgi.py entrypoint loads into the model registry.
+    # Run `gunicorn --preload wsgi:app` so forked workers share them copy-on-write.
+    MODEL_WARMUP_COUNT = int(os.environ.get('MODEL_WARMUP_COUNT') or 0)
@@ -0,0 +1,27 @@
+"""add dataset file mtime
+
+Revision ID: a95c1e3f6d74
+Revises: f84b0d2e5c63
+Create Date: 2026-10-18 16:34:12.906441
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a95c1e3f6d74'
+down_revision = 'f84b0d2e5c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows are filled in with `flask datasets backfill-stats`
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_mtime', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.drop_column('file_mtime')
@@ -0,0 +1,55 @@
+"""add dataset versions
+
+Revision ID: b06d2f4a7e85
+Revises: a95c1e3f6d74
+Create Date: 2026-10-18 18:21:44.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b06d2f4a7e85'
+down_revision = 'a95c1e3f6d74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dataset_versions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dataset_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('byte_offset', sa.BigInteger(), nullable=False),
+    sa.Column('row_offset', sa.Integer(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dataset_id', 'version', name='uq_dataset_versions_dataset_id_version')
+    )
+
+    # Every existing dataset is still its original upload
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+    with op.batch_alter_table('models', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('dataset_version', sa.Integer(), nullable=True))
+    op.execute('UPDATE models SET dataset_version = 1')
+
+    with op.batch_alter_table('training_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kind', sa.String(length=20), nullable=False, server_default='train'))
+
+
+def downgrade():
+    with op.batch_alter_table('training_jobs', schema=None) as batch_op:
+        batch_op.drop_column('kind')
+
+    with op.batch_alter_table('models', schema=None) as batch_op:
+        batch_op.drop_column('dataset_version')
+
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    op.drop_table('dataset_versions')
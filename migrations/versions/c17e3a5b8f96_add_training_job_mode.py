@@ -0,0 +1,26 @@
+"""add training job mode
+
+Revision ID: c17e3a5b8f96
+Revises: b06d2f4a7e85
+Create Date: 2026-10-18 19:02:37.184520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c17e3a5b8f96'
+down_revision = 'b06d2f4a7e85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('training_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('training_mode', sa.String(length=20), nullable=False, server_default='in_memory'))
+
+
+def downgrade():
+    with op.batch_alter_table('training_jobs', schema=None) as batch_op:
+        batch_op.drop_column('training_mode')
@@ -0,0 +1,29 @@
+"""add dataset row count and file size
+
+Revision ID: c41d7e9a2f35
+Revises: 8b2e4d61c0a7
+Create Date: 2026-10-18 13:05:27.114902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e9a2f35'
+down_revision = '8b2e4d61c0a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows are filled in with `flask datasets backfill-stats`
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('row_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('file_size', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('datasets', schema=None) as batch_op:
+        batch_op.drop_column('file_size')
+        batch_op.drop_column('row_count')
@@ -0,0 +1,50 @@
+"""store model and prediction json natively
+
+Revision ID: d52e8f3b6a41
+Revises: c41d7e9a2f35
+Create Date: 2026-10-18 14:21:09.337260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd52e8f3b6a41'
+down_revision = 'c41d7e9a2f35'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = {
+    'models': [('feature_columns', False), ('metrics', True), ('feature_importance', True)],
+    'predictions': [('input_data', False), ('output_data', False)],
+    'training_jobs': [('feature_columns', False)],
+}
+
+
+def _json_type():
+    if op.get_bind().dialect.name == 'postgresql':
+        return postgresql.JSONB()
+    return sa.JSON()
+
+
+def upgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for table, columns in JSON_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, nullable in columns:
+                # Existing values are JSON text already, so PostgreSQL can cast them in place
+                extra = {'postgresql_using': f'{column}::jsonb'} if postgres else {}
+                batch_op.alter_column(column, existing_type=sa.Text(), type_=_json_type(),
+                                      existing_nullable=nullable, **extra)
+
+
+def downgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for table, columns in JSON_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column, nullable in columns:
+                extra = {'postgresql_using': f'{column}::text'} if postgres else {}
+                batch_op.alter_column(column, existing_type=_json_type(), type_=sa.Text(),
+                                      existing_nullable=nullable, **extra)
@@ -0,0 +1,49 @@
+"""add model metrics
+
+Revision ID: e73a9c1d4b52
+Revises: d52e8f3b6a41
+Create Date: 2026-10-18 15:02:44.870315
+
+"""
+import json
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e73a9c1d4b52'
+down_revision = 'd52e8f3b6a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    model_metrics = op.create_table('model_metrics',
+        sa.Column('model_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['model_id'], ['models.id'], ),
+        sa.PrimaryKeyConstraint('model_id', 'name')
+    )
+    with op.batch_alter_table('model_metrics', schema=None) as batch_op:
+        batch_op.create_index('ix_model_metrics_name_value', ['name', 'value'], unique=False)
+
+    # Copy the numeric metrics of existing models
+    rows = []
+    for model_id, metrics in op.get_bind().execute(sa.text('SELECT id, metrics FROM models')):
+        if isinstance(metrics, str):
+            metrics = json.loads(metrics)
+        for name, value in (metrics or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+                rows.append({'model_id': model_id, 'name': name, 'value': float(value)})
+    if rows:
+        op.bulk_insert(model_metrics, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('model_metrics', schema=None) as batch_op:
+        batch_op.drop_index('ix_model_metrics_name_value')
+
+    op.drop_table('model_metrics')
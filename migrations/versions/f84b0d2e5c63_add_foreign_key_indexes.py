@@ -0,0 +1,36 @@
+"""add foreign key indexes
+
+Revision ID: f84b0d2e5c63
+Revises: e73a9c1d4b52
+Create Date: 2026-10-18 15:48:30.552918
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f84b0d2e5c63'
+down_revision = 'e73a9c1d4b52'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('users', 'ix_users_teacher_id', ['teacher_id']),
+    ('datasets', 'ix_datasets_user_id_created_at', ['user_id', 'created_at']),
+    ('models', 'ix_models_user_id_created_at', ['user_id', 'created_at']),
+    ('models', 'ix_models_dataset_id_target_column', ['dataset_id', 'target_column']),
+    ('predictions', 'ix_predictions_model_id_created_at', ['model_id', 'created_at']),
+    ('feedbacks', 'ix_feedbacks_model_id_created_at', ['model_id', 'created_at']),
+    ('training_jobs', 'ix_training_jobs_dataset_id', ['dataset_id']),
+    ('training_jobs', 'ix_training_jobs_model_id', ['model_id']),
+]
+
+
+def upgrade():
+    for table, name, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,65 @@
+import pytest
+
+from config import Config
+from app import create_app, db
+from app.datasets.utils import dataset_cache
+from app.models.registry import model_registry
+from app.models.user import User
+from tests.helpers import csv_file, house_prices, login
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Files the app writes go to the test's own directory
+    for name in ['UPLOAD_FOLDER', 'MODEL_ARTIFACT_DIR', 'PREDICTION_RESULTS_DIR']:
+        monkeypatch.setattr(Config, name, str(tmp_path / name.lower()))
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+        WTF_CSRF_ENABLED = False
+        TESTING = True
+        TRAINING_WORKERS = 0
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    dataset_cache.clear()
+    model_registry.clear()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def users(app):
+    """A teacher and one of their students, returned as (teacher_id, student_id)"""
+    with app.app_context():
+        teacher = User('teacher', 'teacher@example.com', role='teacher')
+        teacher.set_password('password')
+        db.session.add(teacher)
+        db.session.commit()
+        student = User('student', 'student@example.com', role='student', teacher_id=teacher.id)
+        student.set_password('password')
+        db.session.add(student)
+        db.session.commit()
+        return teacher.id, student.id
+
+
+@pytest.fixture
+def dataset(app, client, users):
+    """A dataset uploaded by the student, who stays logged in; returns its id"""
+    from app.datasets.models import Dataset
+
+    login(client, 'student')
+    client.post('/datasets/upload', data={'name': 'houses', 'description': '', 'file': csv_file(house_prices())},
+                content_type='multipart/form-data')
+    with app.app_context():
+        return Dataset.query.filter_by(name='houses').one().id
@@ -0,0 +1,37 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+
+def login(client, username):
+    client.post('/auth/login', data={'username': username, 'password': 'password'})
+
+
+def house_prices(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'size': rng.normal(100, 30, n).round(2),
+        'rooms': rng.integers(1, 6, n),
+        'city': rng.choice(['north', 'south', 'east'], n),
+    })
+    df['price'] = (3 * df['size'] + 10 * df['rooms'] + (df['city'] == 'north') * 50
+                   + rng.normal(0, 5, n)).round(2)
+    return df
+
+
+def csv_file(df, filename='houses.csv'):
+    return io.BytesIO(df.to_csv(index=False).encode()), filename
+
+
+def train(app, client, dataset_id, feature_columns, model_type='regression', target_column='price', name='model',
+          **fields):
+    """Train a model through the train form (synchronously, TRAINING_WORKERS is 0); returns its id"""
+    from app.models.models import Model
+
+    client.post('/models/train', data=dict({
+        'name': name, 'description': '', 'dataset_id': dataset_id, 'model_type': model_type,
+        'target_column': target_column, 'feature_columns': feature_columns
+    }, **fields))
+    with app.app_context():
+        return Model.query.filter_by(name=name).one().id
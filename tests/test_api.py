@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import db
+from app.models.inference import prepare_features, predict_frame
+from app.models.models import Model, Prediction
+from app.models.prediction_log import prediction_log
+from app.models.registry import model_registry
+from app.models.user import User
+from tests.helpers import house_prices, login, train
+
+ROWS = [[80.0, 2, 'north'], [120.5, 4, 'east'], [95.0, 1, 'south']]
+FEATURES = ['size', 'rooms', 'city']
+
+
+@pytest.fixture
+def model_id(app, client, dataset):
+    return train(app, client, dataset, FEATURES)
+
+
+def _batch(client, model_id, payload):
+    return client.post(f'/api/models/{model_id}/predict/batch', json=payload)
+
+
+def test_batch_payload_shapes_agree(app, client, model_id):
+    by_rows = _batch(client, model_id, {'rows': ROWS}).get_json()
+    by_dicts = _batch(client, model_id, {'rows': [
+        # Keys in any order
+        {'city': city, 'size': size, 'rooms': rooms} for size, rooms, city in ROWS
+    ]}).get_json()
+    by_columns = _batch(client, model_id, {'columns': {
+        name: [row[i] for row in ROWS] for i, name in enumerate(FEATURES)
+    }}).get_json()
+
+    assert by_rows['success'] and by_rows['count'] == 3
+    assert by_rows == by_dicts == by_columns
+
+    # Same values as scoring the frame directly
+    with app.app_context():
+        model = Model.query.get(model_id)
+        model_info = model_registry.get(model)
+        X = prepare_features(pd.DataFrame(ROWS, columns=FEATURES), FEATURES, model_info['feature_columns'])
+        expected, _ = predict_frame(model_info, X)
+    np.testing.assert_allclose(by_rows['predictions'], expected)
+
+    # Each batch is logged row by row
+    prediction_log.flush()
+    with app.app_context():
+        assert Prediction.query.filter_by(model_id=model_id).count() == 9
+
+
+def test_classification_batches_return_probabilities(app, client, dataset):
+    model_id = train(app, client, dataset, ['size', 'rooms'], model_type='classification', target_column='city',
+                     name='classifier')
+    result = _batch(client, model_id, {'columns': {'size': [80.0, 140.0], 'rooms': [2, 5]}}).get_json()
+    assert result['count'] == 2
+    assert set(result['predictions']) <= {'north', 'south', 'east'}
+    assert len(result['probabilities']) == 2
+
+
+@pytest.mark.parametrize('payload, error', [
+    ({'columns': {'size': 80.0, 'rooms': [2], 'city': ['north']}}, 'Values must be given as a list for columns: size'),
+    ({'columns': {'size': [80.0], 'rooms': [2]}}, 'Missing feature columns: city'),
+    ({'columns': {'size': [80.0, 90.0], 'rooms': [2], 'city': ['north']}}, 'same number of values'),
+    ({'columns': [[80.0, 2, 'north']]}, 'columns must map each feature'),
+    ({'rows': {'size': 80.0}}, 'rows must be a list'),
+    ({'rows': [[80.0, 2]]}, 'Row 0 must be a list of 3 feature values'),
+    ({'rows': [{'size': 80.0, 'rooms': 2}]}, 'Missing feature columns: city'),
+    ({'feature_values': [80.0, 2, 'north']}, 'either rows or columns'),
+    ([[80.0, 2, 'north']], 'must be a JSON object'),
+])
+def test_malformed_batches_are_rejected(client, model_id, payload, error):
+    response = _batch(client, model_id, payload)
+    assert response.status_code == 400
+    assert error in response.get_json()['error']
+
+
+def test_batch_size_is_limited(app, client, model_id, monkeypatch):
+    monkeypatch.setitem(app.config, 'API_MAX_BATCH_ROWS', 2)
+    response = _batch(client, model_id, {'rows': ROWS})
+    assert response.status_code == 413
+    assert _batch(client, model_id, {'rows': ROWS[:2]}).get_json()['count'] == 2
+    assert _batch(client, model_id, {'rows': []}).get_json() == {'success': True, 'count': 0, 'predictions': []}
+
+
+def test_batches_need_access_to_the_model(app, client, model_id):
+    client.get('/auth/logout')
+    with app.app_context():
+        other = User('other', 'other@example.com', role='student')
+        other.set_password('password')
+        db.session.add(other)
+        db.session.commit()
+    login(client, 'other')
+    assert _batch(client, model_id, {'rows': ROWS}).status_code == 403
+
+    # The owner's teacher may use it
+    client.get('/auth/logout')
+    login(client, 'teacher')
+    assert _batch(client, model_id, {'rows': house_prices(n=2)[FEATURES].values.tolist()}).status_code == 200
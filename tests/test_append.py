@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+
+from app.datasets.models import Dataset, DatasetVersion
+from app.datasets.profile import profile_dataset
+from app.datasets.utils import dataset_lock, read_dataset_rows
+from app.models.models import Model, TrainingJob
+from tests.helpers import csv_file, house_prices, train
+
+
+def _append(client, dataset_id, df):
+    return client.post(f'/datasets/append/{dataset_id}', data={'file': csv_file(df, 'more.csv')},
+                       content_type='multipart/form-data', follow_redirects=True)
+
+
+def test_append_records_a_version_locating_the_new_rows(app, client, dataset):
+    new_rows = house_prices(n=50, seed=1)
+    # Columns may come in any order
+    response = _append(client, dataset, new_rows[['price', 'city', 'rooms', 'size']])
+    assert b'Appended 50 rows' in response.data
+
+    with app.app_context():
+        ds = Dataset.query.get(dataset)
+        assert ds.version == 2
+        assert ds.num_rows == 250
+        version = DatasetVersion.query.filter_by(dataset_id=dataset).one()
+        assert (version.version, version.row_offset, version.row_count) == (2, 200, 50)
+        assert ds.rows_since(1) == (version.byte_offset, 200)
+        assert ds.rows_since(2) is None
+
+        appended = read_dataset_rows(ds.file_path, version.byte_offset, json.loads(ds.columns))
+        pd.testing.assert_frame_equal(appended, new_rows)
+
+        # The profile was extended with the new rows only, and matches profiling the whole file
+        expected = profile_dataset(ds.file_path)
+        assert ds.profile['row_count'] == expected['row_count']
+        assert ds.profile['columns']['size']['mean'] == pytest.approx(expected['columns']['size']['mean'])
+        assert ds.profile['columns']['city']['distinct'] == expected['columns']['city']['distinct']
+
+
+def test_append_rejects_mismatched_columns(app, client, dataset):
+    with app.app_context():
+        path = Dataset.query.get(dataset).file_path
+    before = open(path, 'rb').read()
+
+    response = _append(client, dataset, pd.DataFrame({'size': [1.0], 'colour': ['red']}))
+    assert b'Could not append the CSV file' in response.data
+    response = _append(client, dataset, pd.DataFrame({'size': ['big'], 'rooms': [1], 'city': ['north'],
+                                                      'price': [1.0]}))
+    assert b'Could not append the CSV file' in response.data
+
+    assert open(path, 'rb').read() == before
+    with app.app_context():
+        assert Dataset.query.get(dataset).version == 1
+
+
+def test_readers_wait_for_an_append(app, dataset):
+    with app.app_context():
+        ds = Dataset.query.get(dataset)
+        path, names = ds.file_path, json.loads(ds.columns)
+
+    done = threading.Event()
+    reader = threading.Thread(target=lambda: (read_dataset_rows(path, 0, names), done.set()))
+    with dataset_lock(path):
+        reader.start()
+        time.sleep(0.2)
+        assert not done.is_set()
+    reader.join(5)
+    assert done.is_set()
+
+
+def test_retrain_fits_on_every_new_row(app, client, dataset):
+    original = house_prices()
+    linear_id = train(app, client, dataset, ['size'], name='linear')
+    forest_id = train(app, client, dataset, ['size', 'rooms', 'city'], name='forest')
+    with app.app_context():
+        metrics = Model.query.get(linear_id).metrics
+
+    new_rows = house_prices(n=100, seed=2)
+    _append(client, dataset, new_rows)
+
+    for model_id in (linear_id, forest_id):
+        client.post(f'/models/{model_id}/retrain')
+        with app.app_context():
+            job = TrainingJob.query.order_by(TrainingJob.id.desc()).first()
+            assert job.status == 'completed', job.message
+            assert job.message == 'Model updated with 100 new rows.'
+            model = Model.query.get(model_id)
+            assert model.dataset_version == 2
+            assert not model.has_new_rows
+
+    # The closed-form model equals one fitted on the original training split plus every new row
+    train_rows, _ = train_test_split(np.arange(len(original)), test_size=0.2, random_state=42)
+    X = np.concatenate([original['size'].to_numpy()[train_rows], new_rows['size'].to_numpy()])
+    y = np.concatenate([original['price'].to_numpy()[train_rows], new_rows['price'].to_numpy()])
+    reference = LinearRegression().fit(X.reshape(-1, 1), y)
+    with app.app_context():
+        retrained = Model.query.get(linear_id).metrics
+    np.testing.assert_allclose(retrained['coefficients'], reference.coef_, rtol=1e-8)
+    assert retrained['intercept'] == pytest.approx(reference.intercept_, rel=1e-8)
+    assert retrained['target_max'] == max(metrics['target_max'], new_rows['price'].max())
+
+    # An up-to-date model is not retrained
+    with app.app_context():
+        jobs = TrainingJob.query.count()
+    response = client.post(f'/models/{linear_id}/retrain', follow_redirects=True)
+    assert b'No rows have been added' in response.data
+    with app.app_context():
+        assert TrainingJob.query.count() == jobs
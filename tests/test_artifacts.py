@@ -0,0 +1,106 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.artifacts import (artifact_memory_size, file_checksum, load_artifact, load_manifest,
+                                  manifest_path, model_memory_size, save_artifact)
+from app.models.inference import predict_frame, prepare_features
+from app.models.registry import ModelRegistry
+from app.models.training import train_model
+
+
+@pytest.fixture
+def data(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'a': rng.normal(size=300), 'b': rng.normal(size=300)})
+    df['label'] = np.where(df['a'] + df['b'] > 0, 'yes', 'no')
+    df['target'] = 2 * df['a'] - df['b'] + rng.normal(0, 0.1, 300)
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+    return str(path), df
+
+
+@pytest.fixture
+def model_info(data):
+    # A single feature trains a logistic regression, stored compiled to flat arrays
+    model_info, _, _ = train_model(data[0], 'classification', 'label', ['a'])
+    return model_info
+
+
+def _predict(model_info, df):
+    X = prepare_features(df[['a']], ['a'], model_info['feature_columns'])
+    return predict_frame(model_info, X, with_probability=True)
+
+
+def test_round_trip_with_manifest(tmp_path, data, model_info):
+    directory = tmp_path / 'artifacts'
+    path = save_artifact(model_info, directory=str(directory))
+
+    assert os.path.basename(path) == f'model_{file_checksum(path)}.joblib'
+    manifest = load_manifest(path)
+    assert manifest['sha256'] == file_checksum(path)
+    assert manifest['size'] == os.path.getsize(path)
+    assert manifest['memory_size'] == model_memory_size(model_info) == artifact_memory_size(path)
+    assert (manifest['feature_columns'], manifest['target_column']) == (['a'], 'label')
+
+    loaded = load_artifact(path)
+    assert loaded['linear_model'] is not None
+    predictions, probabilities = _predict(loaded, data[1])
+    expected, expected_probabilities = _predict(model_info, data[1])
+    assert predictions == expected
+    np.testing.assert_allclose(probabilities, expected_probabilities)
+
+    # Identical models share one artifact, and no temporary files are left behind
+    assert save_artifact(model_info, directory=str(directory)) == path
+    assert sorted(os.listdir(directory)) == sorted([os.path.basename(path), os.path.basename(manifest_path(path))])
+
+
+def test_corrupted_artifacts_are_rejected(tmp_path, model_info):
+    path = save_artifact(model_info, directory=str(tmp_path))
+    with open(path, 'ab') as f:
+        f.write(b'garbage')
+
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        load_artifact(path, verify=True)
+
+
+def test_uncompressed_artifacts_can_be_memory_mapped(tmp_path, data):
+    model_info, _, _ = train_model(data[0], 'regression', 'target', ['a'])
+    path = save_artifact(model_info, directory=str(tmp_path), compress=0)
+    assert load_manifest(path)['compress'] == 0
+
+    mapped = load_artifact(path, mmap=True)
+    arrays = [value for value in mapped['linear_model'].values() if isinstance(value, np.ndarray)]
+    assert arrays and all(isinstance(array, np.memmap) for array in arrays)
+    assert not any(isinstance(value, np.memmap) for value in load_artifact(path, mmap=False)['linear_model'].values())
+
+
+def test_legacy_pickles_are_compiled_on_load(tmp_path, data, model_info):
+    model_info.pop('linear_model', None)
+    path = str(tmp_path / 'legacy.pkl')
+    with open(path, 'wb') as f:
+        pickle.dump(model_info, f)
+
+    loaded = load_artifact(path)
+    assert loaded['linear_model'] is not None
+    assert artifact_memory_size(path) is None
+    assert _predict(loaded, data[1])[0] == _predict(model_info, data[1])[0]
+
+
+def test_memory_size_counts_array_bytes():
+    size = model_memory_size({'weights': np.zeros(10 ** 6)})
+    assert 8 * 10 ** 6 <= size < 8 * 10 ** 6 + 1024
+
+
+def test_registry_budgets_with_the_manifest_size(tmp_path, model_info):
+    path = save_artifact(model_info, directory=str(tmp_path))
+    size = load_manifest(path)['memory_size']
+    # Larger than the compressed file on disk
+    assert size > os.path.getsize(path)
+    assert ModelRegistry._memory_size(path, model_info) == size
+
+    os.remove(manifest_path(path))
+    assert ModelRegistry._memory_size(path, model_info) == model_memory_size(model_info)
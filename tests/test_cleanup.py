@@ -0,0 +1,93 @@
+import os
+
+from app import db
+from app.datasets.models import Dataset, DatasetVersion
+from app.datasets.utils import get_columnar_path, get_lock_path, get_profile_state_path
+from app.models.artifacts import manifest_path
+from app.models.cleanup import FileCleanup, file_cleanup
+from app.models.models import Feedback, Model, ModelMetric, Prediction, TrainingJob
+from tests.helpers import train
+
+
+def _use(app, model_id, user_id, predictions=3):
+    with app.app_context():
+        for i in range(predictions):
+            db.session.add(Prediction({'size': float(i)}, {'prediction': float(i)}, model_id))
+        db.session.add(Feedback('Nice model', 5, model_id, user_id))
+        db.session.commit()
+
+
+def _counts(app, model_id):
+    with app.app_context():
+        return {table.__name__: table.query.filter_by(model_id=model_id).count()
+                for table in (Prediction, Feedback, ModelMetric, TrainingJob)}
+
+
+def test_file_cleanup_removes_files_in_the_background(tmp_path):
+    cleanup = FileCleanup()
+    paths = [tmp_path / f'{i}.bin' for i in range(3)]
+    for path in paths:
+        path.write_bytes(b'x')
+
+    # Missing files and empty paths are skipped
+    cleanup.remove([str(path) for path in paths] + [str(tmp_path / 'missing.bin'), None])
+    cleanup.close()
+    assert list(tmp_path.iterdir()) == []
+
+    # A closed cleanup starts again when more files are queued
+    paths[0].write_bytes(b'x')
+    cleanup.remove([str(paths[0])])
+    cleanup.close()
+    assert not paths[0].exists()
+
+
+def test_deleting_a_model_removes_its_rows_and_unused_artifacts(app, client, users, dataset):
+    _, student_id = users
+    first = train(app, client, dataset, ['size'], name='first')
+    # The same model again, stored in the same content-addressed artifact
+    second = train(app, client, dataset, ['size'], name='second')
+    other = train(app, client, dataset, ['rooms'], name='other')
+    _use(app, first, student_id)
+    with app.app_context():
+        shared_path = Model.query.get(first).model_path
+        other_path = Model.query.get(other).model_path
+        assert Model.query.get(second).model_path == shared_path
+
+    client.post(f'/models/{first}/delete')
+    assert _counts(app, first) == {'Prediction': 0, 'Feedback': 0, 'ModelMetric': 0, 'TrainingJob': 0}
+    with app.app_context():
+        assert Model.query.get(first) is None
+        # The job history is kept, unlinked from the model
+        assert TrainingJob.query.filter_by(name='first').one().model_id is None
+        assert Model.query.get(second) is not None
+
+    client.post(f'/models/{other}/delete')
+    file_cleanup.close()
+    assert os.path.exists(shared_path)
+    assert not os.path.exists(other_path) and not os.path.exists(manifest_path(other_path))
+
+
+def test_deleting_a_dataset_removes_everything_built_on_it(app, client, users, dataset):
+    _, student_id = users
+    model_ids = [train(app, client, dataset, ['size'], name='first'),
+                 train(app, client, dataset, ['rooms', 'city'], name='second')]
+    for model_id in model_ids:
+        _use(app, model_id, student_id)
+    with app.app_context():
+        file_path = Dataset.query.get(dataset).file_path
+        artifacts = [Model.query.get(model_id).model_path for model_id in model_ids]
+    derived = [get_columnar_path(file_path), get_profile_state_path(file_path), get_lock_path(file_path)]
+
+    response = client.get(f'/datasets/delete/{dataset}', follow_redirects=True)
+    assert b'Dataset and associated models deleted successfully!' in response.data
+    file_cleanup.close()
+
+    with app.app_context():
+        assert Dataset.query.get(dataset) is None
+        assert DatasetVersion.query.filter_by(dataset_id=dataset).count() == 0
+        assert TrainingJob.query.count() == 0
+        assert Model.query.count() == 0
+        for table in (Prediction, Feedback, ModelMetric):
+            assert table.query.count() == 0
+    for path in [file_path] + derived + artifacts:
+        assert not os.path.exists(path), path
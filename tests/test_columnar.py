@@ -0,0 +1,43 @@
+import threading
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from app.datasets.utils import ensure_columnar_copy, get_columnar_path, write_columnar_copy
+
+
+def _write_csv(path, rows=2000):
+    pd.DataFrame({'x': range(rows), 'label': ['a', 'b'] * (rows // 2)}).to_csv(path, index=False)
+
+
+def test_columnar_copy_matches_the_csv(tmp_path):
+    path = tmp_path / 'data.csv'
+    _write_csv(path)
+
+    columnar_path = write_columnar_copy(str(path), chunksize=300)
+    pd.testing.assert_frame_equal(feather.read_feather(columnar_path), pd.read_csv(path))
+    assert ensure_columnar_copy(str(path)) == columnar_path
+
+
+def test_concurrent_rebuilds_publish_a_complete_copy(tmp_path):
+    path = tmp_path / 'data.csv'
+    _write_csv(path)
+
+    errors = []
+
+    def rebuild():
+        try:
+            write_columnar_copy(str(path), chunksize=100)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=rebuild) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    pd.testing.assert_frame_equal(feather.read_feather(get_columnar_path(str(path))), pd.read_csv(path))
+    # Every rebuild renamed its own temporary file into place
+    assert not [p.name for p in tmp_path.iterdir() if p.name.endswith('.tmp')]
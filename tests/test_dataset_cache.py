@@ -0,0 +1,96 @@
+import os
+
+import pandas as pd
+
+from app.datasets.cache import DatasetCache
+
+
+class CountingLoader:
+    def __init__(self, load):
+        self.load = load
+        self.calls = []
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        return self.load(*args)
+
+
+def _write_csv(path, rows):
+    pd.DataFrame({'x': range(rows)}).to_csv(path, index=False)
+
+
+def _frame_size(path):
+    return int(pd.read_csv(path).memory_usage(deep=True).sum())
+
+
+def test_dataset_cache_serves_hits_without_reloading(tmp_path):
+    path = tmp_path / 'a.csv'
+    _write_csv(path, 100)
+    loader = CountingLoader(lambda file_path, columns: pd.read_csv(file_path, usecols=columns))
+    cache = DatasetCache(max_bytes=10 ** 6)
+
+    first = cache.get(str(path), loader)
+    assert cache.get(str(path), loader) is first
+    assert len(loader.calls) == 1
+
+    # A different column selection is a different entry
+    cache.get(str(path), loader, columns=['x'])
+    assert len(loader.calls) == 2
+
+
+def test_dataset_cache_evicts_least_recently_used(tmp_path):
+    paths = [tmp_path / f'{name}.csv' for name in 'abc']
+    for path in paths:
+        _write_csv(path, 100)
+    size = _frame_size(paths[0])
+    loader = CountingLoader(lambda file_path, columns: pd.read_csv(file_path))
+    cache = DatasetCache(max_bytes=2 * size)
+
+    cache.get(str(paths[0]), loader)
+    cache.get(str(paths[1]), loader)
+    cache.get(str(paths[0]), loader)
+    cache.get(str(paths[2]), loader)
+    assert cache.total_bytes == 2 * size
+
+    # b was the least recently used, so a is still cached and b is loaded again
+    cache.get(str(paths[0]), loader)
+    assert len(loader.calls) == 3
+    cache.get(str(paths[1]), loader)
+    assert len(loader.calls) == 4
+
+
+def test_dataset_cache_reloads_modified_files(tmp_path):
+    path = tmp_path / 'a.csv'
+    _write_csv(path, 10)
+    loader = CountingLoader(lambda file_path, columns: pd.read_csv(file_path))
+    cache = DatasetCache(max_bytes=10 ** 6)
+    cache.get(str(path), loader)
+
+    _write_csv(path, 20)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert len(cache.get(str(path), loader)) == 20
+    assert len(loader.calls) == 2
+
+    # The entry for the old version was replaced, not kept alongside
+    assert cache.total_bytes == _frame_size(path)
+
+
+def test_dataset_cache_invalidate_and_oversized_entries(tmp_path):
+    path = tmp_path / 'a.csv'
+    _write_csv(path, 100)
+    loader = CountingLoader(lambda file_path, columns: pd.read_csv(file_path))
+
+    cache = DatasetCache(max_bytes=10 ** 6)
+    cache.get(str(path), loader)
+    cache.invalidate(str(path))
+    assert cache.total_bytes == 0
+    cache.get(str(path), loader)
+    assert len(loader.calls) == 2
+
+    # Frames larger than the whole budget are returned but never cached
+    small = DatasetCache(max_bytes=10)
+    small.get(str(path), loader)
+    small.get(str(path), loader)
+    assert len(loader.calls) == 4
+    assert small.total_bytes == 0
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, LogisticRegression, SGDClassifier, SGDRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import RandomForestRegressor
+
+from app.models.inference import compile_linear_model, predict_linear, predict_frame, predict_row, prepare_features
+
+FEATURES = ['size', 'rooms', 'city']
+
+
+def _data(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'size': rng.normal(100, 30, n),
+        'rooms': rng.integers(1, 6, n),
+        'city': rng.choice(['north', 'south', 'east'], n),
+    })
+    score = 0.05 * df['size'] + df['rooms'] + (df['city'] == 'north') * 2 + rng.normal(0, 1, n)
+    return df, score
+
+
+def _fit(estimator, df, y):
+    X = pd.get_dummies(df[FEATURES])
+    pipeline = Pipeline([('scaler', StandardScaler()), ('model', estimator)]).fit(X, y)
+    return pipeline, X.columns.tolist()
+
+
+def test_regression_matches_sklearn():
+    df, score = _data()
+    for estimator in [LinearRegression(), SGDRegressor(random_state=0)]:
+        pipeline, columns = _fit(estimator, df, score)
+        linear_model = compile_linear_model(pipeline, columns)
+        X = prepare_features(df, FEATURES, columns)
+
+        predictions, probabilities = predict_linear(linear_model, X.to_numpy(dtype='float64'))
+        np.testing.assert_allclose(predictions, pipeline.predict(X), rtol=1e-9, atol=1e-9)
+        assert probabilities is None
+
+
+@pytest.mark.parametrize('estimator,n_classes', [
+    (LogisticRegression(), 2),
+    (LogisticRegression(), 3),
+    (LogisticRegression(multi_class='ovr'), 3),
+    (SGDClassifier(loss='log_loss', random_state=0), 2),
+    (SGDClassifier(loss='log_loss', random_state=0), 3),
+])
+def test_classification_matches_sklearn(estimator, n_classes):
+    df, score = _data()
+    labels = pd.qcut(score, n_classes, labels=[f'c{i}' for i in range(n_classes)]).astype(str)
+    pipeline, columns = _fit(estimator, df, labels)
+    linear_model = compile_linear_model(pipeline, columns)
+    X = prepare_features(df, FEATURES, columns)
+
+    predictions, probabilities = predict_linear(linear_model, X.to_numpy(dtype='float64'))
+    assert predictions == pipeline.predict(X).tolist()
+    np.testing.assert_allclose(probabilities, pipeline.predict_proba(X), rtol=1e-9, atol=1e-12)
+
+
+def test_forests_and_hinge_loss_are_not_compiled():
+    df, score = _data()
+    pipeline, columns = _fit(RandomForestRegressor(n_estimators=2, random_state=0), df, score)
+    assert compile_linear_model(pipeline, columns) is None
+
+    pipeline, columns = _fit(SGDClassifier(random_state=0), df, score > score.median())
+    assert compile_linear_model(pipeline, columns) is None
+
+
+def test_predict_frame_and_predict_row_agree_with_the_pipeline():
+    df, score = _data()
+    labels = np.where(score > score.median(), 'high', 'low')
+    pipeline, columns = _fit(LogisticRegression(), df, labels)
+    model_info = {'pipeline': pipeline, 'feature_columns': columns,
+                  'linear_model': compile_linear_model(pipeline, columns)}
+    X = prepare_features(df, FEATURES, columns)
+
+    predictions, probabilities = predict_frame(model_info, X, with_probability=True)
+    assert predictions == pipeline.predict(X).tolist()
+    np.testing.assert_allclose(probabilities, pipeline.predict_proba(X).max(axis=1))
+
+    row = {'size': 120.0, 'rooms': 3, 'city': 'north'}
+    prediction, row_probabilities = predict_row(model_info, FEATURES, row, with_probability=True)
+    X_row = prepare_features(pd.DataFrame([row]), FEATURES, columns)
+    assert prediction == pipeline.predict(X_row)[0]
+    expected = dict(zip(pipeline.classes_.tolist(), pipeline.predict_proba(X_row)[0]))
+    assert row_probabilities == pytest.approx(expected)
+
+    # Unseen categories are dropped, as prepare_features does
+    unseen = dict(row, city='west')
+    expected = pipeline.predict(prepare_features(pd.DataFrame([unseen]), FEATURES, columns))[0]
+    assert predict_row(model_info, FEATURES, unseen)[0] == expected
+
+
+def test_missing_values_are_rejected():
+    df, score = _data()
+    pipeline, columns = _fit(LinearRegression(), df, score)
+    model_info = {'pipeline': pipeline, 'feature_columns': columns,
+                  'linear_model': compile_linear_model(pipeline, columns)}
+
+    # The pipeline would raise on NaN too, rather than predict NaN
+    with pytest.raises(ValueError):
+        predict_row(model_info, FEATURES, {'size': float('nan'), 'rooms': 3, 'city': 'north'})
+    X = prepare_features(pd.DataFrame({'size': [1.0, np.inf], 'rooms': [1, 2], 'city': ['north', 'east']}),
+                         FEATURES, columns)
+    with pytest.raises(ValueError):
+        predict_frame(model_info, X)
@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from app import db
+from app.models import jobs
+from app.models.jobs import recover_interrupted_jobs, submit_training_job
+from app.models.models import Model, TrainingJob
+from tests.helpers import login, train
+
+
+def _job(app, dataset_id, feature_columns, status='queued', name='job'):
+    from app.datasets.models import Dataset
+
+    with app.app_context():
+        user_id = Dataset.query.get(dataset_id).user_id
+        job = TrainingJob(name, '', 'regression', 'price', feature_columns, dataset_id, user_id)
+        job.status = status
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+
+def test_training_runs_synchronously_without_workers(app, client, dataset):
+    model_id = train(app, client, dataset, ['size', 'rooms'])
+
+    with app.app_context():
+        job = TrainingJob.query.one()
+        assert (job.status, job.progress, job.model_id) == ('completed', 100, model_id)
+        assert job.started_at <= job.finished_at
+        assert Model.query.get(model_id).feature_columns == ['size', 'rooms']
+
+    assert client.get(f'/models/jobs/{job.id}/status').get_json() == {
+        'id': job.id, 'status': 'completed', 'progress': 100, 'message': 'Model trained successfully!',
+        'model_id': model_id
+    }
+    # A finished job's page sends its owner on to the model
+    response = client.get(f'/models/jobs/{job.id}')
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(f'/models/{model_id}')
+
+
+def test_only_the_owner_follows_a_job(app, client, dataset):
+    train(app, client, dataset, ['size'])
+    with app.app_context():
+        job_id = TrainingJob.query.one().id
+
+    client.get('/auth/logout')
+    login(client, 'teacher')
+    assert client.get(f'/models/jobs/{job_id}/status').status_code == 403
+
+
+def test_a_failed_job_records_the_error(app, dataset):
+    job_id = _job(app, dataset, ['colour'])
+    with app.app_context():
+        submit_training_job(TrainingJob.query.get(job_id))
+        job = TrainingJob.query.get(job_id)
+        assert job.status == 'failed'
+        assert job.message.startswith('Error training model:')
+        assert job.model_id is None and Model.query.count() == 0
+
+
+@pytest.mark.parametrize('requeue', [False, True])
+def test_recover_interrupted_jobs(app, dataset, requeue):
+    running = _job(app, dataset, ['size'], status='running', name='running')
+    queued = _job(app, dataset, ['rooms'], status='queued', name='queued')
+    done = _job(app, dataset, ['size'], status='completed', name='done')
+
+    with app.app_context():
+        assert recover_interrupted_jobs(requeue=requeue) == 2
+        statuses = {job.id: job.status for job in TrainingJob.query}
+        if requeue:
+            assert statuses == {running: 'completed', queued: 'completed', done: 'completed'}
+            assert sorted(model.name for model in Model.query) == ['queued', 'running']
+        else:
+            assert statuses == {running: 'failed', queued: 'failed', done: 'completed'}
+            assert 'server restart' in TrainingJob.query.get(running).message
+            assert Model.query.count() == 0
+
+
+def test_recover_jobs_command(app, dataset):
+    _job(app, dataset, ['size'], status='running')
+    result = app.test_cli_runner().invoke(args=['models', 'recover-jobs'])
+    assert 'Marked failed 1 interrupted job(s).' in result.output
+
+
+def test_a_dead_worker_fails_its_job(app, dataset):
+    job_id = _job(app, dataset, ['size'], status='running')
+    future = Future()
+    future.set_exception(RuntimeError('worker killed'))
+
+    jobs._check_future(app, job_id, future)
+    with app.app_context():
+        job = TrainingJob.query.get(job_id)
+        assert job.status == 'failed'
+        assert job.message == 'Training worker failed: worker killed'
+
+
+def test_worker_pool_trains_in_another_process(app, dataset, monkeypatch):
+    # Spawned workers import Config afresh, so the artifact directory must come from the environment
+    monkeypatch.setenv('MODEL_ARTIFACT_DIR', app.config['MODEL_ARTIFACT_DIR'])
+    monkeypatch.setitem(app.config, 'TRAINING_WORKERS', 1)
+    job_id = _job(app, dataset, ['size', 'city'])
+
+    try:
+        with app.app_context():
+            submit_training_job(TrainingJob.query.get(job_id))
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            with app.app_context():
+                job = TrainingJob.query.get(job_id)
+                if job.is_finished:
+                    break
+            time.sleep(0.2)
+    finally:
+        if jobs._executor is not None:
+            jobs._executor.shutdown()
+            jobs._executor = None
+
+    with app.app_context():
+        job = TrainingJob.query.get(job_id)
+        assert job.status == 'completed', job.message
+        assert Model.query.get(job.model_id).name == 'job'
@@ -0,0 +1,89 @@
+import pytest
+
+from app import db
+from app.models.models import Model, ModelMetric
+from app.models.user import User
+from tests.helpers import login, train
+
+
+@pytest.fixture
+def models(app, client, dataset):
+    """Three regression models and a classifier on the student's dataset, by name"""
+    ids = {
+        'size': train(app, client, dataset, ['size'], name='size'),
+        'size_rooms': train(app, client, dataset, ['size', 'rooms'], name='size_rooms'),
+        'all': train(app, client, dataset, ['size', 'rooms', 'city'], name='all'),
+        'classifier': train(app, client, dataset, ['size', 'rooms'], model_type='classification',
+                            target_column='city', name='classifier'),
+    }
+    with app.app_context():
+        return {name: Model.query.get(model_id).metrics for name, model_id in ids.items()}
+
+
+def _ranked(client, **params):
+    response = client.get('/api/leaderboard', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()['models']
+
+
+@pytest.mark.parametrize('metric, reverse', [('r2_score', True), ('mse', False), ('mae', False)])
+def test_models_rank_by_the_metric(client, models, metric, reverse):
+    ranked = _ranked(client, metric=metric)
+    regressors = [name for name in models if name != 'classifier']
+    expected = sorted(regressors, key=lambda name: models[name][metric], reverse=reverse)
+
+    assert [model['name'] for model in ranked] == expected
+    assert [model['rank'] for model in ranked] == [1, 2, 3]
+    assert [model['value'] for model in ranked] == pytest.approx([models[name][metric] for name in expected])
+    assert ranked[0]['owner'] == 'student' and ranked[0]['dataset_name'] == 'houses'
+
+
+def test_leaderboard_filters_and_limit(app, client, dataset, models, monkeypatch):
+    assert [model['name'] for model in _ranked(client, metric='accuracy')] == ['classifier']
+    assert [model['name'] for model in _ranked(client, metric='accuracy', target_column='price')] == []
+    assert len(_ranked(client, metric='r2_score', dataset_id=dataset)) == 3
+    assert _ranked(client, metric='r2_score', dataset_id=dataset + 1) == []
+
+    assert len(_ranked(client, metric='r2_score', limit=2)) == 2
+    monkeypatch.setitem(app.config, 'LEADERBOARD_LIMIT', 1)
+    assert len(_ranked(client, metric='r2_score', limit=10)) == 1
+
+
+def test_unsupported_metric(client, models):
+    response = client.get('/api/leaderboard?metric=loss')
+    assert response.status_code == 400
+    assert 'Unsupported metric: loss' in response.get_json()['error']
+
+    # The page falls back to r2_score
+    response = client.get('/models/leaderboard?metric=loss')
+    assert response.status_code == 200
+    assert b'Unknown metric: loss' in response.data
+    assert b'size_rooms' in response.data
+
+
+def test_teachers_rank_their_students_models(app, client, models):
+    client.get('/auth/logout')
+    login(client, 'teacher')
+    assert len(_ranked(client, metric='r2_score')) == 3
+
+    client.get('/auth/logout')
+    with app.app_context():
+        other = User('other', 'other@example.com', role='student')
+        other.set_password('password')
+        db.session.add(other)
+        db.session.commit()
+    login(client, 'other')
+    assert _ranked(client, metric='r2_score') == []
+
+
+def test_metric_rows_follow_the_model_metrics(app, models):
+    with app.app_context():
+        model = Model.query.filter_by(name='size').one()
+        assert {metric.name for metric in model.metric_values} >= {'r2_score', 'mse', 'mae'}
+
+        # Non-finite values can't be ranked, so they have no row
+        model.metrics = dict(model.metrics, r2_score=0.5, mse=float('nan'))
+        db.session.commit()
+        values = {row.name: row.value for row in ModelMetric.query.filter_by(model_id=model.id)}
+        assert values['r2_score'] == 0.5
+        assert 'mse' not in values
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+
+from app.models.ml_utils import LinearStatistics, fit_statistics, fold_scaler, holdout_mask
+from app.models.training import read_holdout_rows, retrain_model, train_model
+
+
+def _data(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    # Offsets far from zero, where uncentered XᵀX loses precision
+    X = np.column_stack([rng.normal(1e6, 5, n), rng.normal(0, 1, n), rng.uniform(-3, 3, n)])
+    y = 2 * (X[:, 0] - 1e6) - X[:, 1] + 0.5 * X[:, 2] + 7 + rng.normal(0, 0.1, n)
+    return X, y
+
+
+def _statistics(X, y, chunksize):
+    stats = LinearStatistics(X.shape[1])
+    for start in range(0, len(X), chunksize):
+        stats.update(X[start:start + chunksize], y[start:start + chunksize])
+    return stats
+
+
+@pytest.mark.parametrize('chunksize', [1, 33, 500])
+def test_statistics_match_the_whole_data(chunksize):
+    X, y = _data()
+    stats = _statistics(X, y, chunksize)
+    Z = np.column_stack([X, y])
+
+    assert stats.count == len(X)
+    np.testing.assert_allclose(stats.mean, Z.mean(axis=0), rtol=1e-12)
+    centered = Z - Z.mean(axis=0)
+    np.testing.assert_allclose(stats.comoment, centered.T @ centered, rtol=1e-8, atol=1e-6)
+
+
+def test_merge_equals_a_single_pass():
+    X, y = _data()
+    left, right = _statistics(X[:200], y[:200], 50), _statistics(X[200:], y[200:], 50)
+    left.merge(right)
+    whole = _statistics(X, y, 500)
+
+    assert left.count == whole.count
+    np.testing.assert_allclose(left.mean, whole.mean, rtol=1e-12)
+    np.testing.assert_allclose(left.comoment, whole.comoment, rtol=1e-9, atol=1e-6)
+
+
+def test_solve_and_evaluate_match_sklearn():
+    X, y = _data()
+    stats = _statistics(X, y, 64)
+    mean, scale = stats.scaler()
+    weights, intercept = stats.solve()
+
+    reference = LinearRegression().fit(X, y)
+    coefficients, folded_intercept = fold_scaler({'weights': weights, 'intercept': intercept,
+                                                  'scaler_mean': mean, 'scaler_scale': scale})
+    np.testing.assert_allclose(coefficients, reference.coef_, rtol=1e-6)
+    assert folded_intercept == pytest.approx(reference.intercept_, rel=1e-6)
+
+    mse, r2 = stats.evaluate(mean, scale, weights, intercept)
+    y_pred = reference.predict(X)
+    assert mse == pytest.approx(mean_squared_error(y, y_pred), rel=1e-6)
+    assert r2 == pytest.approx(r2_score(y, y_pred), rel=1e-9)
+
+
+def test_solve_handles_constant_and_collinear_features():
+    X, y = _data()
+    X = np.column_stack([X, np.full(len(X), 4.0), 2 * X[:, 1]])
+    stats = _statistics(X, y, 100)
+    mean, scale = stats.scaler()
+    weights, intercept = stats.solve()
+
+    y_pred = LinearRegression().fit(X, y).predict(X)
+    coefficients, folded_intercept = fold_scaler({'weights': weights, 'intercept': intercept,
+                                                  'scaler_mean': mean, 'scaler_scale': scale})
+    np.testing.assert_allclose(X @ coefficients + folded_intercept, y_pred, rtol=1e-6)
+
+
+def test_update_rejects_non_finite_values():
+    stats = LinearStatistics(1)
+    with pytest.raises(ValueError):
+        stats.update(np.array([[1.0], [np.nan]]), np.array([1.0, 2.0]))
+    with pytest.raises(ValueError):
+        LinearStatistics(1).solve()
+
+
+def test_round_trip_through_dict():
+    X, y = _data()
+    stats = _statistics(X, y, 100)
+    restored = LinearStatistics.from_dict(stats.to_dict())
+    assert restored.count == stats.count
+    np.testing.assert_array_equal(restored.mean, stats.mean)
+    np.testing.assert_array_equal(restored.comoment, stats.comoment)
+
+
+def test_holdout_mask_does_not_depend_on_the_chunk_size():
+    whole = holdout_mask(0, 1000)
+    chunks = np.concatenate([holdout_mask(start, 70) for start in range(0, 1000, 70)])[:1000]
+    np.testing.assert_array_equal(whole, chunks)
+    assert 0.15 < whole.mean() < 0.25
+
+
+def test_fit_statistics_on_a_feature_subset():
+    X, y = _data()
+    holdout = holdout_mask(0, len(X))
+    statistics = {
+        'feature_columns': ['a', 'b', 'c'],
+        'train': _statistics(X[~holdout], y[~holdout], 77).to_dict(),
+        'test': _statistics(X[holdout], y[holdout], 77).to_dict()
+    }
+
+    # Solving a subset from the stored statistics equals fitting on those columns only
+    model_data, metrics = fit_statistics(statistics, [0, 2])
+    subset = X[:, [0, 2]]
+    reference = LinearRegression().fit(subset[~holdout], y[~holdout])
+    assert model_data['feature_columns'] == ['a', 'c']
+    coefficients, intercept = fold_scaler(model_data)
+    np.testing.assert_allclose(coefficients, reference.coef_, rtol=1e-6)
+    assert intercept == pytest.approx(reference.intercept_, rel=1e-6)
+    assert metrics['test_mse'] == pytest.approx(mean_squared_error(y[holdout], reference.predict(subset[holdout])),
+                                                rel=1e-6)
+    assert metrics['train_r2'] == pytest.approx(reference.score(subset[~holdout], y[~holdout]), rel=1e-9)
+
+
+def test_fit_statistics_without_test_rows():
+    X, y = _data(n=50)
+    stats = {
+        'feature_columns': ['a', 'b', 'c'],
+        'train': _statistics(X, y, 50).to_dict(),
+        'test': LinearStatistics(3).to_dict()
+    }
+    _, metrics = fit_statistics(stats)
+    assert np.isnan(metrics['test_mse'])
+    assert metrics['train_r2'] > 0.99
+
+
+def test_closed_form_retrain_measures_every_metric_on_the_original_holdout(tmp_path):
+    path = tmp_path / 'data.csv'
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'size': rng.normal(100, 30, 400)})
+    df['price'] = 3 * df['size'] + rng.normal(0, 5, 400)
+    df.iloc[:300].to_csv(path, index=False)
+
+    model_info, metrics, _ = train_model(str(path), 'regression', 'price', ['size'])
+    assert model_info['statistics']['holdout_rows'] == 300
+
+    # Append rows, which leave the original holdout in place
+    df.iloc[300:].to_csv(path, mode='a', header=False, index=False)
+    holdout = read_holdout_rows(str(path), model_info, ['size'], 'price')
+    assert len(holdout) == 60 and holdout.index.max() < 300
+
+    model_info, retrained, _ = retrain_model(model_info, df.iloc[300:], 'regression', 'price', ['size'],
+                                             trained_rows=300, metrics=metrics, holdout=holdout)
+    y_pred = holdout['size'].to_numpy() * model_info['linear_model']['coefficients'][0][0] + \
+        model_info['linear_model']['intercept'][0]
+    assert retrained['coefficients'] != metrics['coefficients']
+    assert retrained['mae'] == pytest.approx(np.mean(np.abs(holdout['price'] - y_pred)))
+    assert retrained['mse'] == pytest.approx(mean_squared_error(holdout['price'], y_pred))
+    assert retrained['r2_score'] == pytest.approx(r2_score(holdout['price'], y_pred))
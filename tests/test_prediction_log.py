@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.models.models import Prediction
+from app.models.prediction_log import PredictionLogWriter, prediction_log
+from tests.helpers import csv_file, house_prices, train
+
+
+@pytest.fixture
+def writer(app):
+    # Never flushed by time or batch size, so the tests decide when rows are written
+    writer = PredictionLogWriter(batch_size=10 ** 6, flush_interval=3600, max_buffer=50)
+    writer.app = app
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def model_id(app, client, dataset):
+    return train(app, client, dataset, ['size', 'rooms', 'city'])
+
+
+def _count(app):
+    with app.app_context():
+        return Prediction.query.count()
+
+
+def _batch(n):
+    return [{'size': float(i)} for i in range(n)], [{'prediction': float(i)} for i in range(n)]
+
+
+def test_log_many_buffers_until_flushed(app, writer, model_id):
+    writer.log_many(model_id, *_batch(20))
+    writer.log(model_id, {'size': 1.0}, {'prediction': float('nan')})
+    assert _count(app) == 0
+
+    assert writer.flush() == 21
+    assert _count(app) == 21
+    with app.app_context():
+        # JSON columns can't hold NaN, so it is stored as null
+        assert Prediction.query.order_by(Prediction.id.desc()).first().output_data == {'prediction': None}
+
+
+def test_log_many_flushes_inline_once_the_buffer_is_full(app, writer, model_id):
+    writer.log_many(model_id, *_batch(30))
+    assert _count(app) == 0
+    writer.log_many(model_id, *_batch(30))
+    assert _count(app) == 60
+    assert writer._buffer == []
+
+
+def test_write_many_inserts_directly(app, writer, model_id):
+    assert writer.write_many(model_id, *_batch(500)) == 500
+    assert _count(app) == 500
+    assert writer._buffer == []
+
+
+def test_write_many_queues_the_batch_while_the_database_is_down(app, writer, model_id, monkeypatch):
+    def unavailable(records):
+        raise OperationalError('INSERT', {}, Exception('database is down'))
+
+    with monkeypatch.context() as patch:
+        patch.setattr(writer, '_insert', unavailable)
+        assert writer.write_many(model_id, *_batch(30)) == 0
+        assert writer.flush() == 0
+
+    # Kept for the next flush, up to max_buffer records
+    assert len(writer._buffer) == 30
+    assert writer.flush() == 30
+    assert _count(app) == 30
+
+
+def test_csv_scoring_logs_every_row_without_buffering(app, client, model_id, monkeypatch):
+    monkeypatch.setitem(app.config, 'PREDICTION_CHUNK_SIZE', 64)
+    prediction_log.flush()
+    before = _count(app)
+
+    response = client.post(f'/models/{model_id}/predict',
+                           data={'csv_file': csv_file(house_prices(n=300), 'score.csv'), 'has_header': 'y'},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert _count(app) - before == 300
+    assert prediction_log._buffer == []
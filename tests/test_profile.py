@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.datasets import profile
+from app.datasets.profile import DatasetProfiler, merge_dtype, profile_dataset
+
+
+def _frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        # Far from zero, where the naive sum-of-squares variance loses precision
+        'large': 1e9 + rng.normal(0, 1, n),
+        'value': rng.exponential(3.0, n),
+        'label': rng.choice(['a', 'b', 'c'], n),
+    })
+
+
+def _profile_in_chunks(df, chunksize):
+    profiler = DatasetProfiler()
+    for start in range(0, len(df), chunksize):
+        profiler.update(df.iloc[start:start + chunksize])
+    return profiler.to_dict()
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 1000, 5000])
+def test_chunked_moments_match_whole_frame(chunksize):
+    df = _frame(n=2000 if chunksize == 1 else 5000)
+    result = _profile_in_chunks(df, chunksize)
+
+    assert result['row_count'] == len(df)
+    for name in ['large', 'value']:
+        column = result['columns'][name]
+        assert column['count'] == len(df)
+        assert column['mean'] == pytest.approx(df[name].mean(), rel=1e-12)
+        # Values around 1e9 carry about 1e-7 of absolute precision, so the
+        # merged and two-pass results agree to that, where a running sum of
+        # squares would lose every digit
+        assert column['std'] == pytest.approx(df[name].std(), rel=1e-6)
+        assert column['min'] == df[name].min()
+        assert column['max'] == df[name].max()
+
+
+def test_quartiles_are_exact_while_the_sample_holds_every_value():
+    df = _frame(n=3000)
+    column = _profile_in_chunks(df, 250)['columns']['value']
+    expected = df['value'].quantile([0.25, 0.5, 0.75]).tolist()
+    assert [column['25%'], column['50%'], column['75%']] == pytest.approx(expected)
+
+
+def test_bottom_k_sample_estimates_quartiles(monkeypatch):
+    monkeypatch.setattr(profile, 'PROFILE_SAMPLE_SIZE', 2000)
+    df = pd.DataFrame({'uniform': np.arange(100000, dtype='float64')})
+
+    profiler = DatasetProfiler()
+    for start in range(0, len(df), 3000):
+        profiler.update(df.iloc[start:start + 3000])
+    column = profiler.columns['uniform']
+
+    # The sample is bounded and drawn from the whole file, not just the last chunks
+    assert len(column._sample_values) == 2000
+    assert column._sample_values.min() < 10000
+    assert column._sample_values.max() > 90000
+
+    result = column.to_dict()
+    for key, expected in [('25%', 25000), ('50%', 50000), ('75%', 75000)]:
+        assert result[key] == pytest.approx(expected, abs=3000)
+
+
+def test_nulls_cardinality_and_categorical_columns():
+    df = pd.DataFrame({
+        'x': [1.0, None, 3.0, 3.0, None],
+        'label': ['a', 'b', None, 'a', 'a'],
+    })
+    result = _profile_in_chunks(df, 2)['columns']
+
+    assert result['x']['null_count'] == 2
+    assert result['x']['distinct'] == 2
+    assert result['x']['count'] == 3
+    assert result['label']['null_count'] == 1
+    assert result['label']['distinct'] == 2
+    assert result['label']['distinct_exact']
+    assert 'mean' not in result['label']
+
+
+def test_cardinality_becomes_a_lower_bound(monkeypatch):
+    monkeypatch.setattr(profile, 'PROFILE_MAX_DISTINCT', 10)
+    df = pd.DataFrame({'id': np.arange(50)})
+    column = _profile_in_chunks(df, 20)['columns']['id']
+    assert column['distinct'] == 10
+    assert not column['distinct_exact']
+
+
+def test_merge_dtype_follows_a_single_read():
+    assert merge_dtype(None, 'int64') == 'int64'
+    assert merge_dtype('int64', 'int64') == 'int64'
+    assert merge_dtype('int64', 'float64') == 'float64'
+    assert merge_dtype('float64', 'object') == 'object'
+
+
+def test_profile_dataset_matches_a_single_read(tmp_path):
+    path = tmp_path / 'data.csv'
+    df = _frame(n=1200)
+    df.to_csv(path, index=False)
+
+    result = profile_dataset(path, chunksize=100)
+    expected = pd.read_csv(path)
+    assert result['row_count'] == len(expected)
+    for name, dtype in expected.dtypes.items():
+        assert result['columns'][name]['dtype'] == str(dtype)
+    assert result['columns']['value']['mean'] == pytest.approx(expected['value'].mean())
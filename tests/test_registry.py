@@ -0,0 +1,104 @@
+import gc
+from types import SimpleNamespace
+
+from config import Config
+from app.models.registry import ModelRegistry
+
+
+class CountingLoader:
+    def __init__(self, load):
+        self.load = load
+        self.calls = []
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        return self.load(*args)
+
+
+def _model(model_id, updated_at=1, model_path=None):
+    return SimpleNamespace(id=model_id, model_path=model_path or f'/models/{model_id}.joblib',
+                           updated_at=updated_at)
+
+
+def _registry(max_bytes, sizes=None):
+    loader = CountingLoader(lambda path: {'path': path})
+    sizer = lambda path, model_info: (sizes or {}).get(path, 100)
+    return ModelRegistry(max_bytes, loader=loader, sizer=sizer), loader
+
+
+def test_registry_reuses_models_until_they_change():
+    registry, loader = _registry(max_bytes=1000)
+    model = _model(1)
+
+    first = registry.get(model)
+    assert registry.get(model) is first
+    assert len(loader.calls) == 1
+
+    # Retraining bumps updated_at, so the new artifact is loaded
+    model.updated_at = 2
+    assert registry.get(model) is not first
+    assert len(loader.calls) == 2
+    assert registry.total_bytes == 100
+
+
+def test_registry_evicts_least_recently_used_by_size():
+    registry, loader = _registry(max_bytes=250)
+    models = [_model(i) for i in range(3)]
+
+    registry.get(models[0])
+    registry.get(models[1])
+    registry.get(models[0])
+    registry.get(models[2])
+    assert registry.total_bytes == 200
+
+    registry.get(models[0])
+    assert len(loader.calls) == 3
+    registry.get(models[1])
+    assert len(loader.calls) == 4
+
+
+def test_registry_charges_the_sizer_and_skips_oversized_models():
+    sizes = {'/models/1.joblib': 400, '/models/2.joblib': 5000}
+    registry, loader = _registry(max_bytes=1000, sizes=sizes)
+
+    registry.get(_model(1))
+    assert registry.total_bytes == 400
+
+    registry.get(_model(2))
+    registry.get(_model(2))
+    assert len(loader.calls) == 3
+    assert registry.total_bytes == 400
+
+
+def test_registry_invalidate():
+    registry, loader = _registry(max_bytes=1000)
+    model = _model(1)
+    registry.get(model)
+    registry.invalidate(model.id)
+    assert registry.total_bytes == 0
+    registry.get(model)
+    assert len(loader.calls) == 2
+
+
+def test_warm_up_loads_the_most_used_models_only_when_asked(app, client, dataset, monkeypatch):
+    from app import create_app, db
+    from app.models.models import Prediction
+    from app.models.registry import model_registry, warm_up_registry
+    from tests.helpers import train
+
+    used = train(app, client, dataset, ['size'], name='used')
+    train(app, client, dataset, ['rooms'], name='unused')
+    with app.app_context():
+        db.session.add(Prediction({'size': 1.0}, {'prediction': 1.0}, used))
+        db.session.commit()
+    model_registry.clear()
+
+    # Creating an app, as every CLI command and training worker does, loads nothing
+    create_app(type('WarmConfig', (Config,), {'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI'],
+                                              'MODEL_WARMUP_COUNT': 1}))
+    assert list(model_registry._entries) == []
+
+    # The serving entrypoint does
+    monkeypatch.setattr(gc, 'freeze', lambda: None)
+    assert warm_up_registry(app, 1) == 1
+    assert list(model_registry._entries) == [used]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, mean_squared_error, \
+    precision_score, r2_score, recall_score
+
+from app.models.inference import prepare_features
+from app.models.ml_utils import holdout_mask
+from app.models.training import OUT_OF_CORE_TEST_SIZE, _classification_metrics, train_model_out_of_core
+
+FEATURES = ['size', 'rooms', 'city']
+
+
+def _write_dataset(path, n=1500, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'size': rng.normal(100, 30, n),
+        'rooms': rng.integers(1, 6, n),
+        'city': rng.choice(['north', 'south', 'east'], n),
+    })
+    df['price'] = 3 * df['size'] + 10 * df['rooms'] + (df['city'] == 'north') * 50 + rng.normal(0, 5, n)
+    df['band'] = pd.qcut(df['price'], 3, labels=['low', 'mid', 'high']).astype(str)
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+
+def _holdout_predictions(model_info, df, target_column):
+    test = df[holdout_mask(0, len(df), OUT_OF_CORE_TEST_SIZE)]
+    X = prepare_features(test, FEATURES, model_info['feature_columns'])
+    return test[target_column].to_numpy(), model_info['pipeline'].predict(X)
+
+
+def test_out_of_core_regression_metrics_match_sklearn(tmp_path):
+    path = tmp_path / 'data.csv'
+    df = _write_dataset(path)
+
+    model_info, metrics, _ = train_model_out_of_core(str(path), 'regression', 'price', FEATURES,
+                                                     chunksize=128, epochs=2)
+    y_test, y_pred = _holdout_predictions(model_info, df, 'price')
+
+    assert metrics['mse'] == pytest.approx(mean_squared_error(y_test, y_pred), rel=1e-9)
+    assert metrics['mae'] == pytest.approx(mean_absolute_error(y_test, y_pred), rel=1e-9)
+    assert metrics['r2_score'] == pytest.approx(r2_score(y_test, y_pred), rel=1e-9)
+    assert metrics['target_min'] == df['price'].min()
+    assert metrics['target_max'] == df['price'].max()
+
+
+def test_out_of_core_classification_metrics_match_sklearn(tmp_path):
+    path = tmp_path / 'data.csv'
+    df = _write_dataset(path)
+
+    model_info, metrics, _ = train_model_out_of_core(str(path), 'classification', 'band', FEATURES,
+                                                     chunksize=128, epochs=2)
+    y_test, y_pred = _holdout_predictions(model_info, df, 'band')
+
+    assert metrics['accuracy'] == pytest.approx(accuracy_score(y_test, y_pred))
+    for name, score in [('precision', precision_score), ('recall', recall_score), ('f1', f1_score)]:
+        assert metrics[name] == pytest.approx(score(y_test, y_pred, average='weighted', zero_division=0))
+
+
+def test_classification_metrics_with_an_unpredicted_class():
+    # Class 2 is never predicted, so its precision is 0 rather than undefined
+    matrix = np.array([[5, 1, 0], [2, 4, 0], [1, 1, 0]])
+    y_true = np.repeat([0, 0, 1, 1, 2, 2], [5, 1, 2, 4, 1, 1])
+    y_pred = np.repeat([0, 1, 0, 1, 0, 1], [5, 1, 2, 4, 1, 1])
+
+    metrics = _classification_metrics(matrix)
+    assert metrics['accuracy'] == pytest.approx(accuracy_score(y_true, y_pred))
+    assert metrics['precision'] == pytest.approx(precision_score(y_true, y_pred, average='weighted',
+                                                                 zero_division=0))
+    assert metrics['f1'] == pytest.approx(f1_score(y_true, y_pred, average='weighted', zero_division=0))
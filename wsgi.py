@@ -0,0 +1,9 @@
+from app import create_app
+from app.models.registry import warm_up_registry
+
+app = create_app()
+
+# Load the most used models before `gunicorn --preload wsgi:app` forks its
+# workers, so they share them copy-on-write
+if app.config['MODEL_WARMUP_COUNT']:
+    warm_up_registry(app, app.config['MODEL_WARMUP_COUNT'])